@@ -0,0 +1,110 @@
+"""
+Import-time budgets for the src packages.
+
+Each module is imported cold in a fresh interpreter with `-X importtime`.
+Exits non-zero when a module's cumulative import time goes over its budget.
+Run from the repository root:
+
+```sh
+python -m benchmarks.import_time
+python -m benchmarks.import_time -o import_times.json
+```
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Cumulative cold import time allowed per module, in milliseconds. Modules
+# importing only the standard library get 100ms. Importing pandas, polars,
+# prefect, boto3 or psutil at module level costs far more than that.
+BUDGETS_MS: dict[str, float] = {
+    "src.aws_.s3.keys": 100,
+    "src.asyncio_.single_flight": 100,
+    "src.asyncio_.throttler": 100,
+    "src.boto3_.instrumentation": 100,
+    "src.boto3_.object_summary": 100,
+    "src.boto3_.scheduler": 100,
+    "src.boto3_.bucket": 250,
+    "src.boto3_.changes": 100,
+    "src.boto3_.compression": 100,
+    "src.logging_.reporting": 100,
+    "src.pandas_.io_": 100,
+    "src.prefect_.cache": 100,
+    "src.prefect_.loggers": 100,
+    "src.prefect_.storage": 100,
+    "src.utilities.misc": 100,
+}
+
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+def import_time_ms(module: str) -> float:
+    """Measures the cumulative cold import time of `module`.
+
+    :param module:          Module to import
+    :raises ImportError:    The module failed to import
+    :return:                Milliseconds
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode:
+        raise ImportError(process.stderr.strip().splitlines()[-1])
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match and match.group(3) == module:
+            return int(match.group(2)) / 1000
+    raise ImportError(f"No import time reported for '{module}'")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command call entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS_MS))
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Cold imports per module, the median is kept.",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, help="JSON file to write results to."
+    )
+    args = parser.parse_args(argv)
+
+    results = {}
+    over = 0
+    for module in args.modules:
+        budget = BUDGETS_MS.get(module)
+        try:
+            ms = statistics.median(
+                import_time_ms(module) for _ in range(args.repeat)
+            )
+        except ImportError as e:
+            print(f"{module:<32} ERROR {e}", file=sys.stderr)
+            results[module] = {"budget_ms": budget, "error": str(e)}
+            over += 1
+            continue
+        status = "OK" if budget is None or ms <= budget else "OVER"
+        over += status == "OVER"
+        print(
+            f"{module:<32} {ms:8.1f}ms / {budget or '-':>5}ms {status}",
+            file=sys.stderr,
+        )
+        results[module] = {"budget_ms": budget, "ms": ms}
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+"""
+Benchmarks for the `pandas_.io_` formats and `prefect_.serializers`.
+
+Run from the repository root:
+
+```sh
+python -m benchmarks.io_formats -o results.json
+python -m benchmarks.io_formats -o new.json --compare results.json
+```
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses as dc
+import gc
+import itertools
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.logging_.reporting import ResourceSampler
+from src.pandas_.io_ import (
+    PandasIOMethod,
+    dataframe_to_bytes,
+    text_to_dataframe,
+)
+
+SEED: int = 20230101
+KINDS = ("numeric", "string")
+POLARS_FORMATS = ("POLARS", "POLARS_IPC")
+
+# Options keeping every format round-trippable on synthetic frames
+WRITE_OPTIONS: dict[PandasIOMethod, dict] = {
+    PandasIOMethod.CSV: {"index": False},
+    PandasIOMethod.EXCEL: {"index": False},
+    PandasIOMethod.JSON: {"orient": "split", "index": False},
+    PandasIOMethod.PARQUET: {"index": False},
+    PandasIOMethod.STATA: {"write_index": False},
+    PandasIOMethod.XML: {"index": False},
+}
+READ_OPTIONS: dict[PandasIOMethod, dict] = {
+    PandasIOMethod.JSON: {"orient": "split"},
+}
+# Measurements compared across runs, lower is better
+COMPARED = (
+    "write_seconds",
+    "read_seconds",
+    "output_bytes",
+    "write_peak_rss_bytes",
+    "read_peak_rss_bytes",
+)
+# Peak memory growth always allowed, as sampling the resident set is coarse
+RSS_SLACK_BYTES: int = 4 * 1024**2
+
+
+@dc.dataclass
+class Result:
+    """Measurements of one format over one frame shape."""
+
+    format: str
+    rows: int
+    width: int
+    kind: str
+    frame_bytes: int
+    output_bytes: int | None = None
+    write_seconds: float | None = None
+    read_seconds: float | None = None
+    write_mb_per_second: float | None = None
+    read_mb_per_second: float | None = None
+    write_peak_rss_bytes: int | None = None
+    read_peak_rss_bytes: int | None = None
+    error: str | None = None
+
+    @property
+    def id(self) -> str:
+        """Identifies the case across runs."""
+        return f"{self.format}/{self.kind}/{self.rows}x{self.width}"
+
+
+def make_frame(rows: int, width: int, kind: str) -> pd.DataFrame:
+    """Creates a reproducible synthetic frame.
+
+    :param rows:    Number of rows
+    :param width:   Number of columns
+    :param kind:    "numeric" for float and int columns, "string" for mostly\
+        string columns
+    :return:        The frame
+    """
+    rng = np.random.default_rng(SEED)
+    data: dict = {}
+    for i in range(width):
+        if kind == "numeric":
+            data[f"c{i}"] = (
+                rng.random(rows) if i % 2 else rng.integers(0, 1_000_000, rows)
+            )
+        elif kind == "string":
+            # A quarter numeric keeps the string frames realistic
+            if i % 4 == 3:
+                data[f"c{i}"] = rng.random(rows)
+            else:
+                data[f"c{i}"] = pd.Series(rng.integers(0, 10_000, rows)).map(
+                    "value-{:05d}".format
+                )
+        else:
+            raise ValueError(f"'kind' must be one of {KINDS}, not '{kind}'")
+    return pd.DataFrame(data)
+
+
+def measure(func: Callable[[], object], repeat: int):
+    """Times `func` and samples its peak memory.
+
+    Peak memory is the growth of the process's resident set over its size
+    before the call, sampled every millisecond. Unlike `tracemalloc` it
+    includes the native allocations of polars and pyarrow. Memory the
+    allocator kept from earlier cases and reuses is not counted, so it is a
+    lower bound.
+
+    :param func:    Function to measure
+    :param repeat:  Number of timed runs, the fastest is kept
+    :return:        The result of the last run, best seconds and peak bytes
+    """
+    gc.collect()
+    with ResourceSampler(interval=0.001, level=logging.DEBUG) as sampler:
+        result = func()
+    peak = max(
+        sampler.summary()["peak_process_rss"] - sampler.samples[0].process_rss,
+        0,
+    )
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best, peak
+
+
+def bench_pandas(
+    method: PandasIOMethod, df: pd.DataFrame, result: Result, repeat: int
+):
+    """Measures a `PandasIOMethod` round trip into `result`."""
+    blob, result.write_seconds, result.write_peak_rss_bytes = measure(
+        lambda: dataframe_to_bytes(
+            df, method, write_options=WRITE_OPTIONS.get(method)
+        ),
+        repeat,
+    )
+    result.output_bytes = len(blob)
+    _, result.read_seconds, result.read_peak_rss_bytes = measure(
+        lambda: text_to_dataframe(
+            blob, method, read_options=READ_OPTIONS.get(method)
+        ),
+        repeat,
+    )
+
+
+def bench_polars(fmt: str, df: pd.DataFrame, result: Result, repeat: int):
+    """Measures a `prefect_.serializers` round trip into `result`."""
+    import polars as pl
+
+    from src.prefect_ import serializers
+
+    serializer = (
+        serializers.PolarsIPCSerializer()
+        if fmt == "POLARS_IPC"
+        else serializers.PolarsSerializer()
+    )
+    frame = pl.from_pandas(df)
+    blob, result.write_seconds, result.write_peak_rss_bytes = measure(
+        lambda: serializer.dumps(frame), repeat
+    )
+    result.output_bytes = len(blob)
+    _, result.read_seconds, result.read_peak_rss_bytes = measure(
+        lambda: serializer.loads(blob), repeat
+    )
+
+
+def run(
+    formats: Iterable[str],
+    rows: Iterable[int],
+    widths: Iterable[int],
+    kinds: Iterable[str],
+    repeat: int,
+) -> list[Result]:
+    """Runs every format over the matrix of frame shapes.
+
+    A format that fails, e.g. because an optional engine is not installed,
+    is recorded with its error rather than stopping the run.
+    """
+    results: list[Result] = []
+    for n, width, kind in itertools.product(rows, widths, kinds):
+        df = make_frame(n, width, kind)
+        frame_bytes = int(df.memory_usage(deep=True, index=False).sum())
+        for fmt in formats:
+            result = Result(fmt, n, width, kind, frame_bytes)
+            try:
+                if fmt in POLARS_FORMATS:
+                    bench_polars(fmt, df, result, repeat)
+                else:
+                    bench_pandas(
+                        PandasIOMethod._member_map_[fmt], df, result, repeat
+                    )
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+            else:
+                mb = frame_bytes / 1024**2
+                result.write_mb_per_second = mb / result.write_seconds
+                result.read_mb_per_second = mb / result.read_seconds
+            print(_format_row(result), file=sys.stderr)
+            results.append(result)
+    return results
+
+
+def _format_row(result: Result) -> str:
+    """Formats a result as a human readable line."""
+    if result.error:
+        return f"{result.id:<32} ERROR {result.error}"
+    return (
+        f"{result.id:<32} "
+        f"write={result.write_mb_per_second:8.1f}MB/s "
+        f"read={result.read_mb_per_second:8.1f}MB/s "
+        f"size={result.output_bytes:>12,d}B "
+        f"write_rss={result.write_peak_rss_bytes / 1024**2:8.1f}MB "
+        f"read_rss={result.read_peak_rss_bytes / 1024**2:8.1f}MB"
+    )
+
+
+def environment() -> dict:
+    """Describes the environment the benchmarks ran in."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    versions = {}
+    for name in ("numpy", "pandas", "polars", "pyarrow", "prefect"):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "packages": versions,
+    }
+
+
+def compare(
+    current: list[dict], baseline: list[dict], tolerance: float
+) -> list[str]:
+    """Lists the cases in `current` that regressed against `baseline`.
+
+    Peak memory may also grow by `RSS_SLACK_BYTES`, and measurements missing
+    from either run are skipped.
+
+    :param current:     Results of this run
+    :param baseline:    Results of a previous run
+    :param tolerance:   Allowed relative slowdown or growth, e.g. 0.1
+    :return:            Descriptions of each regression
+    """
+
+    def key(r: dict) -> tuple:
+        """Identifies a case across runs."""
+        return r["format"], r["kind"], r["rows"], r["width"]
+
+    previous = {key(r): r for r in baseline}
+    regressions = []
+    for r in current:
+        old = previous.get(key(r))
+        if old is None or r["error"] or old["error"]:
+            continue
+        for metric in COMPARED:
+            if r.get(metric) is None or old.get(metric) is None:
+                continue
+            allowed = old[metric] * (1 + tolerance)
+            if metric.endswith("_rss_bytes"):
+                allowed += RSS_SLACK_BYTES
+            if r[metric] > allowed:
+                regressions.append(
+                    f"{'/'.join(map(str, key(r)))} {metric}: "
+                    f"{old[metric]:.6g} -> {r[metric]:.6g}"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command call entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        default=[*PandasIOMethod._member_names_, *POLARS_FORMATS],
+        type=str.upper,
+    )
+    parser.add_argument(
+        "--rows", nargs="+", type=int, default=[1_000, 100_000]
+    )
+    parser.add_argument("--widths", nargs="+", type=int, default=[4, 32])
+    parser.add_argument("--kinds", nargs="+", default=list(KINDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "-o", "--output", type=Path, help="JSON file to write results to."
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="JSON results of a previous run."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Relative regression allowed by --compare.",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.formats, args.rows, args.widths, args.kinds, args.repeat
+    )
+    document = {
+        "environment": environment(),
+        "results": [dc.asdict(r) for r in results],
+    }
+    if args.output:
+        args.output.write_text(json.dumps(document, indent=2))
+    else:
+        json.dump(document, sys.stdout, indent=2)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        regressions = compare(document["results"], baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
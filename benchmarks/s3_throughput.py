@@ -0,0 +1,199 @@
+"""
+Benchmarks for S3 listing, download and upload throughput under `Throttler`
+concurrency limits, against an in-process fake S3.
+
+Run from the repository root:
+
+```sh
+python -m benchmarks.s3_throughput --latency 0.02 --bandwidth 100e6
+python -m benchmarks.s3_throughput -o results.json --limits 1 8 32
+```
+"""
+from __future__ import annotations
+
+import argparse
+import concurrent.futures as cf
+import dataclasses as dc
+import json
+import sys
+import time
+from pathlib import Path
+
+from src.asyncio_.throttler import Throttler
+from src.boto3_ import bucket as bucket_module
+from src.boto3_.bucket import S3Bucket
+from src.pytest_.fake_s3 import FakeS3, FakeS3Config
+
+BUCKET: str = "benchmark-bucket"
+
+
+@dc.dataclass
+class Result:
+    """Throughput of one operation at one concurrency limit."""
+
+    operation: str
+    concurrency_limit: int
+    objects: int
+    bytes: int
+    seconds: float
+    requests: int
+    throttled: int
+
+    @property
+    def objects_per_second(self) -> float:
+        """Objects handled per second."""
+        return self.objects / self.seconds
+
+    @property
+    def mb_per_second(self) -> float:
+        """Megabytes transferred per second."""
+        return self.bytes / 1024**2 / self.seconds
+
+
+def run_throttled(func, items: list, concurrency_limit: int, workers: int):
+    """Calls `func` on every item from `workers` threads, with at most
+    `concurrency_limit` calls at once.
+
+    :return:    Number of calls that raised
+    """
+    throttled = Throttler(concurrency_limit)(func)
+    failures = 0
+    with cf.ThreadPoolExecutor(workers) as pool:
+        for future in cf.as_completed(
+            pool.submit(throttled, i) for i in items
+        ):
+            if future.exception() is not None:
+                failures += 1
+    return failures
+
+
+def bench(
+    s3: FakeS3, objects: int, size: int, limit: int, workers: int
+) -> list[Result]:
+    """Measures upload, listing and download at one concurrency limit."""
+    results = []
+    bucket = S3Bucket(BUCKET)
+    content = bytes(size)
+    keys = [f"data/{i:06d}.bin" for i in range(objects)]
+
+    s3.requests.clear()
+    start = time.perf_counter()
+    failures = run_throttled(
+        lambda key: bucket.bucket.put_object(Key=key, Body=content),
+        keys,
+        limit,
+        workers,
+    )
+    results.append(
+        Result(
+            "upload",
+            limit,
+            objects,
+            objects * size,
+            time.perf_counter() - start,
+            sum(s3.requests.values()),
+            failures,
+        )
+    )
+
+    s3.requests.clear()
+    start = time.perf_counter()
+    listed = list(bucket.files("data/"))
+    results.append(
+        Result(
+            "list",
+            limit,
+            len(listed),
+            0,
+            time.perf_counter() - start,
+            sum(s3.requests.values()),
+            0,
+        )
+    )
+
+    s3.requests.clear()
+    start = time.perf_counter()
+    failures = run_throttled(lambda obj: obj.get(), listed, limit, workers)
+    results.append(
+        Result(
+            "download",
+            limit,
+            len(listed),
+            len(listed) * size,
+            time.perf_counter() - start,
+            sum(s3.requests.values()),
+            failures,
+        )
+    )
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command call entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--objects", type=int, default=200)
+    parser.add_argument("--size", type=int, default=256 * 1024)
+    parser.add_argument(
+        "--limits", nargs="+", type=int, default=[1, 4, 16, 64]
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="Seconds per request."
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=float,
+        default=None,
+        help="Bytes per second shared by all transfers.",
+    )
+    parser.add_argument(
+        "--throttle-rate",
+        type=float,
+        default=0.0,
+        help="Probability a request fails with SlowDown.",
+    )
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument(
+        "-o", "--output", type=Path, help="JSON file to write results to."
+    )
+    args = parser.parse_args(argv)
+
+    results = []
+    for limit in args.limits:
+        s3 = FakeS3(
+            FakeS3Config(
+                latency=args.latency,
+                bandwidth=args.bandwidth,
+                throttle_rate=args.throttle_rate,
+                page_size=args.page_size,
+                seed=0,
+            )
+        )
+        bucket_module.boto3 = s3
+        for result in bench(
+            s3, args.objects, args.size, limit, workers=max(args.limits)
+        ):
+            print(
+                f"{result.operation:<9} limit={limit:<4} "
+                f"{result.objects_per_second:9.1f} objects/s "
+                f"{result.mb_per_second:8.1f} MB/s "
+                f"throttled={result.throttled}",
+                file=sys.stderr,
+            )
+            results.append(
+                {
+                    **dc.asdict(result),
+                    "objects_per_second": result.objects_per_second,
+                    "mb_per_second": result.mb_per_second,
+                }
+            )
+
+    document = {"config": vars(args) | {"output": None}, "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(document, indent=2))
+    else:
+        json.dump(document, sys.stdout, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
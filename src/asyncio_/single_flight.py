@@ -0,0 +1,102 @@
+"""
+A class for coalescing concurrent identical calls into one execution.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures as cf
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Shares one in-flight execution between concurrent calls with the same
+    key.
+
+    The first caller of a key runs the function, and every caller arriving
+    before it finishes gets the same result, or the same exception. Callers
+    can wait from threads with `do` or from coroutines with `do_async`.
+
+    ## Example
+    ```py
+    flights = SingleFlight()
+    content = flights.do(("my-bucket", "reference.csv"), obj.get)
+    content = await flights.do_async(("my-bucket", "reference.csv"), obj.get)
+    ```
+    """
+
+    def __init__(self) -> None:
+        """Creates a `SingleFlight` with nothing in flight."""
+        self.__flights: Dict[Hashable, cf.Future] = {}
+        self.__lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of keys in flight."""
+        return len(self.__flights)
+
+    def __join(self, key: Hashable) -> Tuple[cf.Future, bool]:
+        """Gets the future of `key`, creating it if nothing is in flight.
+
+        :return:    The future and whether the caller is to run the function
+        """
+        with self.__lock:
+            future = self.__flights.get(key)
+            if future is not None:
+                return future, False
+            future = self.__flights[key] = cf.Future()
+            # Cancelling one waiter must not cancel the shared execution
+            future.set_running_or_notify_cancel()
+            return future, True
+
+    def __run(
+        self,
+        key: Hashable,
+        future: cf.Future,
+        func: Callable,
+        args: tuple,
+        kwds: dict,
+    ):
+        """Runs the function, settling the future of `key` with its outcome."""
+        try:
+            result = func(*args, **kwds)
+        except BaseException as e:
+            self.__land(key)
+            future.set_exception(e)
+        else:
+            self.__land(key)
+            future.set_result(result)
+
+    def __land(self, key: Hashable):
+        """Removes `key` from flight, so later calls run the function anew."""
+        with self.__lock:
+            self.__flights.pop(key, None)
+
+    def do(self, key: Hashable, func: Callable, *args, **kwds) -> Any:
+        """Calls `func(*args, **kwds)`, or waits on the call in flight for
+        `key`.
+
+        :param key:     Key identifying identical calls
+        :param func:    Function to call
+        :return:        The function's result
+        """
+        future, leader = self.__join(key)
+        if leader:
+            self.__run(key, future, func, args, kwds)
+        return future.result()
+
+    async def do_async(
+        self, key: Hashable, func: Callable, *args, **kwds
+    ) -> Any:
+        """Calls `func(*args, **kwds)` in the loop's default executor, or
+        waits on the call in flight for `key`.
+
+        :param key:     Key identifying identical calls
+        :param func:    Function to call
+        :return:        The function's result
+        """
+        future, leader = self.__join(key)
+        if leader:
+            asyncio.get_running_loop().run_in_executor(
+                None, self.__run, key, future, func, args, kwds
+            )
+        return await asyncio.wrap_future(future)
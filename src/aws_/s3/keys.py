@@ -1,10 +1,33 @@
 """
 Code for working with AWS S3 keys.
 """
+from __future__ import annotations
+
+import datetime
 import enum
+import hashlib
+import re
 import string
+import sys
 from pathlib import Path
-from typing import Callable
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Sequence
+
+SAFE_CHARACTERS: str = string.ascii_letters + string.digits + "!-_.*'()"
+# Characters that may require special handling, including the ASCII control
+# characters 00-1F hex (0-31 decimal) and 7F (127 decimal)
+SPECIAL_CHARACTERS: str = (
+    "&$@=;/:+ ,?" + "".join(map(chr, range(32))) + chr(127)
+)
+
+
+def _character_class(alphabet: str, negate: bool = False) -> str:
+    """Regex character class of `alphabet`.
+
+    Characters are hex escaped, a syntax shared by Python's `re` and the
+    Rust regex engine used by Polars.
+    """
+    escaped = "".join(f"\\x{ord(c):02X}" for c in sorted(set(alphabet)))
+    return f"[{'^' if negate else ''}{escaped}]"
 
 
 class S3KeyValidator:
@@ -33,14 +56,16 @@ class S3KeyValidator:
 
         NOTE `level` strings are case insensitive.
         """
-        self.__level: S3KeyValidator.Level
+        self.__level: S3KeyValidator.Level = self.Level.SAFE
+        self.__allow_separator: bool = allow_separator
         self.__validator: Callable[[str], bool]
+        self.__pattern: str
+        self.__matcher: re.Pattern
+        self.__invalid: re.Pattern
         # Property setting protocol will be applied
-        # __level and __validator will be set
+        # __level, __validator and the patterns will be set
         self.level = level
 
-        self.allow_separator: bool = allow_separator
-
     @property
     def level(self) -> Level:
         """S3 validation strictness."""
@@ -73,6 +98,38 @@ class S3KeyValidator:
             if self.__level == self.Level.SAFE
             else self._validate_lenient
         )
+        self._compile()
+
+    @property
+    def allow_separator(self) -> bool:
+        """Allows '/' if `level` is Level.SAFE."""
+        return self.__allow_separator
+
+    @allow_separator.setter
+    def allow_separator(self, allow_separator: bool):
+        """Sets whether '/' is allowed at Level.SAFE."""
+        self.__allow_separator = allow_separator
+        self._compile()
+
+    @property
+    def alphabet(self) -> str:
+        """Characters valid at the current level."""
+        if self.__level == self.Level.SAFE:
+            return SAFE_CHARACTERS + ("/" if self.__allow_separator else "")
+        return SAFE_CHARACTERS + SPECIAL_CHARACTERS
+
+    @property
+    def pattern(self) -> str:
+        """Regex fully matching valid keys at the current level."""
+        return self.__pattern
+
+    def _compile(self):
+        """Compiles the patterns of the current level once, rather than on
+        every validation.
+        """
+        self.__pattern = f"{_character_class(self.alphabet)}*"
+        self.__matcher = re.compile(self.__pattern)
+        self.__invalid = re.compile(_character_class(self.alphabet, True))
 
     def _validate_safely(self, key: str) -> bool:
         """Validates the key with the strictest possible conditions.
@@ -82,10 +139,7 @@ class S3KeyValidator:
             full key
         :return:                The key meets safe conditions
         """
-        alphabet = string.ascii_letters + string.digits + "!-_.*'()"
-        if self.allow_separator:
-            alphabet += "/"
-        return all(c in alphabet for c in key)
+        return self.__matcher.fullmatch(key) is not None
 
     def _validate_lenient(self, key: str) -> bool:
         """Validates the key with the more lenient rules.
@@ -93,14 +147,337 @@ class S3KeyValidator:
         :param key:             Key to validate
         :param allow_separator: Allow forward slashes. Useful when key is a\
             full key
-        :return:                The key meets safe conditions
+        :return:                The key meets lenient conditions
         """
-        alphabet = string.ascii_letters + string.digits + "!-_.*'()&$@=;/:+ ,?"
-        # TODO
-        # ASCII character ranges 00-1F hex (0-31 decimal) and 7F (127 decimal)
-        return all(c in alphabet for c in key)
+        return self.__matcher.fullmatch(key) is not None
 
     def is_valid(self, key: Path | str) -> bool:
         """Checks if the key at `self.level`."""
         key = key.as_posix() if isinstance(key, Path) else key
         return self.__validator(key)
+
+    def validate_many(self, keys: Iterable[Path | str]):
+        """Checks many keys at `self.level`.
+
+        Pandas and Polars string Series are checked with their vectorised
+        regex matching, and NumPy arrays with a single pass. Missing values
+        are invalid.
+
+        :param keys:    Keys to validate
+        :return:        Mask of valid keys. A Series for a Series, an array\
+            for an array and a list otherwise
+        """
+        pd = sys.modules.get("pandas")
+        if pd is not None and isinstance(keys, pd.Series):
+            valid = keys.str.fullmatch(self.__pattern)
+            return valid.fillna(False).astype(bool)
+
+        pl = sys.modules.get("polars")
+        if pl is not None and isinstance(keys, pl.Series):
+            return keys.str.contains(f"^{self.__pattern}$").fill_null(False)
+
+        fullmatch = self.__matcher.fullmatch
+        np = sys.modules.get("numpy")
+        if np is not None and isinstance(keys, np.ndarray):
+            return np.fromiter(
+                (
+                    isinstance(k, str) and fullmatch(k) is not None
+                    for k in keys
+                ),
+                dtype=bool,
+                count=len(keys),
+            )
+        return [
+            fullmatch(k.as_posix() if isinstance(k, Path) else k) is not None
+            for k in keys
+        ]
+
+    def invalid_mask(self, keys: Iterable[Path | str]):
+        """Checks many keys at `self.level`, see `validate_many`.
+
+        :param keys:    Keys to validate
+        :return:        Mask of invalid keys
+        """
+        valid = self.validate_many(keys)
+        if isinstance(valid, list):
+            return [not v for v in valid]
+        return ~valid
+
+    def sanitize(self, key: Path | str, replacement: str = "_") -> str:
+        """Replaces the characters of `key` that are invalid at
+        `self.level`.
+
+        :param key:         Key to sanitize
+        :param replacement: String to replace each invalid character with,\
+            defaults to "_"
+        :raises ValueError: `replacement` is itself invalid
+        :return:            The sanitized key
+        """
+        if not self.is_valid(replacement):
+            raise ValueError(
+                f"Replacement '{replacement}' is not valid at {self.level}"
+            )
+        key = key.as_posix() if isinstance(key, Path) else key
+        return self.__invalid.sub(replacement, key)
+
+
+class S3KeyLayout:
+    """Builds and parses hive-style partitioned keys, optionally spread over
+    shard prefixes.
+
+    S3 limits request rates per prefix, so writing every object under one
+    partition caps throughput. A shard segment before the partitions spreads
+    the load:
+     - HASH:                A hash of the partition values, one of `shards`
+     - REVERSED_TIMESTAMP:  The last `shards` digits of the `timestamp`\
+        partition's epoch seconds, reversed, so consecutive writes land on\
+        different prefixes. Naive datetimes are taken as UTC
+
+    Readers compute the prefixes of the partitions they need with
+    `prefixes` rather than listing the bucket.
+
+    :param partitions:  Names of the partitions, outermost first
+    :param prefix:      Prefix of every key, defaults to none
+    :param sharding:    Sharding or string value of Sharding, defaults to\
+        Sharding.NONE
+    :param shards:      Number of shards for HASH, defaults to 16. Digits\
+        for REVERSED_TIMESTAMP, at most the 10 of epoch seconds, defaults\
+        to 2
+    :param timestamp:   Partition holding the timestamp for\
+        REVERSED_TIMESTAMP
+    :param level:       Validation level of the keys, defaults to\
+        Level.LENIENT as '=' needs special handling
+    :param separator:   Separator of partition names and values, defaults\
+        to '='
+    ## Example
+    ```py
+    layout = S3KeyLayout(["date", "region"], prefix="events", sharding="hash")
+    layout.build({"date": "2023-01-01", "region": "us"}, "part-0.parquet")
+    # 'events/b/date=2023-01-01/region=us/part-0.parquet'
+    layout.parse("events/b/date=2023-01-01/region=us/part-0.parquet")
+    # {'date': '2023-01-01', 'region': 'us'}
+    ```
+    """
+
+    class Sharding(enum.Enum):
+        """Ways of sharding keys over prefixes."""
+
+        NONE = enum.auto()
+        HASH = enum.auto()
+        REVERSED_TIMESTAMP = enum.auto()
+
+    # Digits of epoch seconds until the year 2286
+    EPOCH_DIGITS: int = 10
+
+    def __init__(
+        self,
+        partitions: Sequence[str],
+        prefix: str = "",
+        sharding: Sharding | str = Sharding.NONE,
+        shards: int | None = None,
+        timestamp: str | None = None,
+        level: S3KeyValidator.Level | str = S3KeyValidator.Level.LENIENT,
+        separator: str = "=",
+    ) -> None:
+        """Creates the layout, validating its configuration."""
+        if isinstance(sharding, str):
+            try:
+                sharding = self.Sharding._member_map_[sharding.upper()]
+            except KeyError:
+                raise ValueError(
+                    f"Sharding '{sharding}' is not supported. Try any in "
+                    f"{tuple(self.Sharding._member_names_)}"
+                )
+        reversed_timestamp = sharding == self.Sharding.REVERSED_TIMESTAMP
+        if shards is None:
+            shards = 2 if reversed_timestamp else 16
+        if shards < 1:
+            raise ValueError("'shards' must be at least 1")
+        if reversed_timestamp and shards > self.EPOCH_DIGITS:
+            raise ValueError(
+                f"'shards' must be at most {self.EPOCH_DIGITS} to shard by "
+                f"reversed timestamp, not {shards}"
+            )
+        if reversed_timestamp and timestamp not in partitions:
+            raise ValueError(
+                "'timestamp' must name a partition to shard by reversed "
+                "timestamp"
+            )
+        for name in partitions:
+            if not name or separator in name or "/" in name:
+                raise ValueError(
+                    f"Partition name '{name}' must be non-empty and not "
+                    f"contain '{separator}' or '/'"
+                )
+
+        self.partitions: List[str] = list(partitions)
+        self.prefix: str = prefix.strip("/")
+        self.sharding: S3KeyLayout.Sharding = sharding
+        self.shards: int = shards
+        self.timestamp: str | None = timestamp
+        self.separator: str = separator
+        self.validator: S3KeyValidator = S3KeyValidator(level)
+        if self.prefix and not self.validator.is_valid(self.prefix):
+            raise ValueError(
+                f"Prefix '{self.prefix}' is not valid at "
+                f"{self.validator.level}"
+            )
+
+    @staticmethod
+    def _format(value: Any) -> str:
+        """Formats a partition value."""
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def _epoch_seconds(value: Any) -> int:
+        """Epoch seconds of a timestamp partition value, taking naive
+        datetimes as UTC rather than local time.
+        """
+        if isinstance(value, datetime.datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=datetime.timezone.utc)
+            return int(value.timestamp())
+        if isinstance(value, datetime.date):
+            return int(
+                datetime.datetime.combine(
+                    value, datetime.time(), datetime.timezone.utc
+                ).timestamp()
+            )
+        if isinstance(value, str):
+            return S3KeyLayout._epoch_seconds(
+                datetime.datetime.fromisoformat(value)
+            )
+        return int(value)
+
+    def shard(self, values: Mapping[str, Any]) -> str | None:
+        """Shard segment of the partition `values`, None if not sharded."""
+        if self.sharding == self.Sharding.HASH:
+            digest = hashlib.md5(self._partition_path(values).encode())
+            width = len(f"{self.shards - 1:x}")
+            return f"{int(digest.hexdigest(), 16) % self.shards:0{width}x}"
+        if self.sharding == self.Sharding.REVERSED_TIMESTAMP:
+            digits = str(self._epoch_seconds(values[self.timestamp]))
+            return digits[::-1][: self.shards].ljust(self.shards, "0")
+        return None
+
+    def _partition_path(self, values: Mapping[str, Any]) -> str:
+        """Partition segments of `values` without prefix or shard."""
+        missing = [p for p in self.partitions if p not in values]
+        if missing:
+            raise KeyError(f"Missing partition values {missing}")
+        segments = []
+        for name in self.partitions:
+            value = self._format(values[name])
+            if "/" in value:
+                raise ValueError(
+                    f"Value of partition '{name}' must not contain '/'"
+                )
+            segments.append(f"{name}{self.separator}{value}")
+        return "/".join(segments)
+
+    def build(
+        self, values: Mapping[str, Any], filename: str | None = None
+    ) -> str:
+        """Builds the key of the partition `values`.
+
+        :param values:      Value of each partition
+        :param filename:    Name of the object in the partition, defaults to\
+            the partition's folder ending in '/'
+        :raises KeyError:   A partition has no value
+        :raises ValueError: The key is not valid at the layout's level
+        :return:            The key
+        """
+        segments = [
+            self.prefix,
+            self.shard(values),
+            self._partition_path(values),
+        ]
+        key = "/".join(s for s in segments if s)
+        key += "/" + filename if filename else "/"
+        if not self.validator.is_valid(key):
+            raise ValueError(
+                f"Key '{key}' is not valid at {self.validator.level}. Try "
+                "S3KeyValidator.sanitize on the values"
+            )
+        return key
+
+    def prefixes(self, values: Mapping[str, Any] | None = None) -> List[str]:
+        """Lists the prefixes holding every key that matches `values`.
+
+        Leading partitions with values narrow the prefixes. With HASH or
+        REVERSED_TIMESTAMP sharding, a single prefix is only possible when
+        the values determine the shard, otherwise there is one per shard.
+
+        :param values:      Values of the outermost partitions, defaults to\
+            none
+        :raises ValueError: Too many reversed timestamp shards to list\
+            without the timestamp
+        :return:            Prefixes to list
+        """
+        values = values or {}
+        leading = {}
+        for name in self.partitions:
+            if name not in values:
+                break
+            leading[name] = values[name]
+        path = "/".join(
+            f"{name}{self.separator}{self._format(value)}"
+            for name, value in leading.items()
+        )
+
+        if self.sharding == self.Sharding.NONE:
+            shards = [None]
+        elif len(leading) == len(self.partitions) or (
+            self.sharding == self.Sharding.REVERSED_TIMESTAMP
+            and self.timestamp in values
+        ):
+            shards = [self.shard({**values, **leading})]
+        elif self.sharding == self.Sharding.HASH:
+            width = len(f"{self.shards - 1:x}")
+            shards = [f"{i:0{width}x}" for i in range(self.shards)]
+        elif self.shards <= 4:
+            shards = [f"{i:0{self.shards}d}" for i in range(10**self.shards)]
+        else:
+            raise ValueError(
+                f"'{self.timestamp}' is needed to list a layout sharded by "
+                f"{self.shards} reversed timestamp digits"
+            )
+
+        prefixes = []
+        for shard in shards:
+            prefix = "/".join(s for s in (self.prefix, shard, path) if s)
+            prefixes.append(prefix + "/" if prefix else "")
+        return prefixes
+
+    def parse(self, key: Path | str) -> Dict[str, str]:
+        """Parses the partition values of `key`.
+
+        :param key:         Key built by this layout
+        :raises ValueError: `key` does not match the layout
+        :return:            Value of each partition
+        """
+        key = key.as_posix() if isinstance(key, Path) else key
+        segments = key.strip("/").split("/")
+        if self.prefix:
+            prefix = self.prefix.split("/")
+            if segments[: len(prefix)] != prefix:
+                raise ValueError(
+                    f"Key '{key}' does not start with '{self.prefix}'"
+                )
+            segments = segments[len(prefix) :]
+        if self.sharding != self.Sharding.NONE:
+            segments = segments[1:]
+
+        values = {}
+        for name, segment in zip(self.partitions, segments):
+            found, separator, value = segment.partition(self.separator)
+            if found != name or not separator:
+                raise ValueError(
+                    f"Key '{key}' does not have partition '{name}'"
+                )
+            values[name] = value
+        if len(values) != len(self.partitions):
+            raise ValueError(f"Key '{key}' is missing partitions")
+        return values
@@ -4,15 +4,25 @@ Module for simplified S3 Bucket operations.
 from __future__ import annotations
 
 import dataclasses as dc
+import functools
+import time
 from pathlib import Path
-from typing import Any, Callable, Generator, TypeVar
+from typing import TYPE_CHECKING, Any, Callable, Generator, Tuple, TypeVar
 
-# Installing boto3 (AWS's Python package)
-#  - https://boto3.amazonaws.com/v1/documentation/api/latest/guide/quickstart.html
-import boto3
 from marshmallow import Schema, fields, post_load
 
+from ..utilities.lazy import lazy_import
+from .changes import ChangeFeedState
+from .instrumentation import RequestMetrics
 from .object_summary import ObjectSummary
+from .scheduler import DownloadScheduler
+
+if TYPE_CHECKING:
+    from ..asyncio_.single_flight import SingleFlight
+
+# Installing boto3 (AWS's Python package)
+#  - https://boto3.amazonaws.com/v1/documentation/api/latest/guide/quickstart.html
+boto3 = lazy_import("boto3")
 
 Boto3ObjectSummary = TypeVar("Boto3ObjectSummary")
 
@@ -24,6 +34,10 @@ class S3Bucket:
     :param name:            Name of the S3 Bucket
     :param bucket_folder:   Folder of the bucket to work within
     :param profile:         Local AWS profile to use
+    :param metrics:         Metrics to record requests in, passed to the\
+        `ObjectSummary` objects it yields. Defaults to none
+    :param single_flight:   Coalesces concurrent identical gets of the\
+        `ObjectSummary` objects it yields. Defaults to none
 
     1. Download & Install the AWS CLI
         - https://aws.amazon.com/cli/
@@ -36,6 +50,8 @@ class S3Bucket:
     name: str
     bucket_folder: Path | None = None
     profile: str | None = None
+    metrics: RequestMetrics | None = None
+    single_flight: SingleFlight | None = None
 
     def __post_init__(self):
         """Creates more attributes using the passed."""
@@ -63,12 +79,93 @@ class S3Bucket:
         self,
         prefix: Path | str | None = None,
         caster: Callable[[Boto3ObjectSummary], Any] | None = None,
+        *,
+        start_after: str | None = None,
     ) -> Generator[Boto3ObjectSummary | ObjectSummary | Any, None, None]:
-        """Yields all objects in the bucket with the prefix."""
-        prefix = self._resolve_path(prefix)
+        """Yields all objects in the bucket with the prefix, only those with
+        keys after `start_after` if given.
+        """
+        yield from self._list(self._resolve_path(prefix), caster, start_after)
+
+    def _list(
+        self,
+        prefix: str,
+        caster: Callable[[Boto3ObjectSummary], Any] | None = None,
+        start_after: str | None = None,
+    ) -> Generator[Boto3ObjectSummary | ObjectSummary | Any, None, None]:
+        """Yields all objects with the resolved prefix."""
         if not caster:
-            caster = ObjectSummary
-        yield from map(caster, self.bucket.objects.iterator(Prefix=prefix))
+            caster = functools.partial(
+                ObjectSummary,
+                metrics=self.metrics,
+                single_flight=self.single_flight,
+            )
+        params = {"Prefix": prefix}
+        if start_after:
+            params["Marker"] = start_after
+        if self.metrics is None:
+            yield from map(caster, self.bucket.objects.iterator(**params))
+            return
+
+        # Times each page request separately from the caller's processing
+        pages = self.bucket.objects.filter(**params).pages()
+        for page in self.metrics.measure_each("list", pages):
+            yield from map(caster, page)
+
+    def changes_since(
+        self, state: ChangeFeedState
+    ) -> Generator[ObjectSummary, None, None]:
+        """Yields the objects new or changed since the checkpoint, advancing
+        it as they are yielded.
+
+        Only the keys after `state.marker` are listed, so a poll costs a few
+        requests rather than a listing of the whole prefix.
+
+        :param state:   Checkpoint of the prefix, updated in place
+        :return:        Generator of new or changed objects
+        """
+        last_key = None
+        for obj in self._list(state.prefix, start_after=state.marker):
+            last_key = obj.key
+            if state.observe(obj.key, obj.e_tag):
+                yield obj
+        state.advance(last_key)
+
+    def watch(
+        self,
+        prefix: Path | str | None = None,
+        interval: float = 60.0,
+        *,
+        state: ChangeFeedState | None = None,
+        polls: int | None = None,
+        **kwds,
+    ) -> Generator[ObjectSummary, None, None]:
+        """Polls the prefix, yielding new or changed objects as they appear.
+
+        `**kwds` are passed to `ChangeFeedState` when `state` is not given.
+
+        :param prefix:      Prefix to watch
+        :param interval:    Seconds between polls, defaults to 60
+        :param state:       Checkpoint to resume from, defaults to a new one\
+            which yields every object on the first poll
+        :param polls:       Number of polls to make, defaults to no limit
+        :return:            Generator of new or changed objects
+        ## Example
+        ```py
+        bucket = S3Bucket("my-bucket")
+        for obj in bucket.watch("events/", 300, partition_depth=1):
+            process(obj.get())
+        ```
+        """
+        if state is None:
+            state = ChangeFeedState(self._resolve_path(prefix), **kwds)
+        poll = 0
+        while True:
+            yield from self.changes_since(state)
+            poll += 1
+            if polls is not None and poll >= polls:
+                return
+            time.sleep(interval)
 
     def files(
         self,
@@ -91,6 +188,41 @@ class S3Bucket:
             lambda o: o.key.endswith("/"), self.all(prefix, caster=caster)
         )
 
+    def prefetch(
+        self,
+        prefix: Path | str | None = None,
+        depth: int = 4,
+        max_bytes: int | None = None,
+        ordered: bool = True,
+        **kwds,
+    ) -> Generator[Tuple[ObjectSummary, bytes | Path], None, None]:
+        """Yields the files in the bucket with the prefix along with their
+        content, downloading the next ones in the background while the
+        consumer works on the current one.
+
+        `**kwds` are passed to `DownloadScheduler`. Files larger than
+        `max_bytes` are streamed to disk and yielded with their path. Unless
+        a `spill_directory` is given, they are removed once the generator
+        finishes or is closed.
+
+        :param prefix:      Prefix to list
+        :param depth:       Number of files to download ahead, defaults to 4
+        :param max_bytes:   Budget of bytes downloaded but not yet consumed,\
+            defaults to no budget
+        :param ordered:     Yield in listing order, otherwise in the order\
+            downloads finish, defaults to True
+        :return:            Generator of files and their content
+        ## Example
+        ```py
+        bucket = S3Bucket("my-bucket")
+        for obj, content in bucket.prefetch("exports/", 8, 256 * 1024**2):
+            process(content)
+        ```
+        """
+        kwds.setdefault("workers", depth)
+        scheduler = DownloadScheduler(max_bytes, lookahead=depth, **kwds)
+        yield from scheduler.download(self.files(prefix), ordered)
+
 
 class S3BucketSchema(Schema):
     """Schema for `S3Bucket`."""
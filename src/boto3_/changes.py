@@ -0,0 +1,114 @@
+"""
+Checkpoints for polling a bucket prefix for new and changed objects without
+relisting all of it.
+"""
+from __future__ import annotations
+
+import dataclasses as dc
+import json
+from typing import Dict
+
+
+@dc.dataclass
+class ChangeFeedState:
+    """Checkpoint of a change feed over a bucket prefix.
+
+    With a `partition_depth` of 0 the layout is taken to be append-only with
+    time-ordered keys, and each poll lists only the keys after `start_after`.
+    Otherwise the keys are grouped into partitions of `partition_depth`
+    folders under `prefix`, e.g. 'date=2023-01-01/', which must sort in time
+    order. Each poll relists only the newest `tail_partitions` partitions and
+    anything after them, comparing ETags to find changed objects.
+
+    :param prefix:          Key prefix watched, including any bucket folder
+    :param partition_depth: Folder depth of partitions under `prefix`,\
+        defaults to 0 for append-only layouts
+    :param tail_partitions: Number of the newest partitions to relist for\
+        changes, defaults to 1
+    :param start_after:     Last key seen
+    :param partitions:      ETags by key of the tail partitions
+
+    NOTE Deleted objects are not reported. With a `partition_depth`, objects
+    above it are ignored, as are changes to partitions older than the tail.
+    ## Example
+    ```py
+    state = ChangeFeedState("events", partition_depth=1)
+    for obj in bucket.changes_since(state):
+        ...
+    Path("checkpoint.json").write_text(state.to_json())
+    ```
+    """
+
+    prefix: str = ""
+    partition_depth: int = 0
+    tail_partitions: int = 1
+    start_after: str = ""
+    partitions: Dict[str, Dict[str, str]] = dc.field(default_factory=dict)
+
+    def __post_init__(self):
+        """Validates the checkpoint."""
+        if self.partition_depth < 0:
+            raise ValueError("'partition_depth' must be at least 0")
+        if self.tail_partitions < 1:
+            raise ValueError("'tail_partitions' must be at least 1")
+
+    @property
+    def marker(self) -> str:
+        """Key to list after, the oldest tail partition's if there are any."""
+        if self.partitions:
+            return min(self.partitions)
+        return self.start_after
+
+    def partition(self, key: str) -> str | None:
+        """Gets the partition of `key`, None if it is above the partition
+        depth.
+        """
+        rest = key[len(self.prefix) :]
+        lead = 1 if rest.startswith("/") else 0
+        parts = rest.split("/")
+        if len(parts) <= self.partition_depth + lead:
+            return None
+        return (
+            self.prefix + "/".join(parts[: self.partition_depth + lead]) + "/"
+        )
+
+    def observe(self, key: str, e_tag: str) -> bool:
+        """Records a listed object.
+
+        :param key:     Object's key
+        :param e_tag:   Object's ETag
+        :return:        Whether the object is new or changed
+        """
+        if not self.partition_depth:
+            if key <= self.start_after:
+                return False
+            self.start_after = key
+            return True
+
+        partition = self.partition(key)
+        if partition is None:
+            return False
+        e_tags = self.partitions.setdefault(partition, {})
+        if e_tags.get(key) == e_tag:
+            return False
+        e_tags[key] = e_tag
+        return True
+
+    def advance(self, last_key: str | None = None):
+        """Completes a poll, dropping all but the tail partitions.
+
+        :param last_key:    Last key listed in the poll
+        """
+        if last_key is not None and last_key > self.start_after:
+            self.start_after = last_key
+        for partition in sorted(self.partitions)[: -self.tail_partitions]:
+            del self.partitions[partition]
+
+    def to_json(self, **kwds) -> str:
+        """Dumps the state as JSON. `**kwds` are passed to `json.dumps`."""
+        return json.dumps(dc.asdict(self), **kwds)
+
+    @classmethod
+    def from_json(cls, text: str) -> ChangeFeedState:
+        """Loads a checkpoint dumped by `to_json`."""
+        return cls(**json.loads(text))
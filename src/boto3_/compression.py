@@ -0,0 +1,156 @@
+"""
+Incremental decompression of gzip and zstd compressed S3 object streams.
+"""
+from __future__ import annotations
+
+import enum
+import zlib
+from typing import Callable, Generator, Iterable, Iterator
+
+from ..utilities.lazy import lazy_import
+
+# Installing zstandard is only needed for zstd compressed objects
+#  - https://python-zstandard.readthedocs.io/
+zstandard = lazy_import("zstandard")
+
+
+class Compression(enum.Enum):
+    """Compression formats that can be decompressed as they stream."""
+
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
+CONTENT_ENCODINGS: dict[str, Compression] = {
+    "gzip": Compression.GZIP,
+    "x-gzip": Compression.GZIP,
+    "zstd": Compression.ZSTD,
+}
+SUFFIXES: dict[str, Compression] = {
+    ".gz": Compression.GZIP,
+    ".gzip": Compression.GZIP,
+    ".zst": Compression.ZSTD,
+    ".zstd": Compression.ZSTD,
+}
+MAGIC_BYTES: dict[bytes, Compression] = {
+    b"\x1f\x8b": Compression.GZIP,
+    b"\x28\xb5\x2f\xfd": Compression.ZSTD,
+}
+
+
+def detect_compression(
+    content_encoding: str | None = None, key: str = "", head: bytes = b""
+) -> Compression | None:
+    """Detects the compression of an object from its Content-Encoding, then
+    its key's suffix, then its first bytes.
+
+    :param content_encoding:    Object's Content-Encoding
+    :param key:                 Object's key
+    :param head:                First bytes of the object
+    :return:                    The compression, None if uncompressed
+    """
+    if content_encoding:
+        for encoding in reversed(content_encoding.lower().split(",")):
+            if encoding.strip() in CONTENT_ENCODINGS:
+                return CONTENT_ENCODINGS[encoding.strip()]
+    for suffix, compression in SUFFIXES.items():
+        if key.lower().endswith(suffix):
+            return compression
+    for magic, compression in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _compression(compression: Compression | str) -> Compression:
+    """Gets the `Compression` of a case insensitive value."""
+    if isinstance(compression, str):
+        return Compression(compression.lower())
+    return Compression(compression)
+
+
+def _decompressor(compression: Compression) -> Callable[[], object]:
+    """Gets the factory of incremental decompressors for `compression`."""
+    if compression is Compression.GZIP:
+        # 32 + 15 accepts gzip and zlib headers with the largest window
+        return lambda: zlib.decompressobj(wbits=47)
+    return lambda: zstandard.ZstdDecompressor().decompressobj()
+
+
+def iter_decompressed(
+    chunks: Iterable[bytes], compression: Compression | str
+) -> Generator[bytes, None, None]:
+    """Decompresses chunks of a stream as they arrive. Concatenated gzip
+    members and zstd frames are decompressed one after another.
+
+    :param chunks:      Compressed chunks
+    :param compression: Compression of the stream, case insensitive
+    :raises EOFError:   The stream ends partway through a gzip member or\
+        zstd frame, e.g. when truncated
+    :return:            Generator of decompressed chunks
+    """
+    compression = _compression(compression)
+    factory = _decompressor(compression)
+    decompressor = factory()
+    # Whether the current decompressor has been fed part of a member
+    started = False
+    for chunk in chunks:
+        while chunk:
+            started = True
+            decompressed = decompressor.decompress(chunk)
+            if decompressed:
+                yield decompressed
+            if not decompressor.eof:
+                break
+            chunk = decompressor.unused_data
+            decompressor = factory()
+            started = False
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+    if started and not decompressor.eof:
+        raise EOFError(
+            f"Stream ended before the end of its {compression.value} data, "
+            "it may be truncated"
+        )
+
+
+def decompressing(
+    chunks: Iterable[bytes],
+    decompress: bool | str | Compression | None,
+    content_encoding: str | None = None,
+    key: str = "",
+) -> Iterator[bytes]:
+    """Decompresses a stream if asked to, detecting its compression for the
+    "auto" mode.
+
+    :param chunks:              Chunks of the stream
+    :param decompress:          Compression of the stream, "auto" or True to\
+        detect it, None or False to leave the stream as is. Strings are\
+        case insensitive
+    :param content_encoding:    Stream's Content-Encoding, for detection
+    :param key:                 Stream's object key, for detection
+    :return:                    Iterator of decompressed chunks
+    """
+    if not decompress:
+        return iter(chunks)
+    if decompress is True or (
+        isinstance(decompress, str) and decompress.lower() == "auto"
+    ):
+        chunks = iter(chunks)
+        head = next(chunks, b"")
+        compression = detect_compression(content_encoding, key, head)
+        chunks = _prepend(head, chunks)
+        if compression is None:
+            return chunks
+        return iter_decompressed(chunks, compression)
+    return iter_decompressed(chunks, decompress)
+
+
+def _prepend(
+    head: bytes, chunks: Iterator[bytes]
+) -> Generator[bytes, None, None]:
+    """Yields `head` ahead of `chunks`."""
+    if head:
+        yield head
+    yield from chunks
@@ -0,0 +1,248 @@
+"""
+Request counters and latency histograms for S3 operations.
+"""
+from __future__ import annotations
+
+import bisect
+import contextlib
+import dataclasses as dc
+import json
+import logging
+import threading
+import time
+from typing import Dict, Generator, Iterable, List, TypeVar
+
+T = TypeVar("T")
+
+# Upper bounds of the latency buckets in seconds, with a final overflow
+# bucket. Roughly 1-2-5 steps from 1ms to 2 minutes.
+LATENCY_BOUNDS: List[float] = [
+    m * 10**e for e in range(-3, 2) for m in (1, 2, 5)
+] + [120.0]
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of latencies in seconds.
+
+    Recording is a binary search and an increment, cheap enough to leave on.
+    Quantiles are estimated as the upper bound of the bucket they fall in.
+    """
+
+    def __init__(self) -> None:
+        """Creates an empty histogram."""
+        self.counts: List[int] = [0] * (len(LATENCY_BOUNDS) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    def record(self, seconds: float):
+        """Adds a latency to the histogram."""
+        self.counts[bisect.bisect_left(LATENCY_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimates the `q` quantile, 0 if nothing is recorded."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BOUNDS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        """Summary of the histogram."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+            "buckets": dict(
+                zip([*map(str, LATENCY_BOUNDS), "inf"], self.counts)
+            ),
+        }
+
+
+@dc.dataclass
+class OperationStats:
+    """Counters of one operation type."""
+
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    bytes: int = 0
+    latency: LatencyHistogram = dc.field(default_factory=LatencyHistogram)
+
+
+@dc.dataclass
+class Measurement:
+    """Details of a request being measured, set by the caller."""
+
+    bytes: int = 0
+    retries: int = 0
+
+
+class RequestMetrics:
+    """Collects request, byte, retry and error counts and latencies per
+    operation type.
+
+    Pass one to `S3Bucket` or `ObjectSummary` to instrument them. Metrics
+    can be shared between buckets and threads.
+
+    ## Example
+    ```py
+    metrics = RequestMetrics()
+    bucket = S3Bucket("my-bucket", metrics=metrics)
+    for obj in bucket.files("exports/"):
+        obj.get()
+    metrics.snapshot()["get"]["latency"]["p99"]
+    metrics.log()
+    ```
+    """
+
+    def __init__(self) -> None:
+        """Creates empty metrics."""
+        self.__operations: Dict[str, OperationStats] = {}
+        self.__lock: threading.Lock = threading.Lock()
+        self.__started: float = time.monotonic()
+
+    def record(
+        self,
+        operation: str,
+        seconds: float,
+        bytes: int = 0,
+        retries: int = 0,
+        error: bool = False,
+    ):
+        """Records one request.
+
+        :param operation:   Operation type, e.g. "get" or "list"
+        :param seconds:     Latency of the request
+        :param bytes:       Bytes transferred
+        :param retries:     Retries the request needed
+        :param error:       The request failed
+        """
+        with self.__lock:
+            stats = self.__operations.get(operation)
+            if stats is None:
+                stats = self.__operations[operation] = OperationStats()
+            stats.requests += 1
+            stats.errors += error
+            stats.retries += retries
+            stats.bytes += bytes
+            stats.latency.record(seconds)
+
+    @contextlib.contextmanager
+    def measure(self, operation: str) -> Generator[Measurement, None, None]:
+        """Times the block as one request of `operation`. Exceptions are
+        counted as errors and re-raised.
+        """
+        measurement = Measurement()
+        start = time.perf_counter()
+        try:
+            yield measurement
+        except BaseException:
+            self.record(
+                operation,
+                time.perf_counter() - start,
+                measurement.bytes,
+                measurement.retries,
+                error=True,
+            )
+            raise
+        self.record(
+            operation,
+            time.perf_counter() - start,
+            measurement.bytes,
+            measurement.retries,
+        )
+
+    def measure_each(
+        self, operation: str, requests: Iterable[T]
+    ) -> Generator[T, None, None]:
+        """Times fetching each item of `requests` as one request of
+        `operation`, e.g. the pages of a paginated listing. The fetch that
+        finds the iterable exhausted is not counted. Exceptions are counted
+        as errors and re-raised.
+
+        :param operation:   Operation type, e.g. "list"
+        :param requests:    Iterable making a request per item
+        :return:            Generator of the items
+        """
+        iterator = iter(requests)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            except BaseException:
+                self.record(operation, time.perf_counter() - start, error=True)
+                raise
+            self.record(operation, time.perf_counter() - start)
+            yield item
+
+    def snapshot(self) -> dict:
+        """Counters, rates and latency summaries of each operation."""
+        with self.__lock:
+            elapsed = max(time.monotonic() - self.__started, 1e-9)
+            return {
+                operation: {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "bytes": stats.bytes,
+                    "requests_per_second": stats.requests / elapsed,
+                    "bytes_per_second": stats.bytes / elapsed,
+                    "latency": stats.latency.snapshot(),
+                }
+                for operation, stats in self.__operations.items()
+            }
+
+    def to_json(self, **kwds) -> str:
+        """Dumps the snapshot as JSON. `**kwds` are passed to `json.dumps`."""
+        return json.dumps(self.snapshot(), **kwds)
+
+    def log(
+        self,
+        logger: logging.Logger | None = None,
+        level: logging._Level = logging.INFO,
+    ):
+        """Logs a line per operation.
+
+        :param logger:  Logger to log with, defaults to the Prefect run logger\
+            if in a run
+        :param level:   Level to log at, defaults to logging.INFO
+        """
+        if logger is None:
+            from ..prefect_.loggers import get_prefect_or_default_logger
+
+            logger = get_prefect_or_default_logger(__name__)
+        for operation, stats in self.snapshot().items():
+            logger.log(
+                level,
+                "S3 %s: requests=%d errors=%d retries=%d bytes=%d "
+                "rate=%.1f/s p50=%.3fs p99=%.3fs max=%.3fs",
+                operation,
+                stats["requests"],
+                stats["errors"],
+                stats["retries"],
+                stats["bytes"],
+                stats["requests_per_second"],
+                stats["latency"]["p50"],
+                stats["latency"]["p99"],
+                stats["latency"]["max"],
+            )
+
+    def reset(self):
+        """Clears every counter."""
+        with self.__lock:
+            self.__operations.clear()
+            self.__started = time.monotonic()
@@ -5,15 +5,41 @@ More can be found at https://boto3.amazonaws.com/v1/documentation/api/latest/ref
 """
 from __future__ import annotations
 
+import asyncio
 import datetime
+import functools
+import io
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Generator, Hashable
+
+from .compression import Compression, decompressing
+from .instrumentation import Measurement, RequestMetrics
+
+if TYPE_CHECKING:
+    from ..asyncio_.single_flight import SingleFlight
 
 
 class ObjectSummary:
     """Wrapper for `boto3.s3.ObjectSummary`."""
 
-    def __init__(self, obj) -> None:
-        """Wraps a `boto.s3.ObjectSummary`."""
+    def __init__(
+        self,
+        obj,
+        metrics: RequestMetrics | None = None,
+        single_flight: SingleFlight | None = None,
+    ) -> None:
+        """Wraps a `boto.s3.ObjectSummary`.
+
+        :param obj:             Object to wrap
+        :param metrics:         Metrics to record requests in, defaults to\
+            none
+        :param single_flight:   Coalesces concurrent identical `get` calls\
+            into one request, defaults to none
+        """
         self.obj = obj
+        self.metrics: RequestMetrics | None = metrics
+        self.single_flight: SingleFlight | None = single_flight
 
     def __repr__(self) -> str:
         return f"@{self.obj!r}"
@@ -53,16 +79,191 @@ class ObjectSummary:
         """Object's storage class."""
         return self.obj.storage_class
 
-    def get(self, **kwds) -> bytes:
+    def get(
+        self, decompress: bool | str | Compression | None = None, **kwds
+    ) -> bytes:
         """Gets the object from S3.
 
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.ObjectSummary.get
+
+        :param decompress:  Compression to decompress the object from as it\
+            streams in, "auto" to detect it, defaults to none
+        """
+        if self.single_flight is not None:
+            return self.single_flight.do(
+                self._flight_key(decompress, kwds),
+                self._get,
+                decompress,
+                **kwds,
+            )
+        return self._get(decompress, **kwds)
+
+    def _flight_key(
+        self, decompress: bool | str | Compression | None, kwds: dict
+    ) -> Hashable:
+        """Key of a `get` call, identical for calls returning the same
+        content, e.g. with the same `Range` or `IfMatch` ETag.
+
+        The object's ETag is part of the key, so a read of an overwritten
+        object does not join a request in flight for its previous version.
+        """
+        return (
+            self.bucket_name,
+            self.key,
+            self.e_tag,
+            decompress,
+            *sorted(kwds.items()),
+        )
+
+    def _get(
+        self, decompress: bool | str | Compression | None = None, **kwds
+    ) -> bytes:
+        """Gets the object from S3 without coalescing."""
+        if decompress:
+            buffer = io.BytesIO()
+            for chunk in self.stream(decompress=decompress, **kwds):
+                buffer.write(chunk)
+            return buffer.getvalue()
+
+        if self.metrics is None:
+            return self.obj.get(**kwds).get("Body").read()
+
+        with self.metrics.measure("get") as measurement:
+            response = self.obj.get(**kwds)
+            measurement.retries = response.get("ResponseMetadata", {}).get(
+                "RetryAttempts", 0
+            )
+            content = response.get("Body").read()
+            measurement.bytes = len(content)
+        return content
+
+    def stream(
+        self,
+        chunk_size: int = 1024**2,
+        decompress: bool | str | Compression | None = None,
+        **kwds,
+    ) -> Generator[bytes, None, None]:
+        """Streams the object from S3 in chunks. `**kwds` are passed to `get`.
+
+        Compressed objects are decompressed chunk by chunk as they arrive,
+        so only the decompressed form is held. With "auto" the compression
+        is detected from the Content-Encoding, then the key's suffix, then
+        the first bytes.
+
+        Closing the generator before the end closes the response's stream,
+        and is measured as a successful request.
+
+        :param chunk_size:  Bytes to read from the stream at a time, defaults\
+            to 1MiB
+        :param decompress:  Compression to decompress the object from,\
+            "auto" to detect it, defaults to none
+        :return:            Generator of the object's chunks
+        """
+        # Only the request and the transfer are timed, not the time the
+        # consumer spends between chunks
+        measurement = Measurement()
+        seconds = 0.0
+        error = False
+        body = None
+        try:
+            start = time.perf_counter()
+            try:
+                response = self.obj.get(**kwds)
+            finally:
+                seconds += time.perf_counter() - start
+            measurement.retries = response.get("ResponseMetadata", {}).get(
+                "RetryAttempts", 0
+            )
+            body = response.get("Body")
+
+            def counted() -> Generator[bytes, None, None]:
+                """Times the transfer and counts its bytes."""
+                nonlocal seconds
+                chunks = body.iter_chunks(chunk_size)
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        chunk = next(chunks)
+                    except StopIteration:
+                        return
+                    finally:
+                        seconds += time.perf_counter() - start
+                    measurement.bytes += len(chunk)
+                    yield chunk
+
+            yield from decompressing(
+                counted(),
+                decompress,
+                response.get("ContentEncoding"),
+                self.key,
+            )
+        except GeneratorExit:
+            # The consumer stopped early, which is not a failed request
+            raise
+        except BaseException:
+            error = True
+            raise
+        finally:
+            if body is not None:
+                # Releases the connection of a stream left unfinished
+                body.close()
+            if self.metrics is not None:
+                self.metrics.record(
+                    "get",
+                    seconds,
+                    measurement.bytes,
+                    measurement.retries,
+                    error=error,
+                )
+
+    def download_to(
+        self,
+        path: Path | str,
+        chunk_size: int = 8 * 1024**2,
+        decompress: bool | str | Compression | None = None,
+        **kwds,
+    ) -> Path:
+        """Streams the object from S3 to a local file, holding at most a
+        chunk of it in memory.
+
+        The file is written under a '.part' suffix and renamed once complete.
+        `**kwds` are passed to `get`.
+
+        :param path:        Path of the file to write
+        :param chunk_size:  Bytes to read from the stream at a time, defaults\
+            to 8MiB
+        :param decompress:  Compression to decompress the object from,\
+            "auto" to detect it, defaults to none
+        :return:            Path of the written file
         """
-        return self.obj.get(**kwds).get("Body").read()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{path.name}.part")
+        with partial.open("wb") as file:
+            for chunk in self.stream(chunk_size, decompress, **kwds):
+                file.write(chunk)
+        partial.replace(path)
+        return path
 
-    async def get_async(self, **kwds) -> bytes:
+    async def get_async(
+        self, decompress: bool | str | Compression | None = None, **kwds
+    ) -> bytes:
         """Gets the object from S3.
 
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.ObjectSummary.get
+
+        The blocking request runs in the loop's default executor.
+
+        :param decompress:  Compression to decompress the object from as it\
+            streams in, "auto" to detect it, defaults to none
         """
-        return self.get(**kwds)
+        if self.single_flight is not None:
+            return await self.single_flight.do_async(
+                self._flight_key(decompress, kwds),
+                self._get,
+                decompress,
+                **kwds,
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self.get, decompress, **kwds)
+        )
@@ -0,0 +1,194 @@
+"""
+Downloads many S3 objects at once within a memory budget.
+"""
+from __future__ import annotations
+
+import collections
+import concurrent.futures as cf
+import os
+import tempfile
+from pathlib import Path, PurePosixPath
+from typing import Deque, Generator, Iterable, Tuple
+
+from .object_summary import ObjectSummary
+
+
+class DownloadScheduler:
+    """Downloads objects in parallel, running ahead of the consumer while
+    admitting them by their listed size so the bytes downloaded but not yet
+    consumed stay within `max_bytes`.
+
+    Objects larger than `max_bytes`, or of unknown size, are streamed to a
+    file under `spill_directory` instead of read into memory, and count only
+    `chunk_size` against the budget.
+
+    :param max_bytes:       Budget of bytes in flight, defaults to no budget
+    :param workers:         Number of download threads, defaults to 8
+    :param lookahead:       Number of downloads to run ahead of the object\
+        being consumed, defaults to twice the workers
+    :param spill_directory: Directory to stream large objects to, defaults\
+        to a temporary directory for each download, removed with its files\
+        once the download's generator finishes or is closed
+    :param chunk_size:      Bytes read at a time when streaming, defaults to\
+        8MiB
+    :param get_options:     Keyword arguments to pass to `ObjectSummary.get`
+    ## Example
+    ```py
+    scheduler = DownloadScheduler(512 * 1024**2)
+    for obj, content in scheduler.download(bucket.files("exports/")):
+        if isinstance(content, Path):
+            content = content.open("rb")
+        ...
+    ```
+    """
+
+    def __init__(
+        self,
+        max_bytes: int | None = None,
+        workers: int = 8,
+        lookahead: int | None = None,
+        spill_directory: Path | str | None = None,
+        chunk_size: int = 8 * 1024**2,
+        get_options: dict | None = None,
+    ) -> None:
+        """Creates a scheduler."""
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("'max_bytes' must be at least 1")
+        if workers < 1:
+            raise ValueError("'workers' must be at least 1")
+        if lookahead is not None and lookahead < 1:
+            raise ValueError("'lookahead' must be at least 1")
+        self.max_bytes: int | None = max_bytes
+        self.workers: int = workers
+        self.lookahead: int = lookahead or workers * 2
+        self.spill_directory: Path | None = (
+            Path(spill_directory) if spill_directory else None
+        )
+        self.chunk_size: int = min(chunk_size, max_bytes or chunk_size)
+        self.get_options: dict = get_options or {}
+
+    def spills(self, obj: ObjectSummary) -> bool:
+        """Whether `obj` is streamed to disk rather than read into memory."""
+        if self.max_bytes is None:
+            return False
+        return obj.size is None or obj.size > self.max_bytes
+
+    def cost(self, obj: ObjectSummary) -> int:
+        """Bytes of the budget that downloading `obj` takes."""
+        return self.chunk_size if self.spills(obj) else obj.size or 0
+
+    def spill_path(
+        self, obj: ObjectSummary, directory: Path | None = None
+    ) -> Path:
+        """Path under the spill directory that `obj` is streamed to.
+
+        :param obj:         Object to stream
+        :param directory:   Spill directory, defaults to `spill_directory`
+        :raises ValueError: The key is absolute or its '..' segments leave\
+            the bucket's folder, as the file would be written elsewhere
+        :return:            The path, normalised
+        """
+        directory = directory or self.spill_directory
+        if directory is None:
+            raise ValueError("'spill_directory' must be set to spill objects")
+        folder = Path(os.path.normpath(directory / obj.bucket_name))
+        path = Path(os.path.normpath(folder / obj.key))
+        if PurePosixPath(obj.key).is_absolute() or folder not in path.parents:
+            raise ValueError(
+                f"Key '{obj.key}' must stay under the spill directory "
+                f"'{folder}'"
+            )
+        return path
+
+    def fetch(
+        self, obj: ObjectSummary, directory: Path | None = None
+    ) -> bytes | Path:
+        """Downloads `obj` into memory, or to disk if it is too large.
+
+        :param obj:         Object to download
+        :param directory:   Spill directory, defaults to `spill_directory`
+        :raises ValueError: The key would be spilled outside the spill\
+            directory
+        :return:            The object's bytes, or the path of the file\
+            written
+        """
+        if not self.spills(obj):
+            return obj.get(**self.get_options)
+        return obj.download_to(
+            self.spill_path(obj, directory),
+            self.chunk_size,
+            **self.get_options,
+        )
+
+    def download(
+        self, objects: Iterable[ObjectSummary], ordered: bool = True
+    ) -> Generator[Tuple[ObjectSummary, bytes | Path], None, None]:
+        """Downloads objects, yielding each with its bytes or the path it was
+        streamed to.
+
+        An object's share of the budget is released once the consumer asks
+        for the next one, so it should not keep the bytes around. Without a
+        `spill_directory`, spilled files are removed once the generator
+        finishes or is closed.
+
+        :param objects: Objects to download
+        :param ordered: Yield in the order of `objects`, otherwise in the\
+            order downloads finish, defaults to True
+        :return:        Generator of objects and their content
+        """
+        # Includes the download taken for the consumer
+        max_pending: int = self.lookahead + 1
+        pending: Deque[
+            Tuple[ObjectSummary, int, cf.Future]
+        ] = collections.deque()
+        in_flight: int = 0
+        spill_directory: Path | None = self.spill_directory
+        # Created on the first spill, only if no directory is set
+        temporary: tempfile.TemporaryDirectory | None = None
+
+        def take() -> Tuple[ObjectSummary, int, cf.Future]:
+            """Pops the next download to yield."""
+            if ordered:
+                return pending.popleft()
+            cf.wait([f for *_, f in pending], return_when=cf.FIRST_COMPLETED)
+            entry = next(e for e in pending if e[2].done())
+            pending.remove(entry)
+            return entry
+
+        try:
+            with cf.ThreadPoolExecutor(self.workers) as pool:
+                try:
+                    for obj in objects:
+                        cost = self.cost(obj)
+                        if self.spills(obj) and spill_directory is None:
+                            temporary = tempfile.TemporaryDirectory(
+                                prefix="s3-"
+                            )
+                            spill_directory = Path(temporary.name)
+                        while pending and (
+                            len(pending) >= max_pending
+                            or (
+                                self.max_bytes is not None
+                                and in_flight + cost > self.max_bytes
+                            )
+                        ):
+                            done, done_cost, future = take()
+                            try:
+                                yield done, future.result()
+                            finally:
+                                in_flight -= done_cost
+
+                        future = pool.submit(self.fetch, obj, spill_directory)
+                        pending.append((obj, cost, future))
+                        in_flight += cost
+
+                    while pending:
+                        done, _, future = take()
+                        yield done, future.result()
+                finally:
+                    for *_, future in pending:
+                        future.cancel()
+        finally:
+            # After the pool has waited on the downloads still running
+            if temporary is not None:
+                temporary.cleanup()
@@ -1,12 +1,25 @@
 """
 Code for enhanced logging outputs.
 """
-import logging
+from __future__ import annotations
 
-import psutil
+import asyncio
+import csv
+import dataclasses as dc
+import functools
+import logging
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import List
 
+from ..prefect_.loggers import get_prefect_or_default_logger
+from ..utilities.lazy import lazy_import
 from ..utilities.misc import convert_size
 
+psutil = lazy_import("psutil")
+
 
 def log_system_states(
     logger: logging.Logger, level: logging._Level = logging.INFO
@@ -40,3 +53,209 @@ def log_system_states(
                 convert_size(d.free),
                 convert_size(d.used),
             )
+
+
+@dc.dataclass
+class ResourceSample:
+    """Resource usage at a point in time. I/O counters are cumulative."""
+
+    seconds: float
+    process_rss: int
+    system_used: int
+    process_cpu: float
+    system_cpu: float
+    disk_read: int
+    disk_write: int
+    net_sent: int
+    net_recv: int
+
+
+class ResourceSampler:
+    """Samples process and system resources in a background thread.
+
+    Used as a context manager or decorator of functions and coroutine
+    functions. On exit, the peak, mean and totals of the samples are logged,
+    and the timeline is written as CSV to `timeline_path` if one is given.
+    Samples are of the whole process, so include work in other threads.
+
+    :param interval:        Seconds between samples, defaults to 1
+    :param logger:          Logger or name of a logger to report with,\
+        defaults to the Prefect run logger if in a run
+    :param level:           Level to report at, defaults to logging.INFO
+    :param timeline_path:   CSV file to write the samples to
+    ## Example
+    ```py
+    @flow
+    @ResourceSampler(interval=0.5)
+    def my_flow():
+        ...
+
+    with ResourceSampler(timeline_path="resources.csv") as sampler:
+        ...
+    sampler.summary()
+    ```
+    """
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        logger: logging.Logger | str | None = None,
+        level: logging._Level = logging.INFO,
+        timeline_path: Path | str | None = None,
+    ) -> None:
+        """Creates a sampler that is not yet running."""
+        self.interval: float = interval
+        self.logger: logging.Logger | str | None = logger
+        self.level: logging._Level = level
+        self.timeline_path: Path | None = (
+            Path(timeline_path) if timeline_path else None
+        )
+        self.samples: List[ResourceSample] = []
+        self.__stop: threading.Event = threading.Event()
+        self.__thread: threading.Thread | None = None
+        self.__process: psutil.Process = psutil.Process()
+        self.__start: float = 0.0
+
+    def _sample(self) -> ResourceSample:
+        """Takes one sample."""
+        disk = psutil.disk_io_counters()
+        net = psutil.net_io_counters()
+        return ResourceSample(
+            seconds=time.monotonic() - self.__start,
+            process_rss=self.__process.memory_info().rss,
+            system_used=psutil.virtual_memory().used,
+            # Both measure since their previous call
+            process_cpu=self.__process.cpu_percent(None),
+            system_cpu=psutil.cpu_percent(None),
+            disk_read=disk.read_bytes if disk else 0,
+            disk_write=disk.write_bytes if disk else 0,
+            net_sent=net.bytes_sent if net else 0,
+            net_recv=net.bytes_recv if net else 0,
+        )
+
+    def _run(self):
+        """Samples until stopped."""
+        while not self.__stop.wait(self.interval):
+            self.samples.append(self._sample())
+
+    def start(self):
+        """Starts sampling in a daemon thread."""
+        self.__stop.clear()
+        self.__start = time.monotonic()
+        self.samples = [self._sample()]
+        self.__thread = threading.Thread(
+            target=self._run, name="resource-sampler", daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self):
+        """Stops sampling, then reports and writes the timeline."""
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        self.samples.append(self._sample())
+        self.report()
+        if self.timeline_path:
+            self.write_timeline(self.timeline_path)
+
+    def __enter__(self) -> ResourceSampler:
+        """Starts sampling."""
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        """Stops sampling."""
+        self.stop()
+
+    def __call__(self, func):
+        """Applies a wrapper that samples for the duration of each call."""
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwds):
+                """Awaits the function within a fresh sampler."""
+                with self._copy():
+                    return await func(*args, **kwds)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwds):
+            """Calls the function within a fresh sampler."""
+            with self._copy():
+                return func(*args, **kwds)
+
+        return wrapper
+
+    def _copy(self) -> ResourceSampler:
+        """Creates a sampler with the same settings that is not running."""
+        return ResourceSampler(
+            self.interval, self.logger, self.level, self.timeline_path
+        )
+
+    def summary(self) -> dict:
+        """Peaks, means and totals of the samples."""
+        if not self.samples:
+            return {}
+        first, last = self.samples[0], self.samples[-1]
+        rss = [s.process_rss for s in self.samples]
+        used = [s.system_used for s in self.samples]
+        # The first CPU readings have nothing to measure against
+        cpu = [s.process_cpu for s in self.samples[1:]] or [0.0]
+        system_cpu = [s.system_cpu for s in self.samples[1:]] or [0.0]
+        return {
+            "seconds": last.seconds,
+            "samples": len(self.samples),
+            "peak_process_rss": max(rss),
+            "mean_process_rss": statistics.fmean(rss),
+            "peak_system_used": max(used),
+            "mean_system_used": statistics.fmean(used),
+            "peak_process_cpu": max(cpu),
+            "mean_process_cpu": statistics.fmean(cpu),
+            "mean_system_cpu": statistics.fmean(system_cpu),
+            "disk_read": last.disk_read - first.disk_read,
+            "disk_write": last.disk_write - first.disk_write,
+            "net_sent": last.net_sent - first.net_sent,
+            "net_recv": last.net_recv - first.net_recv,
+        }
+
+    def report(self):
+        """Logs the summary of the samples."""
+        summary = self.summary()
+        if not summary:
+            return
+        logger = get_prefect_or_default_logger(self.logger)
+        peak_at = max(self.samples, key=lambda s: s.process_rss).seconds
+        logger.log(
+            self.level,
+            "Resource usage over %.1fs (%d samples): "
+            "process memory peak='%s' at %.1fs mean='%s' "
+            "system memory peak='%s' "
+            "process CPU peak=%.0f%% mean=%.0f%% system CPU mean=%.0f%%",
+            summary["seconds"],
+            summary["samples"],
+            convert_size(summary["peak_process_rss"]),
+            peak_at,
+            convert_size(int(summary["mean_process_rss"])),
+            convert_size(summary["peak_system_used"]),
+            summary["peak_process_cpu"],
+            summary["mean_process_cpu"],
+            summary["mean_system_cpu"],
+        )
+        logger.log(
+            self.level,
+            "Resource I/O: disk read='%s' written='%s' "
+            "network received='%s' sent='%s'",
+            convert_size(summary["disk_read"]),
+            convert_size(summary["disk_write"]),
+            convert_size(summary["net_recv"]),
+            convert_size(summary["net_sent"]),
+        )
+
+    def write_timeline(self, path: Path | str):
+        """Writes the samples to `path` as CSV."""
+        with open(path, "w", newline="") as fo:
+            writer = csv.writer(fo)
+            writer.writerow(f.name for f in dc.fields(ResourceSample))
+            writer.writerows(dc.astuple(s) for s in self.samples)
@@ -1,29 +1,56 @@
 """
 Code for working with Pandas's read & write methods.
 """
+from __future__ import annotations
+
 import enum
 import io
+from typing import Callable, Tuple
+
+from ..utilities.lazy import lazy_import
 
-import pandas as pd
+pd = lazy_import("pandas")
 
 
 class PandasIOMethod(enum.Enum):
     """IO shorthand for Pandas IO capabilities."""
 
-    # Read method, write method
-    # NOTE the write method must be passed `self`
-    CSV = pd.read_csv, pd.DataFrame.to_csv
-    EXCEL = pd.read_excel, pd.DataFrame.to_excel
-    JSON = pd.read_json, pd.DataFrame.to_json
-    PARQUET = pd.read_parquet, pd.DataFrame.to_parquet
-    STATA = pd.read_stata, pd.DataFrame.to_stata
-    XML = pd.read_xml, pd.DataFrame.to_xml
+    # Read method, write method names. Resolved on use so Pandas is only
+    # imported when needed, `value` gives the methods themselves
+    CSV = "read_csv", "to_csv"
+    EXCEL = "read_excel", "to_excel"
+    JSON = "read_json", "to_json"
+    PARQUET = "read_parquet", "to_parquet"
+    STATA = "read_stata", "to_stata"
+    XML = "read_xml", "to_xml"
+
+    @property
+    def value(self) -> Tuple[Callable[..., pd.DataFrame], Callable[..., None]]:
+        """Read method, write method.
+
+        NOTE the write method must be passed the DataFrame as `self`
+        """
+        return self.read, self.write
+
+    @property
+    def read(self) -> Callable[..., pd.DataFrame]:
+        """Pandas function reading the format."""
+        return getattr(pd, self._value_[0])
+
+    @property
+    def write(self) -> Callable[..., None]:
+        """Pandas method writing the format.
+
+        NOTE the write method must be passed the DataFrame as `self`
+        """
+        return getattr(pd.DataFrame, self._value_[1])
 
 
 def dataframe_to_bytes(
     df: pd.DataFrame,
     method: PandasIOMethod = PandasIOMethod.CSV,
     write_options: dict | None = None,
+    buffer_: io.BytesIO | None = None,
 ) -> bytes:
     """Converts a Pandas DataFrame to bytes.
 
@@ -32,13 +59,14 @@ def dataframe_to_bytes(
         to PandasIOMethod.CSV
     :param write_options:   Keyword arguments to pass to the DataFrame\
         writing method
+    :param buffer_:         Buffer to write into, overwriting its content.\
+        Reusing one buffer keeps its allocation between calls, defaults to\
+        a new buffer
     :raises TypeError:      Method is not a PandasIOMethod enumeration or\
         string
     :raises TypeError:      Write options are not None or a dictionary
     :return:                Bytes of the DataFrame
     """
-    buffer_: io.BytesIO = io.BytesIO()
-
     if not isinstance(df, (pd.DataFrame, pd.Series)):
         raise TypeError(
             f"'df' must be a pandas.DataFrame, not {type(df).__name__}"
@@ -66,8 +94,18 @@ def dataframe_to_bytes(
             f", not {type(write_options).__name__}"
         )
 
-    method.value[1](df, buffer_, **write_options)
-    return buffer_.getvalue()
+    if buffer_ is None:
+        buffer_ = io.BytesIO()
+        method.write(df, buffer_, **write_options)
+        return buffer_.getvalue()
+
+    # Overwrites in place rather than truncating, which would give up the
+    # buffer's allocation
+    buffer_.seek(0)
+    method.write(df, buffer_, **write_options)
+    size = buffer_.tell()
+    with buffer_.getbuffer() as view:
+        return bytes(view[:size])
 
 
 def text_to_dataframe(
@@ -121,4 +159,4 @@ def text_to_dataframe(
             f", not {type(read_options).__name__}"
         )
 
-    return method.value[0](buffer_, **read_options)
+    return method.read(buffer_, **read_options)
@@ -0,0 +1,228 @@
+"""
+Code for reading Pandas DataFrames from many S3 objects at once.
+"""
+from __future__ import annotations
+
+import collections
+import concurrent.futures as cf
+import contextlib
+import os
+from pathlib import Path
+from typing import Deque, Generator, Iterable, Tuple
+
+from ..boto3_.bucket import S3Bucket
+from ..boto3_.object_summary import ObjectSummary
+from ..utilities.lazy import lazy_import
+from .io_ import PandasIOMethod, text_to_dataframe
+
+pd = lazy_import("pandas")
+
+
+def _chain(
+    download: cf.Future,
+    pool: cf.Executor | None,
+    method: PandasIOMethod | str,
+    read_options: dict | None,
+) -> cf.Future:
+    """Returns a future that parses the result of `download` once it is done.
+    Cancelling it skips the parse.
+
+    :param download:        Future resolving to the object's bytes
+    :param pool:            Executor to parse in, parses in the callback\
+        thread if None
+    :param method:          Method to pass to `text_to_dataframe`
+    :param read_options:    Read options to pass to `text_to_dataframe`
+    :return:                Future resolving to the parsed DataFrame
+    """
+    parsed: cf.Future = cf.Future()
+
+    def settle(future: cf.Future):
+        """Copies the outcome of `future` onto `parsed`, unless either was
+        cancelled.
+        """
+        if parsed.cancelled():
+            return
+        if future.cancelled():
+            parsed.cancel()
+            return
+        try:
+            if future.exception() is None:
+                parsed.set_result(future.result())
+            else:
+                parsed.set_exception(future.exception())
+        except cf.InvalidStateError:
+            # Cancelled by the consumer since the check above
+            pass
+
+    def parse(future: cf.Future):
+        """Parses the downloaded bytes, or submits them for parsing."""
+        if parsed.cancelled() or future.cancelled() or future.exception():
+            settle(future)
+            return
+        if pool is not None:
+            try:
+                pool.submit(
+                    text_to_dataframe, future.result(), method, read_options
+                ).add_done_callback(settle)
+            except RuntimeError:
+                # The pool is shut down once the consumer stops early
+                parsed.cancel()
+            return
+        outcome: cf.Future = cf.Future()
+        try:
+            outcome.set_result(
+                text_to_dataframe(future.result(), method, read_options)
+            )
+        except BaseException as e:
+            outcome.set_exception(e)
+        settle(outcome)
+
+    download.add_done_callback(parse)
+    return parsed
+
+
+def _resolve_objects(
+    source: S3Bucket | Iterable[ObjectSummary],
+    prefix: Path | str | None,
+) -> Iterable[ObjectSummary]:
+    """Lists the files under `prefix` if `source` is a bucket."""
+    if isinstance(source, S3Bucket):
+        return source.files(prefix)
+    if prefix is not None:
+        raise ValueError("'prefix' can only be used with an S3Bucket source")
+    return source
+
+
+def iter_dataframes(
+    source: S3Bucket | Iterable[ObjectSummary],
+    prefix: Path | str | None = None,
+    method: PandasIOMethod | str = PandasIOMethod.CSV,
+    read_options: dict | None = None,
+    *,
+    download_workers: int = 8,
+    parse_workers: int | None = None,
+    max_bytes_in_flight: int | None = None,
+    get_options: dict | None = None,
+) -> Generator[Tuple[ObjectSummary, pd.DataFrame], None, None]:
+    """Downloads and parses S3 objects into DataFrames, yielding each in
+    listing order.
+
+    Downloads run on a thread pool while parsing runs on a process pool, so
+    the next objects transfer while earlier ones are parsed.
+
+    :param source:              Bucket to list or objects to read
+    :param prefix:              Prefix to list if `source` is a bucket
+    :param method:              Alias for the DataFrame loading method,\
+        defaults to PandasIOMethod.CSV
+    :param read_options:        Keyword arguments to pass to the DataFrame\
+        loading method
+    :param download_workers:    Number of download threads, defaults to 8
+    :param parse_workers:       Number of parsing processes, defaults to the\
+        CPU count. 0 parses in the download threads
+    :param max_bytes_in_flight: Ceiling on the listed size of objects\
+        downloaded but not yet yielded, defaults to no ceiling
+    :param get_options:         Keyword arguments to pass to\
+        `ObjectSummary.get`
+    :return:                    Generator of objects and their DataFrames
+
+    NOTE An object larger than `max_bytes_in_flight` is still read, but only
+    once nothing else is in flight.
+    """
+    if download_workers < 1:
+        raise ValueError("'download_workers' must be at least 1")
+    if parse_workers is None:
+        parse_workers = os.cpu_count() or 1
+    get_options = get_options or {}
+
+    objects = _resolve_objects(source, prefix)
+    # Bounds the listing read-ahead when no byte ceiling is set
+    max_pending: int = download_workers * 2 + parse_workers
+
+    pending: Deque[
+        Tuple[ObjectSummary, cf.Future, cf.Future]
+    ] = collections.deque()
+    in_flight: int = 0
+
+    # Parses in the download threads without a process pool
+    with cf.ThreadPoolExecutor(download_workers) as io_pool, (
+        cf.ProcessPoolExecutor(parse_workers)
+        if parse_workers
+        else contextlib.nullcontext()
+    ) as parser:
+        try:
+            for obj in objects:
+                size: int = obj.size or 0
+                while pending and (
+                    len(pending) >= max_pending
+                    or (
+                        max_bytes_in_flight is not None
+                        and in_flight + size > max_bytes_in_flight
+                    )
+                ):
+                    done, _, future = pending.popleft()
+                    in_flight -= done.size or 0
+                    yield done, future.result()
+
+                download = io_pool.submit(obj.get, **get_options)
+                pending.append(
+                    (
+                        obj,
+                        download,
+                        _chain(download, parser, method, read_options),
+                    )
+                )
+                in_flight += size
+
+            while pending:
+                done, _, future = pending.popleft()
+                yield done, future.result()
+        finally:
+            # Stops the remaining downloads and parses if the consumer
+            # stopped early. Running downloads are waited on by the pool.
+            for _, download, future in pending:
+                future.cancel()
+                download.cancel()
+            io_pool.shutdown(wait=False, cancel_futures=True)
+            if parser is not None:
+                parser.shutdown(wait=False, cancel_futures=True)
+
+
+def read_dataframes(
+    source: S3Bucket | Iterable[ObjectSummary],
+    prefix: Path | str | None = None,
+    method: PandasIOMethod | str = PandasIOMethod.CSV,
+    read_options: dict | None = None,
+    *,
+    ignore_index: bool = True,
+    **kwds,
+) -> pd.DataFrame:
+    """Reads S3 objects into a single DataFrame.
+
+    The frames are collected first and concatenated once, so the result is
+    allocated a single time at its final size. `**kwds` are passed to
+    `iter_dataframes`.
+
+    :param source:          Bucket to list or objects to read
+    :param prefix:          Prefix to list if `source` is a bucket
+    :param method:          Alias for the DataFrame loading method, defaults\
+        to PandasIOMethod.CSV
+    :param read_options:    Keyword arguments to pass to the DataFrame\
+        loading method
+    :param ignore_index:    Do not use the index values of the frames,\
+        defaults to True
+    :return:                A DataFrame of all the objects' content
+    ## Example
+    ```py
+    bucket = S3Bucket("my-bucket")
+    df = read_dataframes(bucket, "exports/2023-01-01/", "PARQUET")
+    ```
+    """
+    frames = [
+        df
+        for _, df in iter_dataframes(
+            source, prefix, method, read_options, **kwds
+        )
+    ]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=ignore_index)
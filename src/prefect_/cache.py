@@ -0,0 +1,277 @@
+"""
+Byte caches for keeping persisted results close to the process.
+"""
+from __future__ import annotations
+
+import collections
+import dataclasses as dc
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+
+@dc.dataclass
+class CacheStats:
+    """Counters of a cache tier."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+class MemoryCache:
+    """Least-recently-used byte cache held in process memory.
+
+    :param max_bytes:   Total size of values to keep
+    :param ttl:         Seconds a value is kept for, defaults to forever
+    """
+
+    def __init__(self, max_bytes: int, ttl: float | None = None) -> None:
+        """Creates an empty cache."""
+        self.max_bytes: int = max_bytes
+        self.ttl: float | None = ttl
+        self.stats: CacheStats = CacheStats()
+        self.__entries: collections.OrderedDict[
+            str, Tuple[bytes, float]
+        ] = collections.OrderedDict()
+        self.__lock: threading.Lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        """Gets the value of `key`, None if it is not cached."""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: str, value: bytes):
+        """Caches `value`, evicting the least recently used values to stay in
+        budget. Values larger than the budget are not cached.
+        """
+        if len(value) > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self.__lock:
+            if key in self.__entries:
+                self._remove(key)
+            self.__entries[key] = value, expires
+            self.stats.entries += 1
+            self.stats.bytes += len(value)
+            while self.stats.bytes > self.max_bytes:
+                self._remove(next(iter(self.__entries)))
+                self.stats.evictions += 1
+
+    def _remove(self, key: str):
+        """Drops `key`. The lock must be held."""
+        value, _ = self.__entries.pop(key)
+        self.stats.entries -= 1
+        self.stats.bytes -= len(value)
+
+
+class DiskCache:
+    """Least-recently-used byte cache stored as files in a directory.
+
+    Files already in `directory` are adopted, so the cache survives process
+    restarts on the same host.
+
+    :param directory:   Directory to store values in
+    :param max_bytes:   Total size of values to keep
+    :param ttl:         Seconds a value is kept for, defaults to forever
+    """
+
+    def __init__(
+        self, directory: Path | str, max_bytes: int, ttl: float | None = None
+    ) -> None:
+        """Creates the cache over `directory`."""
+        self.directory: Path = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes: int = max_bytes
+        self.ttl: float | None = ttl
+        self.stats: CacheStats = CacheStats()
+        # File name: (size, written at), least recently used first
+        self.__entries: collections.OrderedDict[
+            str, Tuple[int, float]
+        ] = collections.OrderedDict()
+        self.__lock: threading.Lock = threading.Lock()
+
+        files = sorted(
+            self.directory.glob("*.bin"),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for path in files:
+            stat = path.stat()
+            self.__entries[path.name] = stat.st_size, stat.st_mtime
+            self.stats.entries += 1
+            self.stats.bytes += stat.st_size
+        with self.__lock:
+            self._evict()
+
+    def _path(self, key: str) -> Path:
+        """File `key` is stored in."""
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / f"{digest}.bin"
+
+    def get(self, key: str) -> bytes | None:
+        """Gets the value of `key`, None if it is not cached."""
+        path = self._path(key)
+        with self.__lock:
+            entry = self.__entries.get(path.name)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            if self.ttl and entry[1] + self.ttl < time.time():
+                self._remove(path.name)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self.__entries.move_to_end(path.name)
+        try:
+            value = path.read_bytes()
+        except FileNotFoundError:
+            # Removed by another process sharing the directory
+            with self.__lock:
+                if path.name in self.__entries:
+                    self._remove(path.name)
+                self.stats.misses += 1
+            return None
+        with self.__lock:
+            self.stats.hits += 1
+        return value
+
+    def put(self, key: str, value: bytes):
+        """Caches `value`, evicting the least recently used values to stay in
+        budget. Values larger than the budget are not cached.
+        """
+        if len(value) > self.max_bytes:
+            return
+        path = self._path(key)
+        # Renamed into place so readers never see a partial file
+        with tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=".partial", delete=False
+        ) as fo:
+            fo.write(value)
+        os.replace(fo.name, path)
+        with self.__lock:
+            if path.name in self.__entries:
+                self._forget(path.name)
+            self.__entries[path.name] = len(value), time.time()
+            self.stats.entries += 1
+            self.stats.bytes += len(value)
+            self._evict()
+
+    def _evict(self):
+        """Removes the least recently used files until in budget. The lock
+        must be held.
+        """
+        while self.stats.bytes > self.max_bytes:
+            self._remove(next(iter(self.__entries)))
+            self.stats.evictions += 1
+
+    def _forget(self, name: str):
+        """Drops `name` from the index. The lock must be held."""
+        size, _ = self.__entries.pop(name)
+        self.stats.entries -= 1
+        self.stats.bytes -= size
+
+    def _remove(self, name: str):
+        """Drops `name` from the index and the directory. The lock must be
+        held.
+        """
+        self._forget(name)
+        (self.directory / name).unlink(missing_ok=True)
+
+
+class TieredCache:
+    """Byte cache checking process memory, then local disk.
+
+    Disk hits are promoted to memory. Writes go to both tiers.
+
+    :param memory:  Memory tier, skipped if None
+    :param disk:    Disk tier, skipped if None
+    """
+
+    def __init__(
+        self, memory: MemoryCache | None = None, disk: DiskCache | None = None
+    ) -> None:
+        """Creates a cache over the tiers."""
+        self.memory: MemoryCache | None = memory
+        self.disk: DiskCache | None = disk
+
+    def get(self, key: str) -> bytes | None:
+        """Gets the value of `key` from the fastest tier holding it."""
+        if self.memory is not None:
+            value = self.memory.get(key)
+            if value is not None:
+                return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                if self.memory is not None:
+                    self.memory.put(key, value)
+                return value
+        return None
+
+    def put(self, key: str, value: bytes):
+        """Caches `value` in every tier."""
+        if self.memory is not None:
+            self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def stats(self) -> Dict[str, dict]:
+        """Counters of each tier."""
+        return {
+            name: dc.asdict(tier.stats)
+            for name, tier in (("memory", self.memory), ("disk", self.disk))
+            if tier is not None
+        }
+
+
+_caches: Dict[tuple, TieredCache] = {}
+_caches_lock: threading.Lock = threading.Lock()
+
+
+def get_cache(
+    memory_bytes: int = 256 * 1024**2,
+    disk_bytes: int = 0,
+    disk_directory: Path | str | None = None,
+    ttl: float | None = None,
+) -> TieredCache:
+    """Gets the process's `TieredCache` for the configuration, creating it on
+    first use. A budget of 0 skips the tier.
+
+    :param memory_bytes:    Memory tier budget, defaults to 256 MB
+    :param disk_bytes:      Disk tier budget, defaults to 0
+    :param disk_directory:  Disk tier directory, defaults to a folder in the\
+        system's temporary directory
+    :param ttl:             Seconds values are kept for, defaults to forever
+    :return:                The shared cache
+    """
+    if disk_directory is None:
+        disk_directory = Path(tempfile.gettempdir()) / "result-cache"
+    config = (memory_bytes, disk_bytes, str(disk_directory), ttl)
+    with _caches_lock:
+        if config not in _caches:
+            _caches[config] = TieredCache(
+                MemoryCache(memory_bytes, ttl) if memory_bytes else None,
+                DiskCache(disk_directory, disk_bytes, ttl)
+                if disk_bytes
+                else None,
+            )
+        return _caches[config]
@@ -0,0 +1,507 @@
+"""
+Prefect file systems that wrap another storage block.
+"""
+import asyncio
+import atexit
+import concurrent.futures as cf
+import functools
+import hashlib
+import json
+import threading
+import time
+import uuid
+from typing import ClassVar, Dict, List, Tuple
+
+from prefect.blocks.core import Block
+from prefect.client.orchestration import get_client
+from prefect.filesystems import WritableFileSystem
+from prefect.utilities.asyncutils import sync_compatible
+from pydantic import PrivateAttr
+
+from .cache import TieredCache, get_cache
+from .loggers import get_prefect_or_default_logger
+
+# Set of (location, digest) known to be stored. Saves the existence check
+# when the same content is written again from this process.
+_STORED_DIGESTS: set = set()
+
+
+def _storage_location(storage: WritableFileSystem) -> str:
+    """Describes where `storage` writes to."""
+    if isinstance(getattr(storage, "storage", None), WritableFileSystem):
+        # Wrappers from this module write to their inner storage
+        inner = _storage_location(storage.storage)
+        return f"{type(storage).__name__}:{inner}"
+    return "/".join(
+        str(getattr(storage, attr))
+        for attr in ("bucket_name", "bucket_folder", "basepath")
+        if getattr(storage, attr, None)
+    )
+
+
+class _StorageReference:
+    """Mixin for wrappers that save their storage as a block document of its
+    own and hold its id in `storage_block_id`, rather than nesting it.
+
+    Prefect 2.9 cannot read back the schema of a block nesting another block
+    that has a field of several block types, so a wrapper of a wrapper could
+    not be saved with its storage nested. A field of several block types is
+    also coerced by pydantic into the first type that validates, so a remote
+    storage could come back as a `LocalFileSystem`. The storage is loaded by
+    id on the first read or write of a wrapper loaded from its block
+    document.
+    """
+
+    def __init__(self, storage: WritableFileSystem | None = None, **data):
+        """Wraps `storage`, or the storage saved under `storage_block_id`."""
+        super().__init__(**data)
+        if storage is None and self.storage_block_id is None:
+            raise ValueError("'storage' or 'storage_block_id' must be given")
+        self._storage = storage
+
+    @property
+    def storage(self) -> WritableFileSystem:
+        """The wrapped storage.
+
+        :raises AttributeError: The storage has not been loaded by id yet
+        """
+        if self._storage is None:
+            raise AttributeError(
+                f"Storage '{self.storage_block_id}' is not loaded"
+            )
+        return self._storage
+
+    async def _load_storage(self) -> WritableFileSystem:
+        """Loads the storage, and that of wrapped wrappers, if needed."""
+        if self._storage is None:
+            async with get_client() as client:
+                document = await client.read_block_document(
+                    self.storage_block_id
+                )
+            self._storage = Block._from_block_document(document)
+        if isinstance(self._storage, _StorageReference):
+            await self._storage._load_storage()
+        return self._storage
+
+    async def _save(self, *args, **kwds):
+        """Saves the storage, unless it already has a block document, then
+        the wrapper referring to it.
+        """
+        storage = await self._load_storage()
+        if storage._block_document_id is None:
+            await storage._save(is_anonymous=True, overwrite=True)
+        self.storage_block_id = storage._block_document_id
+        return await super()._save(*args, **kwds)
+
+
+class ContentAddressedFileSystem(_StorageReference, WritableFileSystem):
+    """Stores content once under its SHA-256 digest in `storage` and writes a
+    small pointer to the digest at each path.
+
+    Writing content that is already stored only writes the pointer. Paths
+    that do not hold a pointer are read as-is, so results persisted before
+    deduplication was enabled can still be read.
+
+    ## Example
+    ```py
+    storage = ContentAddressedFileSystem(storage=bucket)
+    storage.write_path("a", blob)
+    storage.write_path("b", blob)  # Only uploads the pointer
+    ```
+    """
+
+    _block_type_name = "Content Addressed File System"
+
+    storage_block_id: uuid.UUID | None = None
+    objects_folder: str = "objects"
+
+    POINTER_PREFIX: ClassVar[bytes] = b"content-addressed:"
+
+    _storage: WritableFileSystem | None = PrivateAttr(None)
+
+    def _object_path(self, digest: str) -> str:
+        """Path content with `digest` is stored at."""
+        return f"{self.objects_folder}/{digest[:2]}/{digest}"
+
+    async def _is_stored(self, digest: str) -> bool:
+        """Checks for the marker written after the content of `digest`
+        finished uploading.
+        """
+        location = (_storage_location(self.storage), digest)
+        if location in _STORED_DIGESTS:
+            return True
+        try:
+            await self.storage.read_path(self._object_path(digest) + ".ok")
+        except Exception:
+            # Storage blocks raise different errors for missing paths
+            return False
+        _STORED_DIGESTS.add(location)
+        return True
+
+    @sync_compatible
+    async def write_path(self, path: str, content: bytes) -> str:
+        """Stores `content` if its digest is new and writes a pointer to it at
+        `path`.
+
+        :param path:    Path to write the pointer to
+        :param content: Content to store
+        :return:        `path`
+        """
+        storage = await self._load_storage()
+        digest = hashlib.sha256(content).hexdigest()
+        object_path = self._object_path(digest)
+        if not await self._is_stored(digest):
+            await storage.write_path(object_path, content)
+            # Written last so a failed upload is never mistaken as stored
+            await storage.write_path(object_path + ".ok", b"")
+            _STORED_DIGESTS.add((_storage_location(storage), digest))
+
+        pointer = {"sha256": digest, "size": len(content), "path": object_path}
+        await storage.write_path(
+            path, self.POINTER_PREFIX + json.dumps(pointer).encode()
+        )
+        return path
+
+    @sync_compatible
+    async def read_path(self, path: str) -> bytes:
+        """Reads the content `path` points to.
+
+        :param path:        Path of the pointer
+        :raises ValueError: Stored content does not match its digest
+        :return:            Content
+        """
+        storage = await self._load_storage()
+        content = await storage.read_path(path)
+        if not content.startswith(self.POINTER_PREFIX):
+            return content
+
+        pointer = json.loads(content[len(self.POINTER_PREFIX) :])
+        content = await storage.read_path(pointer["path"])
+        if hashlib.sha256(content).hexdigest() != pointer["sha256"]:
+            raise ValueError(
+                f"Content at '{pointer['path']}' does not match its digest"
+            )
+        return content
+
+
+class CachedFileSystem(_StorageReference, WritableFileSystem):
+    """Serves reads of `storage` from a `prefect_.cache.TieredCache` held by
+    the process.
+
+    Writes go to `storage` and then to the cache, so a downstream task
+    running in the same process, or on the same host with a disk tier, reads
+    the result without a round trip to `storage`.
+
+    ## Example
+    ```py
+    storage = CachedFileSystem(storage=bucket, disk_bytes=2 * 1024**3)
+    storage.write_path("a", blob)
+    storage.read_path("a")  # Served from memory
+    storage.cache_stats()
+    ```
+    """
+
+    _block_type_name = "Cached File System"
+
+    storage_block_id: uuid.UUID | None = None
+    memory_bytes: int = 256 * 1024**2
+    disk_bytes: int = 0
+    disk_directory: str | None = None
+    ttl: float | None = 3600
+
+    _storage: WritableFileSystem | None = PrivateAttr(None)
+
+    @property
+    def cache(self) -> TieredCache:
+        """The process's cache for this configuration."""
+        return get_cache(
+            self.memory_bytes, self.disk_bytes, self.disk_directory, self.ttl
+        )
+
+    def _cache_key(self, path: str) -> str:
+        """Key of `path` in the cache, unique across storages."""
+        return f"{_storage_location(self.storage)}:{path}"
+
+    def cache_stats(self) -> dict:
+        """Hit, miss and eviction counters of each cache tier."""
+        return self.cache.stats()
+
+    @sync_compatible
+    async def write_path(self, path: str, content: bytes) -> str:
+        """Writes `content` to `storage` and caches it."""
+        storage = await self._load_storage()
+        path = await storage.write_path(path, content)
+        self.cache.put(self._cache_key(path), content)
+        return path
+
+    @sync_compatible
+    async def read_path(self, path: str) -> bytes:
+        """Reads `path` from the cache, falling back to `storage`."""
+        storage = await self._load_storage()
+        key = self._cache_key(path)
+        content = self.cache.get(key)
+        if content is None:
+            content = await storage.read_path(path)
+            self.cache.put(key, content)
+        return content
+
+
+class WriteBehindError(RuntimeError):
+    """Results written behind failed to upload."""
+
+    def __init__(self, failures: List[Tuple[str, BaseException]]) -> None:
+        """Records the paths and errors of the failed uploads."""
+        self.failures = failures
+        super().__init__(
+            f"{len(failures)} result(s) failed to upload: "
+            + ", ".join(f"'{path}' ({e!r})" for path, e in failures)
+        )
+
+
+class _Uploader:
+    """Uploads writes to a storage block in background threads, holding
+    their content until the upload finishes.
+
+    :param max_pending: Number of writes held before writers block
+    :param workers:     Number of upload threads
+    """
+
+    def __init__(self, max_pending: int, workers: int) -> None:
+        """Creates an idle uploader."""
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.pool = cf.ThreadPoolExecutor(
+            workers, thread_name_prefix="write-behind"
+        )
+        self.pending: Dict[str, bytes] = {}
+        self.futures: set = set()
+        self.failures: List[Tuple[str, BaseException]] = []
+        self.lock = threading.Lock()
+
+    def submit(
+        self,
+        storage: WritableFileSystem,
+        path: str,
+        content: bytes,
+        retries: int,
+        retry_delay: float,
+    ):
+        """Queues `content` for upload to `path`. A slot must be held."""
+        with self.lock:
+            self.pending[path] = content
+            future = self.pool.submit(
+                self._upload, storage, path, content, retries, retry_delay
+            )
+            self.futures.add(future)
+        future.add_done_callback(self.futures.discard)
+
+    def _upload(
+        self,
+        storage: WritableFileSystem,
+        path: str,
+        content: bytes,
+        retries: int,
+        retry_delay: float,
+    ):
+        """Writes `content` to `path`, retrying with exponential backoff."""
+        try:
+            for attempt in range(retries + 1):
+                try:
+                    storage.write_path(path, content)
+                    return
+                except Exception as e:
+                    if attempt == retries:
+                        get_prefect_or_default_logger(__name__).error(
+                            "Upload of result '%s' failed: %r", path, e
+                        )
+                        with self.lock:
+                            self.failures.append((path, e))
+                        return
+                    get_prefect_or_default_logger(__name__).warning(
+                        "Upload of result '%s' failed, retrying: %r", path, e
+                    )
+                    time.sleep(retry_delay * 2**attempt)
+        finally:
+            with self.lock:
+                if self.pending.get(path) is content:
+                    del self.pending[path]
+            self.slots.release()
+
+    def flush(
+        self, timeout: float | None = None
+    ) -> List[Tuple[str, BaseException]]:
+        """Waits for queued uploads and returns the failures since the last
+        flush.
+        """
+        with self.lock:
+            futures = list(self.futures)
+        cf.wait(futures, timeout=timeout)
+        with self.lock:
+            failures, self.failures = self.failures, []
+        return failures
+
+
+# Uploader of each storage location, maximum pending writes and workers
+_uploaders: Dict[Tuple[str, int, int], _Uploader] = {}
+_uploaders_lock = threading.Lock()
+
+
+def flush_write_behind(timeout: float | None = None):
+    """Waits for every result written behind to finish uploading.
+
+    :param timeout:             Seconds to wait in total, defaults to no\
+        limit
+    :raises WriteBehindError:   An upload failed after its retries
+    """
+    with _uploaders_lock:
+        uploaders = list(_uploaders.values())
+    deadline = None if timeout is None else time.monotonic() + timeout
+    failures = []
+    for uploader in uploaders:
+        remaining = (
+            None if deadline is None else max(deadline - time.monotonic(), 0)
+        )
+        failures.extend(uploader.flush(remaining))
+    if failures:
+        raise WriteBehindError(failures)
+
+
+def _flush_after(error: BaseException):
+    """Flushes uploads after a function raised `error`, noting upload
+    failures on `error` rather than replacing it.
+    """
+    try:
+        flush_write_behind()
+    except WriteBehindError as e:
+        get_prefect_or_default_logger(__name__).error("%s", e)
+        error.add_note(f"While flushing results written behind: {e}")
+
+
+def flushes_write_behind(func):
+    """Decorator that flushes results written behind when `func` returns, so
+    a flow only ends once its results are uploaded. If `func` raises, its
+    exception is raised with any upload failures noted on it.
+
+    ## Example
+    ```py
+    @flow
+    @flushes_write_behind
+    def my_flow():
+        ...
+    ```
+    """
+    if asyncio.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwds):
+            """Calls the function, then flushes uploads."""
+            loop = asyncio.get_running_loop()
+            try:
+                result = await func(*args, **kwds)
+            except BaseException as e:
+                await loop.run_in_executor(None, _flush_after, e)
+                raise
+            await loop.run_in_executor(None, flush_write_behind)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwds):
+        """Calls the function, then flushes uploads."""
+        try:
+            result = func(*args, **kwds)
+        except BaseException as e:
+            _flush_after(e)
+            raise
+        flush_write_behind()
+        return result
+
+    return wrapper
+
+
+# Last resort so queued uploads are not lost when the process exits
+atexit.register(flush_write_behind)
+
+
+class WriteBehindFileSystem(_StorageReference, WritableFileSystem):
+    """Returns from writes immediately and uploads to `storage` in background
+    threads.
+
+    Up to `max_pending` writes are held in memory until uploaded, after
+    which writers block. Reads of a path still uploading are served from
+    memory. Failed uploads are retried `retries` times, and are raised by
+    `flush_write_behind`, which flows should call before ending, e.g.
+    through `flushes_write_behind`.
+
+    ## Example
+    ```py
+    storage = WriteBehindFileSystem(storage=bucket)
+    storage.write_path("a", blob)  # Returns before the upload
+    storage.read_path("a")  # Served from memory until uploaded
+    flush_write_behind()
+    ```
+    """
+
+    _block_type_name = "Write Behind File System"
+
+    storage_block_id: uuid.UUID | None = None
+    max_pending: int = 16
+    workers: int = 4
+    retries: int = 3
+    retry_delay: float = 1.0
+
+    _storage: WritableFileSystem | None = PrivateAttr(None)
+
+    @property
+    def uploader(self) -> _Uploader:
+        """The process's uploader for `storage` with this block's
+        `max_pending` and `workers`.
+        """
+        key = (_storage_location(self.storage), self.max_pending, self.workers)
+        with _uploaders_lock:
+            if key not in _uploaders:
+                _uploaders[key] = _Uploader(self.max_pending, self.workers)
+            return _uploaders[key]
+
+    def _pending(self, path: str) -> bytes | None:
+        """Returns the content of `path` if it is still uploading to
+        `storage`, whichever uploader it was queued on.
+        """
+        location = _storage_location(self.storage)
+        with _uploaders_lock:
+            uploaders = [
+                uploader
+                for key, uploader in _uploaders.items()
+                if key[0] == location
+            ]
+        for uploader in uploaders:
+            with uploader.lock:
+                content = uploader.pending.get(path)
+            if content is not None:
+                return content
+        return None
+
+    @sync_compatible
+    async def write_path(self, path: str, content: bytes) -> str:
+        """Queues `content` for upload to `path`, waiting if the queue is
+        full.
+        """
+        storage = await self._load_storage()
+        uploader = self.uploader
+        if not uploader.slots.acquire(blocking=False):
+            await asyncio.get_running_loop().run_in_executor(
+                None, uploader.slots.acquire
+            )
+        uploader.submit(storage, path, content, self.retries, self.retry_delay)
+        return path
+
+    @sync_compatible
+    async def read_path(self, path: str) -> bytes:
+        """Reads `path` from memory if it is still uploading, otherwise from
+        `storage`.
+        """
+        storage = await self._load_storage()
+        content = self._pending(path)
+        if content is not None:
+            return content
+        return await storage.read_path(path)
@@ -3,8 +3,6 @@ Prefect logging utilities.
 """
 import logging
 
-from prefect.logging import get_run_logger
-
 
 def get_prefect_or_default_logger(
     __default: logging.Logger | str | None = None,
@@ -12,6 +10,9 @@ def get_prefect_or_default_logger(
     """Gets the Prefect logger if the global context is set. Returns the
     `__default` or root logger if not.
     """
+    # Imported here so logging helpers do not import Prefect
+    from prefect.logging import get_run_logger
+
     try:
         return get_run_logger()
     except RuntimeError:
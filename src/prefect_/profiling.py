@@ -0,0 +1,360 @@
+"""
+Opt-in profiling of flows and tasks.
+"""
+from __future__ import annotations
+
+import asyncio
+import collections
+import concurrent.futures as cf
+import cProfile
+import datetime
+import functools
+import inspect
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING, Counter, Dict, Tuple
+
+from .loggers import get_prefect_or_default_logger
+from .storage import create_bucket_with_resolved_subpath
+
+if TYPE_CHECKING:
+    from prefect_aws import S3Bucket
+
+# Set to "1" or "true" to enable profiling
+ENVIRONMENT_VARIABLE: str = "PROFILE_RUNS"
+
+
+def profiling_enabled() -> bool:
+    """Checks the environment variable enabling profiling."""
+    return os.environ.get(ENVIRONMENT_VARIABLE, "").lower() in ("1", "true")
+
+
+class _StackSampler:
+    """Counts the stacks of every thread, sampled from a background thread
+    every `interval` seconds of wall-clock time.
+    """
+
+    def __init__(self, interval: float) -> None:
+        """Creates a sampler that is not yet running."""
+        self.interval: float = interval
+        self.counts: Counter[str] = collections.Counter()
+        self.__stop: threading.Event = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+    def _sample(self):
+        """Counts the current stack of each thread but the sampler's."""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == threading.get_ident():
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} "
+                    f"({Path(code.co_filename).name}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.counts[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        """Samples until stopped."""
+        while not self.__stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        """Starts sampling in a daemon thread."""
+        self.__stop.clear()
+        self.__thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self):
+        """Stops sampling."""
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def collapsed(self) -> str:
+        """The stacks and their counts in the collapsed format read by flame
+        graph tools, the most sampled first.
+        """
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self.counts.most_common()
+        )
+
+
+class Profiler:
+    """Profiles a flow, task or block of code with cProfile and tracemalloc
+    and uploads the artefacts to a subfolder of `bucket`.
+
+    Profiling only happens when the `PROFILE_RUNS` environment variable is
+    set. As a decorator the variable is read once when decorating, and the
+    function is returned unwrapped if it is not set. Coroutine functions
+    are profiled while awaited, including other coroutines the event loop
+    runs meanwhile. In async code, use `async with` so the upload is
+    awaited rather than blocking the loop.
+
+    cProfile only sees the thread that starts it, so the stacks of every
+    thread, e.g. of a task runner or executor, are also sampled every
+    `interval` seconds.
+
+    Artefacts are uploaded to `key`/`name`/<UTC timestamp>/:
+     - profile.pstats:      Stats loadable with `pstats.Stats`
+     - profile.txt:         Functions with the highest cumulative time
+     - allocations.txt:     Lines with the largest live allocations
+     - threads.txt:         Sampled stacks of all threads, collapsed for\
+        flame graph tools
+
+    :param bucket:      Bucket to upload artefacts to
+    :param name:        Name of the profiled code, defaults to the decorated\
+        function's name
+    :param key:         Subfolder of `bucket` to upload to, defaults to\
+        "profiles"
+    :param top:         Number of functions and allocations in the text\
+        reports, defaults to 50
+    :param frames:      Frames of traceback kept per allocation, defaults\
+        to 1
+    :param interval:    Seconds between samples of the threads' stacks,\
+        defaults to 0.01
+    ## Example
+    ```py
+    @flow
+    @Profiler(bucket)
+    def my_flow():
+        ...
+
+    with Profiler(bucket, "expensive-step"):
+        ...
+
+    async with Profiler(bucket, "expensive-async-step"):
+        ...
+    ```
+    """
+
+    def __init__(
+        self,
+        bucket: S3Bucket,
+        name: str | None = None,
+        key: str = "profiles",
+        top: int = 50,
+        frames: int = 1,
+        interval: float = 0.01,
+    ) -> None:
+        """Creates a profiler that is not yet running."""
+        self.bucket: S3Bucket = bucket
+        self.name: str | None = name
+        self.key: str = key
+        self.top: int = top
+        self.frames: int = frames
+        self.interval: float = interval
+        self.__profile: cProfile.Profile | None = None
+        self.__stacks: _StackSampler | None = None
+        self.__started_tracemalloc: bool = False
+
+    def __enter__(self) -> Profiler:
+        """Starts profiling if it is enabled."""
+        if not profiling_enabled():
+            return self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.__started_tracemalloc = True
+        self.__stacks = _StackSampler(self.interval)
+        self.__stacks.start()
+        self.__profile = cProfile.Profile()
+        self.__profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        """Stops profiling and uploads the artefacts."""
+        artefacts = self._stop()
+        if artefacts is not None:
+            self._try_upload(*artefacts)
+
+    async def __aenter__(self) -> Profiler:
+        """Starts profiling if it is enabled."""
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        """Stops profiling and awaits the upload of the artefacts."""
+        artefacts = self._stop()
+        if artefacts is not None:
+            await self._try_upload_async(*artefacts)
+
+    def _stop(
+        self,
+    ) -> Tuple[cProfile.Profile, tracemalloc.Snapshot, str] | None:
+        """Stops profiling, which must happen in the thread that started it.
+
+        :return:    The profile, allocations and stacks, None if profiling\
+            was not started
+        """
+        if self.__profile is None:
+            return None
+        self.__profile.disable()
+        self.__stacks.stop()
+        snapshot = tracemalloc.take_snapshot()
+        if self.__started_tracemalloc:
+            tracemalloc.stop()
+            self.__started_tracemalloc = False
+        profile, self.__profile = self.__profile, None
+        stacks, self.__stacks = self.__stacks, None
+        return profile, snapshot, stacks.collapsed()
+
+    def _try_upload(
+        self,
+        profile: cProfile.Profile,
+        snapshot: tracemalloc.Snapshot,
+        stacks: str,
+    ):
+        """Uploads the artefacts, logging rather than raising errors."""
+        try:
+            self.upload(profile, snapshot, stacks)
+        except Exception as e:
+            # Profiling must never fail the code it profiles
+            get_prefect_or_default_logger(__name__).warning(
+                "Could not upload profile of '%s': %r", self.name, e
+            )
+
+    async def _try_upload_async(
+        self,
+        profile: cProfile.Profile,
+        snapshot: tracemalloc.Snapshot,
+        stacks: str,
+    ):
+        """Awaits the upload of the artefacts, logging rather than raising
+        errors.
+        """
+        try:
+            await self.upload_async(profile, snapshot, stacks)
+        except Exception as e:
+            get_prefect_or_default_logger(__name__).warning(
+                "Could not upload profile of '%s': %r", self.name, e
+            )
+
+    def __call__(self, func):
+        """Applies a wrapper that profiles each call if profiling is
+        enabled.
+        """
+        if not profiling_enabled():
+            return func
+
+        def profiler() -> Profiler:
+            """Creates a fresh profiler for a call."""
+            return Profiler(
+                self.bucket,
+                self.name or func.__name__,
+                self.key,
+                self.top,
+                self.frames,
+                self.interval,
+            )
+
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwds):
+                """Awaits the function within a fresh profiler."""
+                async with profiler():
+                    return await func(*args, **kwds)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwds):
+            """Calls the function within a fresh profiler."""
+            with profiler():
+                return func(*args, **kwds)
+
+        return wrapper
+
+    def _artefacts(
+        self,
+        profile: cProfile.Profile,
+        snapshot: tracemalloc.Snapshot,
+        stacks: str,
+    ) -> Dict[str, bytes]:
+        """Contents of the artefacts of a finished profile by file name."""
+        profile.create_stats()
+        # Loading the stats into `pstats.Stats` empties the profile's
+        stats = marshal.dumps(profile.stats)
+        report = io.StringIO()
+        pstats.Stats(profile, stream=report).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(self.top)
+        allocations = "\n".join(
+            str(stat) for stat in snapshot.statistics("lineno")[: self.top]
+        )
+        return {
+            "profile.pstats": stats,
+            "profile.txt": report.getvalue().encode(),
+            "allocations.txt": allocations.encode(),
+            "threads.txt": stacks.encode(),
+        }
+
+    def _child_bucket(self) -> S3Bucket:
+        """Subfolder of `bucket` to upload a profile to."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        timestamp = now.strftime("%Y%m%dT%H%M%S.%fZ")
+        return create_bucket_with_resolved_subpath(
+            f"{self.key}/{self.name or 'profile'}/{timestamp}", self.bucket
+        )
+
+    def upload(
+        self,
+        profile: cProfile.Profile,
+        snapshot: tracemalloc.Snapshot,
+        stacks: str = "",
+    ):
+        """Uploads the artefacts of a finished profile.
+
+        Storage blocks return coroutines rather than writing when called on
+        an event loop, so there the upload runs in another thread, blocking
+        until it finishes. Prefer `upload_async` in async code.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            with cf.ThreadPoolExecutor(1) as pool:
+                pool.submit(self.upload, profile, snapshot, stacks).result()
+            return
+
+        child = self._child_bucket()
+        for path, content in self._artefacts(
+            profile, snapshot, stacks
+        ).items():
+            child.write_path(path, content)
+        get_prefect_or_default_logger(__name__).info(
+            "Uploaded profile of '%s' to %s", self.name or "profile", child
+        )
+
+    async def upload_async(
+        self,
+        profile: cProfile.Profile,
+        snapshot: tracemalloc.Snapshot,
+        stacks: str = "",
+    ):
+        """Uploads the artefacts of a finished profile, awaiting each
+        write.
+        """
+        child = self._child_bucket()
+        for path, content in self._artefacts(
+            profile, snapshot, stacks
+        ).items():
+            written = child.write_path(path, content)
+            if inspect.isawaitable(written):
+                await written
+        get_prefect_or_default_logger(__name__).info(
+            "Uploaded profile of '%s' to %s", self.name or "profile", child
+        )
@@ -1,17 +1,27 @@
 """
 Deployment for a flow.
 """
+import asyncio
+import dataclasses as dc
+import functools
+import json
 from pathlib import Path
+from typing import Dict, List, Tuple
 
 import click
+import yaml
 from prefect import flow
 from prefect.deployments import Deployment
+from prefect.flows import load_flow_from_entrypoint
 from prefect.server.schemas.schedules import CronSchedule
 from prefect_aws import ECSTask
 from prefect_github import GitHubRepository
 
 from ...utilities.misc import list_packages
 
+# The Pipfile is parsed once per invocation
+cached_packages = functools.lru_cache(list_packages)
+
 
 @click.group()
 def cli():
@@ -75,7 +85,7 @@ def production(
     infra: ECSTask = ECSTask.load(infra_block)
     click.echo(f"Fetched ECSTask Block '{infra._block_document_name}'")
     infra.env.update(
-        dict(EXTRA_PIP_PACKAGES=" ".join(list_packages(True, False)))
+        dict(EXTRA_PIP_PACKAGES=" ".join(cached_packages(True, False)))
     )
 
     prod_deployment: Deployment = Deployment.build_from_flow(
@@ -163,7 +173,7 @@ def development(
     infra: ECSTask = ECSTask.load(infra_block)
     click.echo(f"Fetched ECSTask Block '{infra._block_document_name}'")
     env = infra.env.copy()
-    env["EXTRA_PIP_PACKAGES"] = " ".join(list_packages())
+    env["EXTRA_PIP_PACKAGES"] = " ".join(cached_packages())
     infra = infra.copy(
         exclude={"_block_document_id"},
         update=dict(
@@ -202,5 +212,187 @@ def development(
         click.echo(str(output))
 
 
+@dc.dataclass
+class BatchEntry:
+    """A flow deployment in a batch manifest.
+
+    :param entrypoint:      Flow to deploy as `path/to/file.py:flow_function`
+    :param name:            Name of the deployment
+    :param storage_block:   Name of the GitHubRepository Block to use
+    :param infra_block:     Name of the ECSTask Block to use
+    :param schedule:        Cron schedule, defaults to none
+    :param tags:            Tags of the deployment
+    :param work_queue_name: Work queue of the deployment
+    """
+
+    entrypoint: str
+    name: str
+    storage_block: str = "github-repository-my-flow"
+    infra_block: str = "ecs-task-my-flow"
+    schedule: str | None = None
+    tags: List[str] = dc.field(default_factory=lambda: ["Production"])
+    work_queue_name: str = "default"
+
+
+def read_manifest(path: Path) -> List[BatchEntry]:
+    """Reads the deployments of a YAML or JSON manifest.
+
+    The manifest has a `flows` list of `BatchEntry` fields, and optionally
+    `defaults` applied to every entry.
+
+    ```yaml
+    defaults:
+      infra_block: ecs-task-etl
+    flows:
+      - entrypoint: flows/etl.py:my_flow
+        name: My Flow ETL
+        schedule: "0 1 * * *"
+    ```
+
+    :raises ValueError: Entries of one flow share a name, so would\
+        overwrite each other
+    :return:            Deployments in manifest order
+    """
+    with open(path, "r") as fo:
+        if path.suffix == ".json":
+            manifest: dict = json.load(fo)
+        else:
+            manifest: dict = yaml.safe_load(fo)
+    defaults: dict = manifest.get("defaults", {})
+    entries = [BatchEntry(**{**defaults, **f}) for f in manifest["flows"]]
+    # Deployment names are only unique per flow
+    keys = [(entry.entrypoint, entry.name) for entry in entries]
+    duplicates = sorted({key for key in keys if keys.count(key) > 1})
+    if duplicates:
+        raise ValueError(
+            "Deployment names must be unique per entrypoint, "
+            f"{duplicates} are repeated"
+        )
+    return entries
+
+
+async def _deploy_batch(
+    entries: List[BatchEntry], reference: str, apply: bool, parallelism: int
+) -> List[Tuple[BatchEntry, Exception | None]]:
+    """Builds, and optionally applies, the deployments of a batch.
+
+    Each distinct block is loaded and saved once. Deployments are built and
+    applied concurrently, at most `parallelism` at a time.
+
+    :return:    Each entry with its error, None if it succeeded, in order
+    """
+    semaphore = asyncio.Semaphore(parallelism)
+    storages: Dict[str, asyncio.Task] = {}
+    infras: Dict[str, asyncio.Task] = {}
+
+    async def load_storage(name: str) -> GitHubRepository:
+        """Loads and points a GitHubRepository Block to `reference`."""
+        storage: GitHubRepository = await GitHubRepository.load(name)
+        click.echo(f"Fetched GitHubRepository Block '{name}'")
+        storage = storage.copy(update=dict(reference=reference))
+        if apply:
+            await storage.save(storage._block_document_name, overwrite=True)
+            click.echo(f"Created GitHubRepository Block '{name}'")
+        return storage
+
+    async def load_infra(name: str) -> ECSTask:
+        """Loads an ECSTask Block and sets its packages."""
+        infra: ECSTask = await ECSTask.load(name)
+        click.echo(f"Fetched ECSTask Block '{name}'")
+        infra.env.update(
+            dict(EXTRA_PIP_PACKAGES=" ".join(cached_packages(True, False)))
+        )
+        if apply:
+            await infra.save(infra._block_document_name, overwrite=True)
+            click.echo(f"Created ECSTask Block '{name}'")
+        return infra
+
+    for entry in entries:
+        if entry.storage_block not in storages:
+            storages[entry.storage_block] = asyncio.create_task(
+                load_storage(entry.storage_block)
+            )
+        if entry.infra_block not in infras:
+            infras[entry.infra_block] = asyncio.create_task(
+                load_infra(entry.infra_block)
+            )
+
+    async def deploy(entry: BatchEntry):
+        """Builds, and optionally applies, one deployment."""
+        # Importing flows is not thread safe, so it happens on the loop
+        flow_ = load_flow_from_entrypoint(entry.entrypoint)
+        storage = await storages[entry.storage_block]
+        infra = await infras[entry.infra_block]
+        async with semaphore:
+            deployment: Deployment = await Deployment.build_from_flow(
+                flow=flow_,
+                name=entry.name,
+                storage=storage,
+                infrastructure=infra,
+                schedule=(
+                    CronSchedule(cron=entry.schedule)
+                    if entry.schedule
+                    else None
+                ),
+                work_queue_name=entry.work_queue_name,
+                tags=entry.tags,
+            )
+            if apply:
+                await deployment.apply()
+                click.echo(f"Applied Deployment '{deployment.name}'")
+
+    results = await asyncio.gather(
+        *(deploy(entry) for entry in entries), return_exceptions=True
+    )
+    return [
+        (entry, result if isinstance(result, Exception) else None)
+        for entry, result in zip(entries, results)
+    ]
+
+
+@cli.command
+@click.argument(
+    "manifest", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.argument("reference", type=str, default="main")
+@click.option(
+    "--apply",
+    is_flag=True,
+    default=False,
+    help="Apply the deployments to Orion.",
+)
+@click.option(
+    "-p",
+    "--parallelism",
+    type=click.IntRange(min=1),
+    default=8,
+    help="Number of deployments built and applied at once.",
+)
+def batch(manifest: Path, reference: str, apply: bool, parallelism: int):
+    """
+    Create the production deployments of every flow in a manifest and have
+    them pull data from the repository reference.
+    """
+    try:
+        entries = read_manifest(manifest)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'MANIFEST'")
+    results = asyncio.run(
+        _deploy_batch(entries, reference, apply, parallelism)
+    )
+
+    failures = 0
+    for entry, error in results:
+        label = f"{entry.name} ({entry.entrypoint})"
+        if error is None:
+            click.echo(f"  OK      {label}")
+        else:
+            failures += 1
+            click.echo(f"  FAILED  {label}: {error!r}")
+    click.echo(f"{len(results) - failures} succeeded, {failures} failed")
+    if failures:
+        raise SystemExit(1)
+
+
 if __name__ == "__main__":
     cli()
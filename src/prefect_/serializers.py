@@ -1,10 +1,38 @@
 """
 Module for serializing and deserializing output.
 """
+from __future__ import annotations
+
+import asyncio
+import collections
+import concurrent.futures as cf
+import hashlib
 import io
+import json
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from typing import Deque, Literal
 
-import polars as pl
+from prefect.blocks.core import Block
+from prefect.client.orchestration import get_client
+from prefect.filesystems import LocalFileSystem, WritableFileSystem
 from prefect.serializers import Serializer
+from pydantic import PrivateAttr
+
+from ..pandas_.io_ import PandasIOMethod, dataframe_to_bytes, text_to_dataframe
+from ..utilities.lazy import lazy_import
+
+pd = lazy_import("pandas")
+pl = lazy_import("polars")
+
+# Buffers reused by `PandasSerializer.dumps`, one per thread
+_buffers = threading.local()
+
+# Directory `PolarsIPCSerializer` spills to by default, created on first use
+_spill_directory: tempfile.TemporaryDirectory | None = None
+_spill_lock = threading.Lock()
 
 
 class PolarsSerializer(Serializer):
@@ -18,10 +46,339 @@ class PolarsSerializer(Serializer):
         """Converts a `polars.DataFrame` to parquet-formatted bytes."""
         buffer = io.BytesIO()
         obj.write_parquet(buffer, **self.write_options)
-        return super().dumps(buffer.getvalue())
+        return buffer.getvalue()
 
     def loads(self, blob: bytes) -> pl.DataFrame:
         """Loads a `polars.DataFrame` from parquet-formatted bytes."""
         buffer = io.BytesIO(blob)
         df = pl.read_parquet(buffer, **self.read_options)
         return df
+
+
+class PandasSerializer(Serializer):
+    """Serializes Pandas DataFrames with a `PandasIOMethod`, PARQUET by
+    default.
+
+    `compression` is passed to the writer and reader of every method but
+    EXCEL, and `row_group_size` only to the PARQUET writer. Both default to
+    the method's own default. With `reuse_buffer`, each thread serializes
+    into one buffer that keeps its allocation between frames.
+    """
+
+    type = "pandas"
+    method: str = PandasIOMethod.PARQUET.name
+    compression: str | None = None
+    row_group_size: int | None = None
+    reuse_buffer: bool = True
+    read_options: dict = {}
+    write_options: dict = {}
+
+    def _write_options(self) -> dict:
+        """Write options with the compression and row group size applied."""
+        options = {}
+        method = self.method.upper()
+        if self.compression is not None and method != "EXCEL":
+            options["compression"] = self.compression
+        if self.row_group_size is not None and method == "PARQUET":
+            options["row_group_size"] = self.row_group_size
+        options.update(self.write_options)
+        return options
+
+    def _read_options(self) -> dict:
+        """Read options with the compression applied."""
+        options = {}
+        method = self.method.upper()
+        # Parquet records its compression in the file
+        if self.compression is not None and method not in ("EXCEL", "PARQUET"):
+            options["compression"] = self.compression
+        options.update(self.read_options)
+        return options
+
+    def dumps(self, obj: pd.DataFrame) -> bytes:
+        """Converts a `pandas.DataFrame` to bytes of `method`."""
+        buffer_ = None
+        if self.reuse_buffer:
+            if not hasattr(_buffers, "value"):
+                _buffers.value = io.BytesIO()
+            buffer_ = _buffers.value
+        return dataframe_to_bytes(
+            obj, self.method, self._write_options(), buffer_=buffer_
+        )
+
+    def loads(self, blob: bytes) -> pd.DataFrame:
+        """Loads a `pandas.DataFrame` from bytes of `method`."""
+        return text_to_dataframe(blob, self.method, self._read_options())
+
+
+def _default_spill_directory() -> Path:
+    """Gets the temporary directory results are spilled to when no
+    `spill_directory` is set. It is removed when the process exits.
+    """
+    global _spill_directory
+    with _spill_lock:
+        if _spill_directory is None:
+            _spill_directory = tempfile.TemporaryDirectory(prefix="spill-")
+        return Path(_spill_directory.name)
+
+
+class PolarsIPCSerializer(Serializer):
+    """Serializes Polars DataFrames as Arrow IPC (Feather v2).
+
+    Uncompressed IPC needs no decoding, so frames are loaded zero-copy from
+    the blob. With `memory_map` the blob is spilled to a file and
+    memory-mapped instead, and with `lazy` a `polars.LazyFrame` is returned
+    that only reads the columns a query uses.
+
+    Memory-mapped files are removed as soon as they are mapped. Files a
+    `polars.LazyFrame` scans are kept until the process exits, or, in a
+    given `spill_directory`, are left for the caller to remove.
+
+    NOTE lz4 and zstd compressed results are smaller but must be decoded, so
+    they cannot be loaded zero-copy.
+    """
+
+    type = "polars-ipc"
+    compression: Literal["uncompressed", "lz4", "zstd"] = "uncompressed"
+    memory_map: bool = False
+    lazy: bool = False
+    spill_directory: str | None = None
+
+    def dumps(self, obj: pl.DataFrame) -> bytes:
+        """Converts a `polars.DataFrame` to IPC-formatted bytes."""
+        buffer = io.BytesIO()
+        obj.write_ipc(buffer, compression=self.compression)
+        return buffer.getvalue()
+
+    def loads(self, blob: bytes) -> pl.DataFrame | pl.LazyFrame:
+        """Loads a `polars.DataFrame` or `polars.LazyFrame` from
+        IPC-formatted bytes.
+        """
+        if self.lazy:
+            return pl.scan_ipc(self._spill(blob), memory_map=True)
+        if self.memory_map:
+            path = self._spill(blob, shared=False)
+            try:
+                return pl.read_ipc(path, memory_map=True, rechunk=False)
+            finally:
+                # The mapping outlives the file's name
+                path.unlink(missing_ok=True)
+
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return pl.read_ipc(io.BytesIO(blob), memory_map=False)
+        # The table's buffers point into `blob` rather than copies of it
+        table = pa.ipc.open_file(pa.py_buffer(blob)).read_all()
+        return pl.from_arrow(table, rechunk=False)
+
+    def _spill(self, blob: bytes, shared: bool = True) -> Path:
+        """Writes `blob` to the spill directory.
+
+        :param blob:    IPC-formatted bytes
+        :param shared:  Name the file by the digest of `blob`, so repeated\
+            loads of one result share it. Otherwise the file is the\
+            caller's alone
+        :return:        Path to the spilled file
+        """
+        if self.spill_directory:
+            directory = Path(self.spill_directory)
+            directory.mkdir(parents=True, exist_ok=True)
+        else:
+            directory = _default_spill_directory()
+        if shared:
+            path = directory / f"{hashlib.sha256(blob).hexdigest()}.arrow"
+            if path.exists():
+                return path
+        # Renamed into place so readers never map a partial file
+        with tempfile.NamedTemporaryFile(
+            dir=directory, suffix=".partial", delete=False
+        ) as fo:
+            fo.write(blob)
+        if not shared:
+            return Path(fo.name)
+        Path(fo.name).replace(path)
+        return path
+
+
+class PartitionedParquetSerializer(Serializer):
+    """Writes large DataFrames to `storage` as a parquet dataset and
+    serializes a small manifest of its partitions.
+
+    Partitions are serialized one at a time and uploaded in parallel while
+    the next are produced, so at most `max_workers` partitions are held in
+    memory rather than the whole frame's bytes. Partitions hold
+    `partition_rows` rows or, if unset, about `partition_bytes` of the
+    frame's in-memory size.
+
+    Loading returns a `polars.LazyFrame` scanning the dataset when `lazy`,
+    or the partitions read in parallel and concatenated otherwise. Only a
+    `LocalFileSystem` can be scanned, so `lazy` is rejected for any other
+    storage. Pandas frames are loaded back as Pandas.
+
+    `storage` is not serialized with the results. Each manifest records the
+    id of its block document instead, which is saved as an anonymous block
+    if it has none, and results are read back through the block loaded by
+    that id. Its secrets stay in the block document.
+    """
+
+    type = "partitioned-parquet"
+    dataset_folder: str = "datasets"
+    partition_rows: int | None = None
+    partition_bytes: int = 256 * 1024**2
+    max_workers: int = 8
+    lazy: bool = False
+    write_options: dict = {}
+
+    _storage: WritableFileSystem | None = PrivateAttr(None)
+
+    def __init__(self, storage: WritableFileSystem | None = None, **data):
+        """Writes results to `storage`. It can be left out when the
+        serializer only loads results, as Prefect does.
+
+        :raises ValueError: `lazy` is set and `storage` is not local
+        """
+        super().__init__(**data)
+        if storage is not None:
+            self._check_lazy(storage)
+        self._storage = storage
+
+    def _check_lazy(self, storage: WritableFileSystem):
+        """Checks `storage` can be scanned if `lazy` is set.
+
+        :raises ValueError: `lazy` is set and `storage` is not local
+        """
+        if self.lazy and not isinstance(storage, LocalFileSystem):
+            raise ValueError(
+                "'lazy' must be False unless 'storage' is a LocalFileSystem, "
+                f"not {type(storage).__name__}"
+            )
+
+    def _storage_block_id(self) -> str:
+        """Gets the block document id of `storage`, saving it as an anonymous
+        block if it has none. Called from a worker thread.
+        """
+        if self._storage._block_document_id is None:
+            asyncio.run(self._storage._save(is_anonymous=True, overwrite=True))
+        return str(self._storage._block_document_id)
+
+    def _load_storage(self, block_id: str) -> WritableFileSystem:
+        """Gets the storage with block document id `block_id`, loading it
+        unless it is `storage`. Called from a worker thread.
+        """
+        if self._storage is not None and block_id == str(
+            self._storage._block_document_id
+        ):
+            return self._storage
+
+        async def load() -> WritableFileSystem:
+            """Reads the block document from the API."""
+            async with get_client() as client:
+                document = await client.read_block_document(
+                    uuid.UUID(block_id)
+                )
+            return Block._from_block_document(document)
+
+        return asyncio.run(load())
+
+    def _rows_per_partition(self, obj: pl.DataFrame | pd.DataFrame) -> int:
+        """Rows to put in each partition of `obj`."""
+        if self.partition_rows is not None:
+            return max(self.partition_rows, 1)
+        if isinstance(obj, pl.DataFrame):
+            size = obj.estimated_size()
+        else:
+            size = int(obj.memory_usage(deep=True).sum())
+        row_size = max(size // max(len(obj), 1), 1)
+        return max(self.partition_bytes // row_size, 1)
+
+    def _write_partition(
+        self, frame: pl.DataFrame | pd.DataFrame, path: str
+    ) -> str:
+        """Serializes `frame` and writes it to `path` of `storage`."""
+        buffer = io.BytesIO()
+        if isinstance(frame, pl.DataFrame):
+            frame.write_parquet(buffer, **self.write_options)
+        else:
+            frame.to_parquet(buffer, **self.write_options)
+        return self._storage.write_path(path, buffer.getvalue())
+
+    @staticmethod
+    def _read_partition(
+        storage: WritableFileSystem,
+        path: str,
+        frame: Literal["polars", "pandas"],
+    ) -> pl.DataFrame | pd.DataFrame:
+        """Reads the partition at `path` of `storage`."""
+        buffer = io.BytesIO(storage.read_path(path))
+        if frame == "polars":
+            return pl.read_parquet(buffer)
+        return pd.read_parquet(buffer)
+
+    def dumps(self, obj: pl.DataFrame | pd.DataFrame) -> bytes:
+        """Writes `obj` to `storage` in partitions, returning the manifest.
+
+        :raises ValueError: The serializer has no `storage`
+        """
+        if self._storage is None:
+            raise ValueError("'storage' must be given to write results")
+        folder = f"{self.dataset_folder}/{uuid.uuid4().hex}"
+        rows = self._rows_per_partition(obj)
+        paths = []
+        pending: Deque[cf.Future] = collections.deque()
+        with cf.ThreadPoolExecutor(self.max_workers) as pool:
+            # Prefect serializes from its event loop, so the API is called
+            # from a worker thread
+            block_id = pool.submit(self._storage_block_id)
+            for i, offset in enumerate(range(0, max(len(obj), 1), rows)):
+                # Waits on the oldest upload to bound partitions in memory
+                if len(pending) >= self.max_workers:
+                    pending.popleft().result()
+                frame = (
+                    obj.slice(offset, rows)
+                    if isinstance(obj, pl.DataFrame)
+                    else obj.iloc[offset : offset + rows]
+                )
+                path = f"{folder}/part-{i:05d}.parquet"
+                paths.append(path)
+                pending.append(pool.submit(self._write_partition, frame, path))
+            for future in pending:
+                future.result()
+
+        manifest = {
+            "frame": "polars" if isinstance(obj, pl.DataFrame) else "pandas",
+            "rows": len(obj),
+            "partitions": paths,
+            "storage": block_id.result(),
+        }
+        return json.dumps(manifest).encode()
+
+    def loads(self, blob: bytes) -> pl.DataFrame | pl.LazyFrame | pd.DataFrame:
+        """Loads the dataset listed in the manifest `blob`.
+
+        :raises ValueError: `lazy` is set and the dataset's storage is not\
+            local
+        """
+        manifest = json.loads(blob)
+        paths = manifest["partitions"]
+        with cf.ThreadPoolExecutor(self.max_workers) as pool:
+            storage = pool.submit(
+                self._load_storage, manifest["storage"]
+            ).result()
+            if manifest["frame"] == "polars" and self.lazy:
+                self._check_lazy(storage)
+                return pl.concat(
+                    [pl.scan_parquet(storage._resolve_path(p)) for p in paths],
+                    rechunk=False,
+                )
+
+            frames = list(
+                pool.map(
+                    lambda path: self._read_partition(
+                        storage, path, manifest["frame"]
+                    ),
+                    paths,
+                )
+            )
+        if manifest["frame"] == "pandas":
+            return pd.concat(frames)
+        return pl.concat(frames, rechunk=False)
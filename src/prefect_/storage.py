@@ -1,11 +1,24 @@
 """
 Code for storing data with Prefect.
 """
+from __future__ import annotations
+
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .loggers import get_prefect_or_default_logger
+
+if TYPE_CHECKING:
+    from prefect_aws import S3Bucket
 
-from prefect_aws import S3Bucket
 
-from prefect_.loggers import get_prefect_or_default_logger
+def __getattr__(name: str):
+    """Imports `S3Bucket` on first access rather than with the module."""
+    if name == "S3Bucket":
+        from prefect_aws import S3Bucket
+
+        return S3Bucket
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def create_bucket_with_resolved_subpath(
@@ -72,19 +85,35 @@ def task_persistence_subfolder(
     bucket: S3Bucket,
     key: str | None = None,
     suffix: str | None = None,
+    *,
+    deduplicate: bool = False,
+    cache: bool | dict = False,
+    partitioned: bool | dict = False,
+    write_behind: bool | dict = False,
 ):
     """Decorator to set the `task.result_storage` attribute to a subfolder of
     `bucket`. `key` will be relative to the existing `bucket.bucket_folder`.
     If no key is given, then `task.fn.__name__` will be used as the subfolder.
-    NOTE This method does not alter the `result_serializer` or
-    `persist_result` attributes. `**kwds` are passed to
-    `create_bucket_with_resolved_subpath`.
-
-    :param bucket:  `S3Bucket` to create a child folder for
-    :param key:     Folder to resolve `bucket_folder` to
-    :param suffix:  Suffix to append to anonymous block name, defaults to\
-        `task.fn.__name__`
-    :return:        Task whose `result_storage` outputs to a subfolder
+    NOTE This method does not alter the `persist_result` attribute, nor the
+    `result_serializer` attribute unless `partitioned` is set. `**kwds` are
+    passed to `create_bucket_with_resolved_subpath`.
+
+    :param bucket:      `S3Bucket` to create a child folder for
+    :param key:         Folder to resolve `bucket_folder` to
+    :param suffix:      Suffix to append to anonymous block name, defaults\
+        to `task.fn.__name__`
+    :param deduplicate: Store each distinct result once under its digest,\
+        see `ContentAddressedFileSystem`. Defaults to False
+    :param cache:       Serve reads from memory or disk when possible, see\
+        `CachedFileSystem`. A dictionary is passed to it as keyword\
+        arguments. Defaults to False
+    :param partitioned: Write DataFrame results as a parquet dataset in\
+        the subfolder, see `PartitionedParquetSerializer`. A dictionary is\
+        passed to it as keyword arguments. Defaults to False
+    :param write_behind: Upload results in the background, see\
+        `WriteBehindFileSystem`. A dictionary is passed to it as keyword\
+        arguments. Defaults to False
+    :return:            Task whose `result_storage` outputs to a subfolder
     ## Examples
     ```py
     bucket: S3Bucket = ...
@@ -103,9 +132,50 @@ def task_persistence_subfolder(
         '''
         ...
     # Results will be persisted to "base_folder/persisted_task/"
+    @task_persistence_subfolder(bucket, deduplicate=True)
+    @task(result_serializer=PickleSerializer, persist_result=True)
+    def deduplicated_task(data: dict) -> dict:
+        '''A task whose identical return values are uploaded once.
+        '''
+        ...
+    # Results will be persisted to "base_folder/deduplicated_task/objects/"
+    @task_persistence_subfolder(bucket, cache={"disk_bytes": 2 * 1024**3})
+    @task(result_serializer=PickleSerializer, persist_result=True)
+    def cached_task(data: dict) -> dict:
+        '''A task whose return value downstream tasks read from memory or
+        disk.
+        '''
+        ...
+    @task_persistence_subfolder(bucket, partitioned={"partition_rows": 10**7})
+    @task(persist_result=True)
+    def large_task() -> pl.DataFrame:
+        '''A task whose return value is uploaded in partitions.
+        '''
+        ...
+    # Partitions will be persisted to "base_folder/large_task/datasets/"
+    @task_persistence_subfolder(bucket, write_behind=True)
+    @task(result_serializer=PickleSerializer, persist_result=True)
+    def quick_task(data: dict) -> dict:
+        '''A task that returns before its result is uploaded.
+        '''
+        ...
+    @flow
+    @flushes_write_behind
+    def my_flow():
+        '''A flow that ends once its results are uploaded.
+        '''
+        quick_task({})
     ```
     """
 
+    # Imported here so the module does not import Prefect until it is used
+    from .filesystems import (
+        CachedFileSystem,
+        ContentAddressedFileSystem,
+        WriteBehindFileSystem,
+    )
+    from .serializers import PartitionedParquetSerializer
+
     def decorator(task):
         """Decorates the task to assign a new `task.result_storage`."""
         logger = get_prefect_or_default_logger()
@@ -114,6 +184,25 @@ def task_persistence_subfolder(
             suffix or "-" + task.fn.__name__.replace("_", "-"),
             parent=bucket,
         )
+        if partitioned:
+            task.result_serializer = PartitionedParquetSerializer(
+                storage=task.result_storage,
+                **(partitioned if isinstance(partitioned, dict) else {}),
+            )
+        if deduplicate:
+            task.result_storage = ContentAddressedFileSystem(
+                storage=task.result_storage
+            )
+        if write_behind:
+            task.result_storage = WriteBehindFileSystem(
+                storage=task.result_storage,
+                **(write_behind if isinstance(write_behind, dict) else {}),
+            )
+        if cache:
+            task.result_storage = CachedFileSystem(
+                storage=task.result_storage,
+                **(cache if isinstance(cache, dict) else {}),
+            )
         logger.debug(
             "Task %s is being persisted to storage %s",
             task,
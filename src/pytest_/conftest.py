@@ -10,6 +10,9 @@ from prefect.testing.utilities import prefect_test_harness
 
 from ..prefect_ import storage as blocks
 
+# NOTE register the fake S3 fixtures with `pytest_plugins` in the root
+# conftest, pytest no longer supports it in others
+
 TESTS_PATH: Path = Path(__file__).parent
 
 
@@ -49,21 +52,17 @@ def with_mock_bucket(monkeypatch: MonkeyPatch, mock_bucket_path: Path):
         _is_anonymous=True,
         basepath=str(mock_bucket_path.absolute()),
     )
-    fs._block_document_id = fs._save(
-        "test-bucket",
-        is_anonymous=True,
-        overwrite=True,
-    )
+    fs._block_document_id = fs.save("test-bucket", overwrite=True)
 
     # UPDATE ME: assumes the root bucket is named 'bucket'
-    monkeypatch.setattr(blocks, "bucket", fs)
+    monkeypatch.setattr(blocks, "bucket", fs, raising=False)
 
     fs_persist: LocalFileSystem = blocks.create_child_bucket(
         key="persistence",
         suffix="-persistence",
         parent=fs,
     )
-    monkeypatch.setattr(blocks, "persistence", fs_persist)
+    monkeypatch.setattr(blocks, "persistence", fs_persist, raising=False)
 
     # UPDATE ME: does not update bucket instances with these names
     IGNORE = ("bucket", "persistence", "noaa_source_bucket")
@@ -0,0 +1,387 @@
+"""
+An in-process stand-in for the boto3 S3 resource, with injectable latency,
+bandwidth caps and throttling errors.
+
+Covers the parts of the boto3 API that `boto3_.bucket.S3Bucket` and
+`boto3_.object_summary.ObjectSummary` use, so they can be tested and
+benchmarked offline.
+"""
+from __future__ import annotations
+
+import collections
+import dataclasses as dc
+import datetime
+import hashlib
+import io
+import random
+import threading
+import time
+from typing import Dict, Generator, List, Tuple
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+
+@dc.dataclass
+class FakeS3Config:
+    """Behaviour of a `FakeS3`.
+
+    :param latency:         Seconds added to every request
+    :param bandwidth:       Bytes per second shared by every transfer,\
+        defaults to unlimited
+    :param throttle_rate:   Probability a request fails with a SlowDown error
+    :param page_size:       Objects per listing page
+    :param seed:            Seed of the throttling randomness
+    """
+
+    latency: float = 0.0
+    bandwidth: float | None = None
+    throttle_rate: float = 0.0
+    page_size: int = 1000
+    seed: int | None = None
+
+
+@dc.dataclass
+class _StoredObject:
+    """An object held by `FakeS3`."""
+
+    content: bytes
+    e_tag: str
+    last_modified: datetime.datetime
+    content_encoding: str | None = None
+
+
+def _throttling_error(operation: str) -> Exception:
+    """The error S3 raises when a prefix's request rate is exceeded."""
+    try:
+        from botocore.exceptions import ClientError
+    except ImportError:
+        return RuntimeError(f"SlowDown: {operation}")
+    return ClientError(
+        {
+            "Error": {
+                "Code": "SlowDown",
+                "Message": "Please reduce your request rate.",
+            },
+            "ResponseMetadata": {"HTTPStatusCode": 503},
+        },
+        operation,
+    )
+
+
+class FakeS3:
+    """In-process S3 with every bucket's objects held in memory.
+
+    `Session` stands in for `boto3.Session`. Requests per operation are
+    counted in `requests`.
+
+    :param config:  Latency, bandwidth and throttling, defaults to none
+    """
+
+    def __init__(self, config: FakeS3Config | None = None) -> None:
+        """Creates an empty S3."""
+        self.config: FakeS3Config = config or FakeS3Config()
+        self.objects: Dict[Tuple[str, str], _StoredObject] = {}
+        self.requests: collections.Counter = collections.Counter()
+        self.__lock: threading.Lock = threading.Lock()
+        self.__random: random.Random = random.Random(self.config.seed)
+        self.__bandwidth_free_at: float = 0.0
+
+    def request(self, operation: str):
+        """Simulates the round trip of a request.
+
+        :raises ClientError:    The request was throttled
+        """
+        with self.__lock:
+            self.requests[operation] += 1
+            throttled = self.__random.random() < self.config.throttle_rate
+        if self.config.latency:
+            time.sleep(self.config.latency)
+        if throttled:
+            raise _throttling_error(operation)
+
+    def transfer(self, size: int):
+        """Waits for `size` bytes to pass through the shared bandwidth."""
+        if not self.config.bandwidth or not size:
+            return
+        with self.__lock:
+            start = max(time.monotonic(), self.__bandwidth_free_at)
+            self.__bandwidth_free_at = start + size / self.config.bandwidth
+            done = self.__bandwidth_free_at
+        time.sleep(max(done - time.monotonic(), 0))
+
+    def put(
+        self,
+        bucket: str,
+        key: str,
+        content: bytes,
+        content_encoding: str | None = None,
+    ):
+        """Stores an object without simulating a request."""
+        with self.__lock:
+            self.objects[bucket, key] = _StoredObject(
+                content,
+                f'"{hashlib.md5(content).hexdigest()}"',
+                datetime.datetime.now(datetime.timezone.utc),
+                content_encoding,
+            )
+
+    def list(
+        self, bucket: str, prefix: str = "", start_after: str = ""
+    ) -> List[Tuple[str, _StoredObject]]:
+        """Keys and objects of `bucket` in key order."""
+        with self.__lock:
+            return sorted(
+                (key, obj)
+                for (name, key), obj in self.objects.items()
+                if name == bucket
+                and key.startswith(prefix)
+                and key > start_after
+            )
+
+    def Session(self, profile_name: str | None = None) -> _FakeSession:
+        """Stands in for `boto3.Session`."""
+        return _FakeSession(self)
+
+
+class _FakeSession:
+    """Stands in for `boto3.Session`."""
+
+    def __init__(self, s3: FakeS3) -> None:
+        """Creates a session of `s3`."""
+        self.s3 = s3
+
+    def resource(self, service_name: str, **kwds) -> _FakeResource:
+        """Creates the S3 resource."""
+        if service_name != "s3":
+            raise ValueError(f"FakeS3 only fakes 's3', not '{service_name}'")
+        return _FakeResource(self.s3)
+
+
+class _FakeResource:
+    """Stands in for the boto3 S3 `ServiceResource`."""
+
+    def __init__(self, s3: FakeS3) -> None:
+        """Creates a resource of `s3`."""
+        self.s3 = s3
+
+    def Bucket(self, name: str) -> _FakeBucket:
+        """Gets a bucket."""
+        return _FakeBucket(self.s3, name)
+
+    def ObjectSummary(self, bucket_name: str, key: str) -> FakeObjectSummary:
+        """Gets an object summary."""
+        return FakeObjectSummary(self.s3, bucket_name, key)
+
+
+class _FakeBucket:
+    """Stands in for `boto3.s3.Bucket`."""
+
+    def __init__(self, s3: FakeS3, name: str) -> None:
+        """Creates the bucket `name` of `s3`."""
+        self.s3 = s3
+        self.name = name
+        self.objects = _FakeObjectsCollection(s3, name)
+
+    def put_object(self, Key: str, Body: bytes, **kwds) -> FakeObjectSummary:
+        """Uploads an object."""
+        if isinstance(Body, str):
+            Body = Body.encode()
+        elif not isinstance(Body, bytes):
+            Body = Body.read()
+        self.s3.request("PutObject")
+        self.s3.transfer(len(Body))
+        self.s3.put(self.name, Key, Body, kwds.get("ContentEncoding"))
+        return FakeObjectSummary(self.s3, self.name, Key)
+
+    def Object(self, key: str) -> FakeObjectSummary:
+        """Gets an object."""
+        return FakeObjectSummary(self.s3, self.name, key)
+
+
+class _FakeObjectsCollection:
+    """Stands in for `boto3.s3.Bucket.objects`."""
+
+    def __init__(self, s3: FakeS3, bucket: str, **params) -> None:
+        """Creates the collection of `bucket` filtered by `params`."""
+        self.s3 = s3
+        self.bucket = bucket
+        self.params = params
+
+    def filter(self, **params) -> _FakeObjectsCollection:
+        """Filters by `Prefix` and `Marker` or `StartAfter`."""
+        return _FakeObjectsCollection(
+            self.s3, self.bucket, **{**self.params, **params}
+        )
+
+    def pages(self) -> Generator[List[FakeObjectSummary], None, None]:
+        """Yields pages of object summaries, a request each."""
+        listed = self.s3.list(
+            self.bucket,
+            self.params.get("Prefix") or "",
+            self.params.get("Marker") or self.params.get("StartAfter") or "",
+        )
+        size = self.s3.config.page_size
+        for i in range(0, max(len(listed), 1), size):
+            self.s3.request("ListObjects")
+            yield [
+                FakeObjectSummary(self.s3, self.bucket, key, obj)
+                for key, obj in listed[i : i + size]
+            ]
+
+    def __iter__(self) -> Generator[FakeObjectSummary, None, None]:
+        """Yields object summaries."""
+        for page in self.pages():
+            yield from page
+
+    def iterator(self, **params) -> Generator[FakeObjectSummary, None, None]:
+        """Yields object summaries filtered by `params`."""
+        yield from self.filter(**params)
+
+    def all(self) -> _FakeObjectsCollection:
+        """The unfiltered collection."""
+        return self
+
+
+class _FakeStreamingBody:
+    """Stands in for `botocore.response.StreamingBody`, paced by the
+    bandwidth as it is read.
+    """
+
+    def __init__(self, s3: FakeS3, content: bytes) -> None:
+        """Creates a body streaming `content`."""
+        self.s3 = s3
+        self.__buffer = io.BytesIO(content)
+
+    def read(self, amt: int | None = None) -> bytes:
+        """Reads `amt` bytes, or the rest."""
+        chunk = self.__buffer.read(amt)
+        self.s3.transfer(len(chunk))
+        return chunk
+
+    def iter_chunks(self, chunk_size: int = 1024):
+        """Yields chunks of `chunk_size` bytes."""
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    @property
+    def closed(self) -> bool:
+        """Whether the body is closed."""
+        return self.__buffer.closed
+
+    def close(self):
+        """Closes the body."""
+        self.__buffer.close()
+
+
+class FakeObjectSummary:
+    """Stands in for `boto3.s3.ObjectSummary`."""
+
+    def __init__(
+        self,
+        s3: FakeS3,
+        bucket_name: str,
+        key: str,
+        stored: _StoredObject | None = None,
+    ) -> None:
+        """Creates a summary of `key`, as listed if `stored` is given."""
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.key = key
+        self.__stored = stored
+
+    def __repr__(self) -> str:
+        return (
+            f"s3.ObjectSummary(bucket_name='{self.bucket_name}', "
+            f"key='{self.key}')"
+        )
+
+    @property
+    def _stored(self) -> _StoredObject:
+        """The stored object, as listed or currently stored."""
+        if self.__stored is None:
+            self.__stored = self.s3.objects[self.bucket_name, self.key]
+        return self.__stored
+
+    @property
+    def e_tag(self) -> str:
+        """Object's ETag."""
+        return self._stored.e_tag
+
+    @property
+    def last_modified(self) -> datetime.datetime:
+        """Object's last modified datetime."""
+        return self._stored.last_modified
+
+    @property
+    def size(self) -> int:
+        """Object's size in bytes."""
+        return len(self._stored.content)
+
+    @property
+    def storage_class(self) -> str:
+        """Object's storage class."""
+        return "STANDARD"
+
+    @property
+    def checksum_algorithm(self) -> list:
+        """Object's checksum algorithms."""
+        return []
+
+    def get(self, **kwds) -> dict:
+        """Gets the object, supporting `Range`."""
+        self.s3.request("GetObject")
+        try:
+            stored = self.s3.objects[self.bucket_name, self.key]
+        except KeyError:
+            raise KeyError(f"NoSuchKey: {self.key}") from None
+        content = stored.content
+        if "Range" in kwds:
+            byte_range = kwds["Range"].removeprefix("bytes=")
+            start, _, end = byte_range.partition("-")
+            content = content[int(start) : int(end) + 1 if end else None]
+        return {
+            "Body": _FakeStreamingBody(self.s3, content),
+            "ContentLength": len(content),
+            "ContentEncoding": stored.content_encoding,
+            "ETag": stored.e_tag,
+            "LastModified": stored.last_modified,
+            "ResponseMetadata": {"RetryAttempts": 0, "HTTPStatusCode": 200},
+        }
+
+    def put(self, Body: bytes, **kwds) -> dict:
+        """Uploads the object."""
+        bucket = _FakeBucket(self.s3, self.bucket_name)
+        bucket.put_object(self.key, Body, **kwds)
+        return {"ETag": self.s3.objects[self.bucket_name, self.key].e_tag}
+
+
+@pytest.fixture
+def fake_s3_config() -> FakeS3Config:
+    """Configuration of `fake_s3`. Override to inject latency, bandwidth caps
+    or throttling.
+    """
+    return FakeS3Config()
+
+
+@pytest.fixture
+def fake_s3(monkeypatch: MonkeyPatch, fake_s3_config: FakeS3Config) -> FakeS3:
+    """Replaces boto3 sessions made by `boto3_.bucket.S3Bucket` with a
+    `FakeS3`.
+    """
+    from ..boto3_ import bucket
+
+    s3 = FakeS3(fake_s3_config)
+    monkeypatch.setattr(bucket, "boto3", s3)
+    return s3
+
+
+@pytest.fixture
+def fake_s3_bucket(fake_s3: FakeS3):
+    """An `S3Bucket` named 'test-bucket' backed by `fake_s3`."""
+    from ..boto3_.bucket import S3Bucket
+
+    return S3Bucket("test-bucket")
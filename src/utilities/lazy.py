@@ -0,0 +1,58 @@
+"""
+Deferred imports for heavy third-party packages.
+"""
+import importlib
+import threading
+from types import ModuleType
+
+
+class _DeferredModule:
+    """Stands in for a module until one of its attributes is first accessed,
+    then imports it.
+
+    The import runs under a lock, so threads touching the module for the
+    first time at once wait for a single, complete import. Nothing is put in
+    `sys.modules` until the real import, so other packages checking it never
+    see a partially initialized module.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Records the deferred module's name."""
+        self.__name: str = name
+        self.__module: ModuleType | None = None
+        self.__lock: threading.Lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        """Represents the stand-in without importing the module."""
+        return f"<deferred module '{self.__name}'>"
+
+    def __getattr__(self, attr: str):
+        """Imports the module if needed, then gets its attribute.
+
+        :raises ModuleNotFoundError:    The module is not installed
+        """
+        module = self.__module
+        if module is None:
+            with self.__lock:
+                if self.__module is None:
+                    self.__module = importlib.import_module(self.__name)
+                module = self.__module
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> _DeferredModule:
+    """Imports the module `name` when one of its attributes is first
+    accessed, rather than now.
+
+    :param name:    Name of the module
+    :return:        A stand-in for the module, forwarding attribute access\
+        to it and raising `ModuleNotFoundError` on first use if it is not\
+        installed
+    ## Example
+    ```py
+    pd = lazy_import("pandas")
+    # pandas is imported here
+    pd.DataFrame()
+    ```
+    """
+    return _DeferredModule(name)
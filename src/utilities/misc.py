@@ -3,7 +3,9 @@ Utility methods for uncategorized activities.
 """
 import math
 
-import toml
+from .lazy import lazy_import
+
+toml = lazy_import("toml")
 
 
 def convert_size(size_bytes: int, rounding: int = 2):
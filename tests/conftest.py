@@ -2,3 +2,22 @@
 Configurations.
 
 """
+from pathlib import Path
+
+import pytest
+
+# Imported rather than loaded as a plugin, whose fixtures pytest would only
+# apply under src/pytest_/ as it is a conftest
+from src.pytest_.conftest import (
+    tests_path,
+    with_mock_bucket,
+    with_test_harness,
+)
+
+pytest_plugins = ["src.pytest_.fake_s3"]
+
+
+@pytest.fixture
+def mock_bucket_path(tmp_path: Path) -> Path:
+    """Returns a temporary directory for the mock bucket to write to."""
+    return tmp_path
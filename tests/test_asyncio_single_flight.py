@@ -0,0 +1,146 @@
+"""
+Tests for the src.asyncio_.single_flight module.
+
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures as cf
+import threading
+import time
+
+from src.asyncio_.single_flight import SingleFlight
+from src.boto3_.object_summary import ObjectSummary
+from src.pytest_.fake_s3 import FakeObjectSummary, FakeS3, FakeS3Config
+
+
+def slow_counter(calls: list, result=b"content", error=None):
+    """A function recording its calls, which takes 50ms."""
+
+    def func():
+        """Records the calling thread, then returns or raises."""
+        calls.append(threading.get_ident())
+        time.sleep(0.05)
+        if error is not None:
+            raise error
+        return result
+
+    return func
+
+
+def test_threads_share_one_call():
+    """Tests concurrent threads share one call and its result."""
+    flights = SingleFlight()
+    calls = []
+    func = slow_counter(calls)
+    with cf.ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: flights.do("k", func), range(8)))
+    assert results == [b"content"] * 8
+    assert len(calls) == 1
+    assert len(flights) == 0
+
+    assert flights.do("k", func) == b"content"
+    assert len(calls) == 2
+
+
+def test_threads_share_exception():
+    """Tests concurrent threads get the same exception."""
+    flights = SingleFlight()
+    calls = []
+    error = KeyError("NoSuchKey")
+    func = slow_counter(calls, error=error)
+    with cf.ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flights.do, "k", func) for _ in range(4)]
+    assert all(f.exception() is error for f in futures)
+    assert len(calls) == 1
+
+
+def test_async_and_threads_share_one_call():
+    """Tests coroutines and threads share one call, and cancelling one
+    coroutine leaves the others waiting.
+    """
+    flights = SingleFlight()
+    calls = []
+    func = slow_counter(calls)
+
+    async def main():
+        """Waits on the call from tasks, cancelling one, and a thread."""
+        tasks = [
+            asyncio.create_task(flights.do_async("k", func)) for _ in range(4)
+        ]
+        await asyncio.sleep(0.01)
+        tasks[0].cancel()
+        threaded = asyncio.to_thread(flights.do, "k", func)
+        return await asyncio.gather(*tasks[1:], threaded)
+
+    assert asyncio.run(main()) == [b"content"] * 4
+    assert len(calls) == 1
+
+
+def test_object_summary_coalesces_gets():
+    """Tests identical gets of an object make one request, while different
+    ranges make their own.
+    """
+    s3 = FakeS3(FakeS3Config(latency=0.05))
+    s3.put("b", "reference.csv", b"a,b\n1,2\n")
+    flights = SingleFlight()
+    objects = [
+        ObjectSummary(
+            FakeObjectSummary(s3, "b", "reference.csv"),
+            single_flight=flights,
+        )
+        for _ in range(8)
+    ]
+    with cf.ThreadPoolExecutor(8) as pool:
+        contents = list(pool.map(lambda o: o.get(), objects))
+        ranged = list(pool.map(lambda o: o.get(Range="bytes=0-3"), objects))
+    assert contents == [b"a,b\n1,2\n"] * 8
+    assert ranged == [b"a,b\n"] * 8
+    assert s3.requests["GetObject"] == 2
+
+
+def test_object_summary_get_async_runs_in_executor():
+    """Tests gets awaited without a single flight run in the executor, so
+    they do not block the loop or each other.
+    """
+    s3 = FakeS3(FakeS3Config(latency=0.1))
+    s3.put("b", "reference.csv", b"a,b\n1,2\n")
+    objects = [
+        ObjectSummary(FakeObjectSummary(s3, "b", "reference.csv"))
+        for _ in range(4)
+    ]
+
+    async def main():
+        """Gets every object at once."""
+        return await asyncio.gather(*(o.get_async() for o in objects))
+
+    start = time.monotonic()
+    assert asyncio.run(main()) == [b"a,b\n1,2\n"] * 4
+    assert time.monotonic() - start < 0.3
+    assert s3.requests["GetObject"] == 4
+
+
+def test_object_summary_gets_of_versions_are_apart():
+    """Tests a get of an overwritten object does not join the get in flight
+    for its previous version.
+    """
+    s3 = FakeS3(FakeS3Config(latency=0.05))
+    s3.put("b", "reference.csv", b"old")
+    flights = SingleFlight()
+    old = ObjectSummary(
+        FakeObjectSummary(s3, "b", "reference.csv"), single_flight=flights
+    )
+    # Listed before the overwrite
+    old_e_tag = old.e_tag
+    s3.put("b", "reference.csv", b"new")
+    new = ObjectSummary(
+        FakeObjectSummary(s3, "b", "reference.csv"), single_flight=flights
+    )
+
+    assert new.e_tag != old_e_tag
+    with cf.ThreadPoolExecutor(2) as pool:
+        pending = pool.submit(old.get)
+        time.sleep(0.01)
+        assert new.get() == b"new"
+        pending.result()
+    assert s3.requests["GetObject"] == 2
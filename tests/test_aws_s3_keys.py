@@ -4,6 +4,7 @@ Tests for the src.aws_.s3.keys module.
 """
 from __future__ import annotations
 
+import datetime
 from pathlib import Path
 
 # Pytests
@@ -56,3 +57,149 @@ def test_lenient_validator(
         keys.S3KeyValidator.Level.LENIENT, allow_separator=allow_separator
     )
     assert validator.is_valid(key) == expected
+
+
+@pytest.mark.parametrize(
+    argnames=["key", "expected"],
+    argvalues=[
+        ("key/tab\tseparated", True),
+        ("key/line\nbreak", True),
+        ("key/delete\x7f", True),
+        ("key/caret^", False),
+    ],
+)
+def test_lenient_validator_control_characters(key: str, expected: bool):
+    """Tests the lenient validator accepts ASCII control characters."""
+    validator = keys.S3KeyValidator(keys.S3KeyValidator.Level.LENIENT)
+    assert validator.is_valid(key) == expected
+
+
+def test_validate_many():
+    """Tests `S3KeyValidator.validate_many` and `invalid_mask` agree with
+    `is_valid` for a list of keys.
+    """
+    validator = keys.S3KeyValidator(keys.S3KeyValidator.Level.SAFE)
+    values = ["a/b.csv", "a/b?.csv", Path("a/(b).csv"), "~a"]
+    assert validator.validate_many(values) == [True, False, True, False]
+    assert validator.invalid_mask(values) == [False, True, False, True]
+
+
+def test_allow_separator_recompiles():
+    """Tests changing `allow_separator` updates the safe validator."""
+    validator = keys.S3KeyValidator(keys.S3KeyValidator.Level.SAFE)
+    assert validator.is_valid("a/b")
+    validator.allow_separator = False
+    assert not validator.is_valid("a/b")
+
+
+@pytest.mark.parametrize(
+    argnames=["level", "key", "expected"],
+    argvalues=[
+        ("safe", "key/year=2000/simple?", "key/year_2000/simple_"),
+        ("lenient", "~/key/year=2000/simple^", "_/key/year=2000/simple_"),
+    ],
+)
+def test_sanitize(level: str, key: str, expected: str):
+    """Tests `S3KeyValidator.sanitize` replaces invalid characters."""
+    validator = keys.S3KeyValidator(level)
+    assert validator.sanitize(key) == expected
+    assert validator.is_valid(validator.sanitize(key))
+
+
+def test_sanitize_invalid_replacement():
+    """Tests `S3KeyValidator.sanitize` rejects an invalid replacement."""
+    validator = keys.S3KeyValidator(keys.S3KeyValidator.Level.SAFE)
+    with pytest.raises(ValueError):
+        validator.sanitize("a?", replacement="?")
+
+
+def test_layout_round_trip():
+    """Tests `S3KeyLayout.parse` recovers the values `build` was given."""
+    layout = keys.S3KeyLayout(
+        ["date", "region"], prefix="events", sharding="hash"
+    )
+    values = {"date": "2023-01-01", "region": "us"}
+    key = layout.build(values, "part-0.parquet")
+    assert key == "events/b/date=2023-01-01/region=us/part-0.parquet"
+    assert layout.parse(key) == values
+    assert layout.prefixes(values) == ["events/b/date=2023-01-01/region=us/"]
+    assert len(layout.prefixes({"date": "2023-01-01"})) == 16
+
+
+def test_layout_reversed_timestamp():
+    """Tests `S3KeyLayout` shards by the reversed digits of the epoch."""
+    layout = keys.S3KeyLayout(
+        ["ts", "kind"],
+        sharding=keys.S3KeyLayout.Sharding.REVERSED_TIMESTAMP,
+        shards=3,
+        timestamp="ts",
+    )
+    # 1672531205 reversed
+    key = layout.build({"ts": 1672531205, "kind": "a"}, "x.csv")
+    assert key == "502/ts=1672531205/kind=a/x.csv"
+    assert layout.parse(key) == {"ts": "1672531205", "kind": "a"}
+    assert layout.prefixes({"ts": 1672531205}) == ["502/ts=1672531205/"]
+
+
+def test_layout_reversed_timestamp_naive_datetime_is_utc():
+    """Tests `S3KeyLayout` shards naive datetimes as UTC, whatever the local
+    time zone.
+    """
+    layout = keys.S3KeyLayout(
+        ["ts"], sharding="reversed_timestamp", shards=4, timestamp="ts"
+    )
+    naive = datetime.datetime(2023, 1, 1, 0, 0, 5)
+    aware = naive.replace(tzinfo=datetime.timezone.utc)
+    # 1672531205 reversed
+    assert layout.shard({"ts": naive}) == "5021"
+    assert layout.shard({"ts": aware}) == "5021"
+    assert layout.shard({"ts": naive.isoformat()}) == "5021"
+    assert layout.shard({"ts": aware.date()}) == "0021"
+
+
+@pytest.mark.parametrize(
+    argnames=["shards", "expected"], argvalues=[(None, 2), (10, 10)]
+)
+def test_layout_reversed_timestamp_shards(shards: int | None, expected: int):
+    """Tests `S3KeyLayout` defaults to a listable number of reversed
+    timestamp digits and accepts up to the digits of epoch seconds.
+    """
+    layout = keys.S3KeyLayout(
+        ["ts"], sharding="reversed_timestamp", shards=shards, timestamp="ts"
+    )
+    assert layout.shards == expected
+    assert len(layout.shard({"ts": 1672531205})) == expected
+
+
+def test_layout_reversed_timestamp_too_many_shards():
+    """Tests `S3KeyLayout` rejects more reversed timestamp digits than epoch
+    seconds have.
+    """
+    with pytest.raises(ValueError, match="'shards' must be at most 10"):
+        keys.S3KeyLayout(
+            ["ts"], sharding="reversed_timestamp", shards=16, timestamp="ts"
+        )
+
+
+@pytest.mark.parametrize(
+    argnames=["values", "error"],
+    argvalues=[
+        ({"date": "2023-01-01"}, KeyError),
+        ({"date": "2023/01/01", "region": "us"}, ValueError),
+        ({"date": "2023-01-01", "region": "us^"}, ValueError),
+    ],
+)
+def test_layout_build_invalid(values: dict, error: type):
+    """Tests `S3KeyLayout.build` rejects missing and invalid values."""
+    layout = keys.S3KeyLayout(["date", "region"])
+    with pytest.raises(error):
+        layout.build(values)
+
+
+def test_layout_parse_mismatch():
+    """Tests `S3KeyLayout.parse` rejects keys of another layout."""
+    layout = keys.S3KeyLayout(["date", "region"], prefix="events")
+    with pytest.raises(ValueError):
+        layout.parse("other/date=2023-01-01/region=us/x.csv")
+    with pytest.raises(ValueError):
+        layout.parse("events/region=us/date=2023-01-01/x.csv")
@@ -0,0 +1,99 @@
+"""
+Tests for the src.boto3_.bucket module against an in-process fake S3.
+
+"""
+from __future__ import annotations
+
+import pytest
+
+from src.boto3_.bucket import S3Bucket
+from src.boto3_.changes import ChangeFeedState
+from src.boto3_.instrumentation import RequestMetrics
+from src.pytest_.fake_s3 import FakeS3, FakeS3Config
+
+
+@pytest.fixture
+def populated(fake_s3: FakeS3) -> FakeS3:
+    """Fake S3 with a folder and three files under 'data/'."""
+    fake_s3.put("test-bucket", "data/", b"")
+    for i in range(3):
+        fake_s3.put("test-bucket", f"data/{i}.csv", f"a\n{i}\n".encode())
+    fake_s3.put("test-bucket", "other/x.csv", b"a\n")
+    return fake_s3
+
+
+def test_files_and_folders(populated: FakeS3, fake_s3_bucket: S3Bucket):
+    """Tests `S3Bucket.files` and `folders` split the listing."""
+    assert [o.key for o in fake_s3_bucket.files("data/")] == [
+        "data/0.csv",
+        "data/1.csv",
+        "data/2.csv",
+    ]
+    assert [o.key for o in fake_s3_bucket.folders("data/")] == ["data/"]
+
+
+def test_get_records_metrics(populated: FakeS3, fake_s3_bucket: S3Bucket):
+    """Tests listing and getting through an instrumented bucket."""
+    fake_s3_bucket.metrics = RequestMetrics()
+    contents = [o.get() for o in fake_s3_bucket.files("data/")]
+    assert contents == [b"a\n0\n", b"a\n1\n", b"a\n2\n"]
+
+    snapshot = fake_s3_bucket.metrics.snapshot()
+    assert snapshot["get"]["requests"] == 3
+    assert snapshot["get"]["bytes"] == 12
+    assert snapshot["list"]["requests"] == populated.requests["ListObjects"]
+
+
+@pytest.mark.parametrize("fake_s3_config", [FakeS3Config(throttle_rate=1.0)])
+def test_throttling(populated: FakeS3, fake_s3_bucket: S3Bucket):
+    """Tests the fake raises on throttled requests."""
+    with pytest.raises(Exception, match="SlowDown"):
+        list(fake_s3_bucket.files("data/"))
+
+
+def test_changes_since_append_only(
+    populated: FakeS3, fake_s3_bucket: S3Bucket
+):
+    """Tests an append-only feed yields only keys after the checkpoint."""
+    state = ChangeFeedState("data")
+    assert len(list(fake_s3_bucket.changes_since(state))) == 4
+    assert list(fake_s3_bucket.changes_since(state)) == []
+
+    populated.put("test-bucket", "data/3.csv", b"a\n3\n")
+    state = ChangeFeedState.from_json(state.to_json())
+    assert [o.key for o in fake_s3_bucket.changes_since(state)] == [
+        "data/3.csv"
+    ]
+    assert state.start_after == "data/3.csv"
+
+
+def test_watch_partitions(fake_s3: FakeS3, fake_s3_bucket: S3Bucket):
+    """Tests a partitioned feed finds changed objects in tail partitions
+    without relisting older ones.
+    """
+    for day in range(1, 4):
+        fake_s3.put("test-bucket", f"ev/date={day}/a.csv", b"a")
+    state = ChangeFeedState("ev", partition_depth=1)
+    assert len(list(fake_s3_bucket.watch(state=state, polls=1))) == 3
+    assert list(state.partitions) == ["ev/date=3/"]
+
+    fake_s3.put("test-bucket", "ev/date=1/a.csv", b"old partition")
+    fake_s3.put("test-bucket", "ev/date=3/a.csv", b"changed")
+    fake_s3.put("test-bucket", "ev/date=4/a.csv", b"new")
+    fake_s3.requests.clear()
+    changed = list(fake_s3_bucket.watch(state=state, polls=2, interval=0))
+    assert [o.key for o in changed] == ["ev/date=3/a.csv", "ev/date=4/a.csv"]
+    assert fake_s3.requests["ListObjects"] == 2
+    assert list(state.partitions) == ["ev/date=4/"]
+
+
+def test_prefetch_runs_ahead(populated: FakeS3, fake_s3_bucket: S3Bucket):
+    """Tests prefetching keeps listing order and at most `depth` downloads
+    ahead of the consumer.
+    """
+    keys = []
+    for obj, content in fake_s3_bucket.prefetch("data/", depth=1):
+        keys.append(obj.key)
+        assert content == populated.objects["test-bucket", obj.key].content
+        assert populated.requests["GetObject"] <= len(keys) + 1
+    assert keys == ["data/0.csv", "data/1.csv", "data/2.csv"]
@@ -0,0 +1,127 @@
+"""
+Tests for streaming decompression in the src.boto3_ modules.
+
+"""
+from __future__ import annotations
+
+import gzip
+import time
+
+import pytest
+
+from src.boto3_.compression import (
+    Compression,
+    detect_compression,
+    iter_decompressed,
+)
+from src.boto3_.instrumentation import RequestMetrics
+from src.boto3_.object_summary import ObjectSummary
+from src.pytest_.fake_s3 import FakeObjectSummary, FakeS3
+
+CONTENT = b"a,b\n" + b"1,2\n" * 10_000
+
+
+@pytest.mark.parametrize(
+    "content_encoding, key, head, expected",
+    [
+        ("gzip", "x.csv", b"", Compression.GZIP),
+        ("identity, zstd", "x.csv", b"", Compression.ZSTD),
+        (None, "x.csv.gz", b"", Compression.GZIP),
+        (None, "x.csv.zst", b"", Compression.ZSTD),
+        (None, "x.bin", b"\x1f\x8b\x08", Compression.GZIP),
+        (None, "x.csv", b"a,b", None),
+    ],
+)
+def test_detect_compression(content_encoding, key, head, expected):
+    """Tests detection from the encoding, the suffix and the magic bytes."""
+    assert detect_compression(content_encoding, key, head) is expected
+
+
+def test_iter_decompressed_concatenated_members():
+    """Tests concatenated gzip members split across chunks decompress."""
+    blob = gzip.compress(CONTENT) + gzip.compress(CONTENT)
+    chunks = [blob[i : i + 7] for i in range(0, len(blob), 7)]
+    assert b"".join(iter_decompressed(chunks, "gzip")) == CONTENT * 2
+
+
+@pytest.mark.parametrize("compression", ["gzip", "GZIP", Compression.GZIP])
+def test_iter_decompressed_rejects_truncated(compression):
+    """Tests a stream cut partway through a gzip member raises rather than
+    returning part of the content.
+    """
+    blob = gzip.compress(CONTENT)
+    chunks = [blob[i : i + 64] for i in range(0, len(blob) // 2, 64)]
+    with pytest.raises(EOFError, match="truncated"):
+        b"".join(iter_decompressed(chunks, compression))
+
+
+def test_iter_decompressed_rejects_truncated_member():
+    """Tests a stream cut partway through a later gzip member raises."""
+    blob = gzip.compress(CONTENT)
+    with pytest.raises(EOFError):
+        b"".join(iter_decompressed([blob, blob[:-4]], "gzip"))
+    assert b"".join(iter_decompressed([], "gzip")) == b""
+
+
+@pytest.mark.parametrize(
+    "key, content_encoding",
+    [("data.csv.gz", None), ("data.csv", "gzip"), ("data", None)],
+)
+def test_get_decompresses(key: str, content_encoding: str | None):
+    """Tests `get` and `stream` decompress when asked to."""
+    s3 = FakeS3()
+    s3.put("b", key, gzip.compress(CONTENT), content_encoding)
+    obj = ObjectSummary(FakeObjectSummary(s3, "b", key))
+
+    assert obj.get(decompress="auto") == CONTENT
+    assert obj.get(decompress="Auto") == CONTENT
+    assert b"".join(obj.stream(1024, decompress="gzip")) == CONTENT
+    assert obj.get() == gzip.compress(CONTENT)
+
+
+def test_get_auto_leaves_uncompressed():
+    """Tests "auto" passes uncompressed objects through."""
+    s3 = FakeS3()
+    s3.put("b", "data.csv", CONTENT)
+    obj = ObjectSummary(FakeObjectSummary(s3, "b", "data.csv"))
+    assert obj.get(decompress=True) == CONTENT
+
+
+def test_iter_decompressed_zstd():
+    """Tests zstd frames decompress incrementally."""
+    zstandard = pytest.importorskip("zstandard")
+    blob = zstandard.ZstdCompressor().compress(CONTENT)
+    chunks = [blob[i : i + 64] for i in range(0, len(blob), 64)]
+    assert b"".join(iter_decompressed(chunks, Compression.ZSTD)) == CONTENT
+
+
+def test_stream_closed_early_is_not_an_error():
+    """Tests a stream closed by its consumer before the end is measured as a
+    successful request, excluding the consumer's time, and closes the
+    response's body.
+    """
+    s3 = FakeS3()
+    s3.put("b", "data.csv", CONTENT)
+    fake = FakeObjectSummary(s3, "b", "data.csv")
+    responses = []
+    get = fake.get
+
+    def capture(**kwds) -> dict:
+        """Gets the object, keeping the response."""
+        responses.append(get(**kwds))
+        return responses[-1]
+
+    fake.get = capture
+    metrics = RequestMetrics()
+    stream = ObjectSummary(fake, metrics=metrics).stream(16)
+
+    assert next(stream) == CONTENT[:16]
+    time.sleep(0.1)
+    stream.close()
+
+    snapshot = metrics.snapshot()["get"]
+    assert snapshot["requests"] == 1
+    assert snapshot["errors"] == 0
+    assert snapshot["bytes"] == 16
+    assert snapshot["latency"]["max"] < 0.1
+    assert responses[0]["Body"].closed
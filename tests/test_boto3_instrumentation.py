@@ -0,0 +1,65 @@
+"""
+Tests for the src.boto3_.instrumentation module.
+
+"""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src.boto3_ import instrumentation
+
+
+def test_latency_histogram_quantiles():
+    """Tests `LatencyHistogram` estimates quantiles by bucket bound."""
+    histogram = instrumentation.LatencyHistogram()
+    for _ in range(99):
+        histogram.record(0.003)
+    histogram.record(0.8)
+    assert histogram.quantile(0.5) == 0.005
+    assert histogram.quantile(0.99) == 0.005
+    assert histogram.quantile(1.0) == 0.8
+    assert histogram.snapshot()["count"] == 100
+
+
+def test_request_metrics_measure():
+    """Tests `RequestMetrics.measure` records bytes, retries and errors."""
+    metrics = instrumentation.RequestMetrics()
+    with metrics.measure("get") as measurement:
+        measurement.bytes = 10
+        measurement.retries = 1
+    with pytest.raises(KeyError):
+        with metrics.measure("get"):
+            raise KeyError("missing")
+
+    snapshot = json.loads(metrics.to_json())
+    assert snapshot["get"]["requests"] == 2
+    assert snapshot["get"]["errors"] == 1
+    assert snapshot["get"]["retries"] == 1
+    assert snapshot["get"]["bytes"] == 10
+
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+
+def test_request_metrics_measure_each():
+    """Tests `RequestMetrics.measure_each` counts a request per item, not
+    the fetch finding the iterable exhausted, and counts errors.
+    """
+
+    def pages():
+        """Yields two pages then fails."""
+        yield [1, 2]
+        yield [3]
+        raise KeyError("throttled")
+
+    metrics = instrumentation.RequestMetrics()
+    assert list(metrics.measure_each("list", [[1], [2]])) == [[1], [2]]
+    assert metrics.snapshot()["list"]["requests"] == 2
+
+    with pytest.raises(KeyError):
+        list(metrics.measure_each("list", pages()))
+    snapshot = metrics.snapshot()["list"]
+    assert snapshot["requests"] == 5
+    assert snapshot["errors"] == 1
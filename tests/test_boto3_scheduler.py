@@ -0,0 +1,142 @@
+"""
+Tests for the src.boto3_.scheduler module against an in-process fake S3.
+
+"""
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from src.boto3_.bucket import S3Bucket
+from src.boto3_.scheduler import DownloadScheduler
+from src.pytest_.fake_s3 import FakeS3
+
+SIZES = [10, 10, 100, 10, 20]
+
+
+@pytest.fixture
+def sized(fake_s3: FakeS3) -> FakeS3:
+    """Fake S3 with objects of `SIZES` bytes under 'data/'."""
+    for i, size in enumerate(SIZES):
+        fake_s3.put("test-bucket", f"data/{i}.bin", bytes([i]) * size)
+    return fake_s3
+
+
+def test_download_spills_large_objects(
+    sized: FakeS3, fake_s3_bucket: S3Bucket, tmp_path: Path
+):
+    """Tests objects over the budget are streamed to disk, in order."""
+    scheduler = DownloadScheduler(25, workers=4, spill_directory=tmp_path)
+    results = list(scheduler.download(fake_s3_bucket.files("data/")))
+
+    assert [obj.key for obj, _ in results] == [
+        f"data/{i}.bin" for i in range(len(SIZES))
+    ]
+    spilled = results[2][1]
+    assert isinstance(spilled, Path)
+    assert spilled.read_bytes() == bytes([2]) * 100
+    assert spilled == tmp_path / "test-bucket" / "data" / "2.bin"
+    assert [c for _, c in results if not isinstance(c, Path)] == [
+        bytes([i]) * size for i, size in enumerate(SIZES) if i != 2
+    ]
+
+
+@pytest.mark.parametrize(argnames="consumed", argvalues=[1, len(SIZES)])
+def test_download_removes_temporary_spill_directory(
+    sized: FakeS3,
+    fake_s3_bucket: S3Bucket,
+    tmp_path: Path,
+    monkeypatch: MonkeyPatch,
+    consumed: int,
+):
+    """Tests a spill directory the scheduler created is removed once the
+    download finishes or is closed, and the scheduler's own setting is left
+    unset.
+    """
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    scheduler = DownloadScheduler(25, workers=4)
+    downloads = scheduler.download(fake_s3_bucket.files("data/"))
+
+    results = [next(downloads) for _ in range(consumed)]
+    assert len(list(tmp_path.iterdir())) == 1
+    downloads.close()
+
+    assert list(tmp_path.iterdir()) == []
+    assert scheduler.spill_directory is None
+    if consumed == len(SIZES):
+        assert isinstance(results[2][1], Path)
+
+
+def test_prefetch_leaves_no_spill_directories(
+    sized: FakeS3,
+    fake_s3_bucket: S3Bucket,
+    tmp_path: Path,
+    monkeypatch: MonkeyPatch,
+):
+    """Tests repeated prefetches each remove the directory they spill to."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    for _ in range(3):
+        for _, content in fake_s3_bucket.prefetch("data/", max_bytes=25):
+            if isinstance(content, Path):
+                assert content.read_bytes() == bytes([2]) * 100
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_download_stays_within_budget(
+    sized: FakeS3, fake_s3_bucket: S3Bucket, tmp_path: Path
+):
+    """Tests bytes downloaded but not consumed never exceed the budget."""
+    scheduler = DownloadScheduler(30, workers=4, spill_directory=tmp_path)
+    outstanding = {}
+    peaks = []
+    fetch = scheduler.fetch
+
+    def tracked(obj, *args):
+        """Records the budget taken before fetching `obj`."""
+        outstanding[obj.key] = scheduler.cost(obj)
+        peaks.append(sum(outstanding.values()))
+        return fetch(obj, *args)
+
+    scheduler.fetch = tracked
+    for obj, _ in scheduler.download(
+        fake_s3_bucket.files("data/"), ordered=False
+    ):
+        del outstanding[obj.key]
+    assert not outstanding
+    assert len(peaks) == len(SIZES)
+    assert max(peaks) <= scheduler.max_bytes
+
+
+@pytest.mark.parametrize(
+    argnames="key",
+    argvalues=["../escaped.bin", "data/../../escaped.bin", "/etc/escaped.bin"],
+)
+def test_download_rejects_keys_escaping_spill_directory(
+    fake_s3: FakeS3, fake_s3_bucket: S3Bucket, tmp_path: Path, key: str
+):
+    """Tests keys that would be spilled outside the spill directory are
+    rejected rather than written.
+    """
+    fake_s3.put("test-bucket", key, b"x" * 100)
+    spill_directory = tmp_path / "spill"
+    scheduler = DownloadScheduler(25, spill_directory=spill_directory)
+
+    with pytest.raises(ValueError, match="must stay under"):
+        list(scheduler.download(fake_s3_bucket.files()))
+    assert [p.name for p in tmp_path.rglob("*.bin")] == []
+
+
+def test_download_normalises_spill_path(
+    fake_s3: FakeS3, fake_s3_bucket: S3Bucket, tmp_path: Path
+):
+    """Tests '..' segments staying in the bucket's folder are normalised."""
+    fake_s3.put("test-bucket", "data/tmp/../1.bin", b"x" * 100)
+    scheduler = DownloadScheduler(25, spill_directory=tmp_path)
+
+    ((_, spilled),) = scheduler.download(fake_s3_bucket.files())
+
+    assert spilled == tmp_path / "test-bucket" / "data" / "1.bin"
+    assert spilled.read_bytes() == b"x" * 100
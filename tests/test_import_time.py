@@ -0,0 +1,66 @@
+"""
+Tests that lightweight modules do not import heavy third-party packages.
+
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import pytest
+
+HEAVY = ("boto3", "pandas", "polars", "prefect", "prefect_aws", "psutil")
+
+
+@pytest.mark.parametrize(
+    argnames=["module"],
+    argvalues=[
+        ("src.aws_.s3.keys",),
+        ("src.asyncio_.throttler",),
+        ("src.boto3_.object_summary",),
+        ("src.logging_.reporting",),
+        ("src.pandas_.io_",),
+        ("src.prefect_.cache",),
+        ("src.prefect_.loggers",),
+        ("src.prefect_.storage",),
+        ("src.utilities.misc",),
+    ],
+)
+def test_import_is_lazy(module: str):
+    """Tests importing `module` in a fresh interpreter leaves the heavy
+    packages unexecuted.
+    """
+    # `_DeferredModule` stand-ins are never put in sys.modules, so any heavy
+    # package there has been imported
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    process = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True
+    )
+    assert process.returncode == 0, process.stderr
+    assert process.stdout.strip() == ""
+
+
+def test_lazy_import_concurrent_first_use():
+    """Tests threads using a deferred module for the first time at once all
+    see the fully imported module.
+    """
+    pytest.importorskip("pandas")
+    code = """
+import concurrent.futures as cf, sys, threading
+from src.pandas_ import io_
+barrier = threading.Barrier(8)
+def touch(_):
+    barrier.wait()
+    return io_.pd.DataFrame({"a": [1]}).shape
+with cf.ThreadPoolExecutor(8) as pool:
+    assert set(pool.map(touch, range(8))) == {(1, 1)}
+assert type(io_.pd).__name__ == "_DeferredModule"
+assert type(sys.modules["pandas"]).__name__ == "module"
+"""
+    process = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True
+    )
+    assert process.returncode == 0, process.stderr
@@ -0,0 +1,69 @@
+"""
+Tests for the src.logging_.reporting module.
+
+"""
+from __future__ import annotations
+
+import asyncio
+import csv
+import logging
+import time
+from pathlib import Path
+
+import pytest
+
+from src.logging_ import reporting
+
+
+def test_resource_sampler_samples_until_stopped(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+):
+    """Tests `ResourceSampler` samples in the background, then reports and
+    writes the timeline.
+    """
+    path = tmp_path / "resources.csv"
+    logger = logging.getLogger("test-resource-sampler")
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        with reporting.ResourceSampler(
+            interval=0.01, logger=logger, timeline_path=path
+        ) as sampler:
+            time.sleep(0.1)
+
+    summary = sampler.summary()
+    assert summary["samples"] >= 3
+    assert summary["peak_process_rss"] >= summary["mean_process_rss"] > 0
+    assert "Resource usage over" in caplog.text
+    with open(path, newline="") as fo:
+        rows = list(csv.reader(fo))
+    assert rows[0][:2] == ["seconds", "process_rss"]
+    assert len(rows) == summary["samples"] + 1
+
+
+def test_resource_sampler_decorates_functions(
+    caplog: pytest.LogCaptureFixture,
+):
+    """Tests `ResourceSampler` samples each call of decorated functions and
+    coroutine functions.
+    """
+    logger = logging.getLogger("test-resource-sampler")
+    sampler = reporting.ResourceSampler(interval=0.01, logger=logger)
+
+    @sampler
+    def double(x: int) -> int:
+        """Doubles `x`."""
+        return x * 2
+
+    @sampler
+    async def double_async(x: int) -> int:
+        """Doubles `x` after yielding to the loop."""
+        await asyncio.sleep(0.02)
+        return x * 2
+
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        assert double(2) == 4
+        assert asyncio.run(double_async(3)) == 6
+
+    assert asyncio.iscoroutinefunction(double_async)
+    assert caplog.text.count("Resource usage over") == 2
+    # Each call samples with its own sampler
+    assert not sampler.samples
@@ -42,3 +42,18 @@ def test_dataframe_to_text_csv_tsv():
         df, method=io_.PandasIOMethod.CSV, write_options={"sep": "\t"}
     )
     assert result == b"\ta\tb\tc\n0\t1\t2\t3\n1\t4\t5\t6\n"
+
+
+@pytest.mark.parametrize(
+    argnames=["method", "read", "write"],
+    argvalues=[
+        (io_.PandasIOMethod.CSV, pd.read_csv, pd.DataFrame.to_csv),
+        (io_.PandasIOMethod.PARQUET, pd.read_parquet, pd.DataFrame.to_parquet),
+    ],
+)
+def test_pandas_io_method_value(method: io_.PandasIOMethod, read, write):
+    """Tests `PandasIOMethod` values are still the read and write methods."""
+    assert method.value == (read, write)
+    assert method.read is read
+    assert method.write is write
+    assert io_.PandasIOMethod[method.name] is method
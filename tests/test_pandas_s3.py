@@ -0,0 +1,122 @@
+"""
+Tests for the src.pandas_.s3 module against an in-process fake S3.
+
+"""
+from __future__ import annotations
+
+import concurrent.futures as cf
+import logging
+
+import pandas as pd
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from src.boto3_.bucket import S3Bucket
+from src.boto3_.object_summary import ObjectSummary
+from src.pandas_ import s3
+from src.pytest_.fake_s3 import FakeS3, FakeS3Config
+
+SIZES = [2, 40, 3, 25, 1, 5]
+
+
+@pytest.fixture
+def csvs(fake_s3: FakeS3) -> FakeS3:
+    """Fake S3 with CSVs of `SIZES` rows under 'data/'."""
+    for i, rows in enumerate(SIZES):
+        content = "a,b\n" + f"{i},{i}\n" * rows
+        fake_s3.put("test-bucket", f"data/{i}.csv", content.encode())
+    return fake_s3
+
+
+@pytest.mark.parametrize("parse_workers", [0, 1])
+def test_iter_dataframes_keeps_order(
+    csvs: FakeS3, fake_s3_bucket: S3Bucket, parse_workers: int
+):
+    """Tests frames are yielded in listing order, whether parsed in threads
+    or processes.
+    """
+    results = list(
+        s3.iter_dataframes(
+            fake_s3_bucket, "data/", parse_workers=parse_workers
+        )
+    )
+    assert [obj.key for obj, _ in results] == [
+        f"data/{i}.csv" for i in range(len(SIZES))
+    ]
+    assert [len(df) for _, df in results] == SIZES
+    assert [df["a"].iloc[0] for _, df in results] == list(range(len(SIZES)))
+
+
+def test_iter_dataframes_parses_inline_without_a_pool(
+    csvs: FakeS3, fake_s3_bucket: S3Bucket, monkeypatch: MonkeyPatch
+):
+    """Tests `parse_workers=0` creates no executor besides the download
+    threads.
+    """
+    created = []
+
+    class Tracked(cf.ThreadPoolExecutor):
+        """Records each executor created."""
+
+        def __init__(self, *args, **kwds) -> None:
+            created.append(self)
+            super().__init__(*args, **kwds)
+
+    monkeypatch.setattr(cf, "ThreadPoolExecutor", Tracked)
+
+    list(s3.iter_dataframes(fake_s3_bucket, "data/", parse_workers=0))
+
+    assert len(created) == 1
+
+
+def test_iter_dataframes_bytes_in_flight(
+    csvs: FakeS3, fake_s3_bucket: S3Bucket, monkeypatch: MonkeyPatch
+):
+    """Tests the listed size of objects downloaded but not yet yielded stays
+    within `max_bytes_in_flight`.
+    """
+    outstanding = {}
+    peaks = []
+    get = ObjectSummary.get
+
+    def tracked(self: ObjectSummary, **kwds) -> bytes:
+        """Records the object as in flight before getting it."""
+        outstanding[self.key] = self.size
+        peaks.append(sum(outstanding.values()))
+        return get(self, **kwds)
+
+    monkeypatch.setattr(ObjectSummary, "get", tracked)
+    limit = max(o.size for o in fake_s3_bucket.files("data/")) + 8
+    for obj, _ in s3.iter_dataframes(
+        fake_s3_bucket, "data/", parse_workers=0, max_bytes_in_flight=limit
+    ):
+        del outstanding[obj.key]
+    assert len(peaks) == len(SIZES)
+    assert max(peaks) <= limit
+
+
+@pytest.mark.parametrize("fake_s3_config", [FakeS3Config(latency=0.02)])
+def test_iter_dataframes_early_close(
+    fake_s3: FakeS3, fake_s3_bucket: S3Bucket, caplog: pytest.LogCaptureFixture
+):
+    """Tests stopping early cancels the remaining downloads without errors
+    from the chained callbacks.
+    """
+    for i in range(20):
+        fake_s3.put("test-bucket", f"data/{i:02d}.csv", b"a\n1\n")
+    frames = s3.iter_dataframes(
+        fake_s3_bucket, "data/", download_workers=2, parse_workers=0
+    )
+    with caplog.at_level(logging.ERROR):
+        next(frames)
+        frames.close()
+    assert fake_s3.requests["GetObject"] < 10
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+
+
+def test_read_dataframes(csvs: FakeS3, fake_s3_bucket: S3Bucket):
+    """Tests `read_dataframes` concatenates every object's rows."""
+    df = s3.read_dataframes(fake_s3_bucket, "data/", parse_workers=0)
+    assert isinstance(df, pd.DataFrame)
+    assert len(df) == sum(SIZES)
+    assert list(df.index) == list(range(sum(SIZES)))
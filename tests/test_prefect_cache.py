@@ -0,0 +1,65 @@
+"""
+Tests for the src.prefect_.cache module.
+
+"""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from src.prefect_ import cache
+
+
+def test_memory_cache_evicts_least_recently_used():
+    """Tests `MemoryCache` keeps within its budget by evicting the least
+    recently used values.
+    """
+    c = cache.MemoryCache(max_bytes=10)
+    c.put("a", b"aaaa")
+    c.put("b", b"bbbb")
+    assert c.get("a") == b"aaaa"
+    c.put("c", b"cccc")
+    assert c.get("b") is None
+    assert c.get("a") == b"aaaa"
+    assert c.get("c") == b"cccc"
+    assert c.stats.bytes == 8
+    assert c.stats.evictions == 1
+
+
+def test_memory_cache_expires():
+    """Tests `MemoryCache` misses values older than its TTL."""
+    c = cache.MemoryCache(max_bytes=10, ttl=0.01)
+    c.put("a", b"a")
+    time.sleep(0.02)
+    assert c.get("a") is None
+    assert c.stats.expirations == 1
+    assert c.stats.entries == 0
+
+
+def test_disk_cache_adopts_directory(tmp_path: Path):
+    """Tests `DiskCache` reads values written by an earlier instance."""
+    cache.DiskCache(tmp_path, max_bytes=100).put("a", b"aaaa")
+    c = cache.DiskCache(tmp_path, max_bytes=100)
+    assert c.get("a") == b"aaaa"
+    assert c.stats.entries == 1
+
+
+def test_disk_cache_evicts(tmp_path: Path):
+    """Tests `DiskCache` removes evicted files."""
+    c = cache.DiskCache(tmp_path, max_bytes=6)
+    c.put("a", b"aaaa")
+    c.put("b", b"bbbb")
+    assert c.get("a") is None
+    assert c.get("b") == b"bbbb"
+    assert len(list(tmp_path.glob("*.bin"))) == 1
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path: Path):
+    """Tests `TieredCache` copies values found on disk into memory."""
+    memory = cache.MemoryCache(max_bytes=100)
+    disk = cache.DiskCache(tmp_path, max_bytes=100)
+    disk.put("a", b"aaaa")
+    c = cache.TieredCache(memory, disk)
+    assert c.get("a") == b"aaaa"
+    assert memory.get("a") == b"aaaa"
+    assert c.stats()["disk"]["hits"] == 1
@@ -0,0 +1,262 @@
+"""
+Tests for the src.prefect_.filesystems module.
+
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures as cf
+import time
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from prefect import flow, task
+from prefect.blocks.core import Block
+from prefect.client.orchestration import get_client
+from prefect.filesystems import GCS, S3, LocalFileSystem, RemoteFileSystem
+from prefect.serializers import PickleSerializer
+
+from src.prefect_ import filesystems
+from src.prefect_ import storage as blocks
+from src.prefect_.filesystems import (
+    CachedFileSystem,
+    ContentAddressedFileSystem,
+    WriteBehindFileSystem,
+    flushes_write_behind,
+)
+
+
+def load_storage(state) -> Block:
+    """Loads the storage block the result of `state` was saved with."""
+
+    async def load() -> Block:
+        """Reads the block document from the API."""
+        async with get_client() as client:
+            document = await client.read_block_document(
+                state.data.storage_block_id
+            )
+        return Block._from_block_document(document)
+
+    return asyncio.run(load())
+
+
+def read_persisted(state) -> object:
+    """Reads the result of `state` through its saved storage block, rather
+    than the copy Prefect keeps in memory.
+    """
+    return type(state.data).parse_obj(state.data.dict()).get()
+
+
+def test_deduplicated_task_results_round_trip(mock_bucket_path: Path):
+    """Tests results of a deduplicated task are saved with their storage
+    block, stored once and read back through the block.
+    """
+
+    @blocks.task_persistence_subfolder(blocks.persistence, deduplicate=True)
+    @task(persist_result=True, result_serializer=PickleSerializer())
+    def repeat(n: int) -> list:
+        """Returns a list that is the same for every call with `n`."""
+        return list(range(n))
+
+    @flow
+    def pipeline() -> list:
+        """Calls the task twice with the same input."""
+        return [repeat(100, return_state=True) for _ in range(2)]
+
+    states = pipeline()
+
+    storage = load_storage(states[0])
+    assert isinstance(storage, ContentAddressedFileSystem)
+    assert [read_persisted(s) for s in states] == [list(range(100))] * 2
+    # Loads the storage referred to by id
+    storage.read_path(states[0].data.storage_key)
+    assert isinstance(storage.storage, LocalFileSystem)
+    objects = mock_bucket_path / "persistence" / "repeat" / "objects"
+    assert len([p for p in objects.rglob("*") if p.suffix == ".ok"]) == 1
+
+
+def test_cached_task_results_round_trip(mock_bucket_path: Path):
+    """Tests results of a cached task are saved with their storage block,
+    uploaded and served from the cache when read back through the block.
+    """
+
+    @blocks.task_persistence_subfolder(
+        blocks.persistence, deduplicate=True, cache=True
+    )
+    @task(persist_result=True, result_serializer=PickleSerializer())
+    def produce() -> dict:
+        """Returns a small result."""
+        return {"a": 1}
+
+    @flow
+    def pipeline():
+        """Calls the task once."""
+        return produce(return_state=True)
+
+    state = pipeline()
+
+    storage = load_storage(state)
+    assert isinstance(storage, CachedFileSystem)
+    hits = storage.cache_stats()["memory"]["hits"]
+    assert read_persisted(state) == {"a": 1}
+    assert storage.cache_stats()["memory"]["hits"] == hits + 1
+    # Loads the storage referred to by id
+    storage.read_path(state.data.storage_key)
+    assert isinstance(storage.storage, ContentAddressedFileSystem)
+    assert isinstance(storage.storage.storage, LocalFileSystem)
+    assert (mock_bucket_path / "persistence" / "produce").is_dir()
+
+
+def test_content_addressed_file_system_keeps_storage_type():
+    """Tests remote storage is neither coerced into another block type when
+    wrapped nor when the wrapper is saved and loaded back.
+    """
+    for storage in (
+        S3(bucket_path="bucket/folder"),
+        GCS(bucket_path="bucket/folder"),
+    ):
+        fs = ContentAddressedFileSystem(storage=storage)
+        assert type(fs.storage) is type(storage)
+
+    remote = RemoteFileSystem(basepath="memory://deduplicated")
+    fs = ContentAddressedFileSystem(storage=remote)
+    fs.write_path("a", b"content")
+    fs.save("test-deduplicated-remote", overwrite=True)
+
+    loaded = ContentAddressedFileSystem.load("test-deduplicated-remote")
+    assert loaded.read_path("a") == b"content"
+    assert type(loaded.storage) is RemoteFileSystem
+    assert loaded.storage.basepath == "memory://deduplicated"
+
+
+def test_cached_file_system_keys_wrapped_storage_apart(tmp_path: Path):
+    """Tests caches of a storage and of a wrapper around it do not share
+    entries, as the wrapper stores different bytes at the same path.
+    """
+    fs = LocalFileSystem(basepath=str(tmp_path))
+    deduplicated = CachedFileSystem(
+        storage=ContentAddressedFileSystem(storage=fs)
+    )
+    direct = CachedFileSystem(storage=fs)
+
+    deduplicated.write_path("a", b"content")
+
+    assert deduplicated.read_path("a") == b"content"
+    assert direct.read_path("a").startswith(
+        ContentAddressedFileSystem.POINTER_PREFIX
+    )
+
+
+def test_written_behind_task_results_round_trip(mock_bucket_path: Path):
+    """Tests results written behind through every wrapper are saved with
+    their storage block and uploaded by the time the flow returns.
+    """
+
+    @blocks.task_persistence_subfolder(
+        blocks.persistence, deduplicate=True, write_behind=True, cache=True
+    )
+    @task(persist_result=True, result_serializer=PickleSerializer())
+    def produce() -> dict:
+        """Returns a small result."""
+        return {"a": 1}
+
+    @flow
+    @flushes_write_behind
+    def pipeline():
+        """Calls the task once."""
+        return produce(return_state=True)
+
+    state = pipeline()
+
+    assert read_persisted(state) == {"a": 1}
+    storage = load_storage(state)
+    storage.read_path(state.data.storage_key)
+    assert isinstance(storage, CachedFileSystem)
+    assert isinstance(storage.storage, WriteBehindFileSystem)
+    assert isinstance(storage.storage.storage, ContentAddressedFileSystem)
+    assert (
+        mock_bucket_path / "persistence" / "produce" / state.data.storage_key
+    ).is_file()
+
+
+def test_flush_write_behind_applies_timeout_in_total(
+    monkeypatch: MonkeyPatch,
+):
+    """Tests the flush timeout bounds the wait across every uploader rather
+    than each one.
+    """
+    uploaders = {}
+    for location in ("a", "b", "c"):
+        uploader = filesystems._Uploader(max_pending=1, workers=1)
+        # Never finishes
+        uploader.futures.add(cf.Future())
+        uploaders[location] = uploader
+    monkeypatch.setattr(filesystems, "_uploaders", uploaders)
+
+    start = time.monotonic()
+    filesystems.flush_write_behind(timeout=0.2)
+
+    assert time.monotonic() - start < 0.4
+
+
+def test_write_behind_uploaders_follow_their_settings(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    """Tests blocks writing behind to one storage with different settings
+    get uploaders sized by their own settings, and read each other's
+    pending writes.
+    """
+    monkeypatch.setattr(filesystems, "_uploaders", {})
+    fs = LocalFileSystem(basepath=str(tmp_path))
+    small = WriteBehindFileSystem(storage=fs, max_pending=1, workers=1)
+    large = WriteBehindFileSystem(storage=fs, max_pending=8, workers=2)
+
+    assert small.uploader is not large.uploader
+    assert small.uploader.pool._max_workers == 1
+    assert large.uploader.pool._max_workers == 2
+    assert (
+        large.uploader
+        is WriteBehindFileSystem(storage=fs, max_pending=8, workers=2).uploader
+    )
+
+    small.uploader.pending["a"] = b"pending"
+    assert large.read_path("a") == b"pending"
+
+
+def test_flushes_write_behind_keeps_the_raised_error(
+    monkeypatch: MonkeyPatch,
+):
+    """Tests a failed flush after the function raised does not replace its
+    exception, and is noted on it.
+    """
+    uploader = filesystems._Uploader(max_pending=1, workers=1)
+    uploader.failures.append(("a", OSError("upload failed")))
+    monkeypatch.setattr(filesystems, "_uploaders", {("a", 1, 1): uploader})
+
+    @flushes_write_behind
+    def fails():
+        """Raises before returning."""
+        raise ValueError("flow failed")
+
+    with pytest.raises(ValueError, match="flow failed") as info:
+        fails()
+
+    assert "upload failed" in "".join(info.value.__notes__)
+
+
+def test_flushes_write_behind_raises_upload_failures(
+    monkeypatch: MonkeyPatch,
+):
+    """Tests a failed flush is raised when the async function returned."""
+    uploader = filesystems._Uploader(max_pending=1, workers=1)
+    uploader.failures.append(("a", OSError("upload failed")))
+    monkeypatch.setattr(filesystems, "_uploaders", {("a", 1, 1): uploader})
+
+    @flushes_write_behind
+    async def succeeds():
+        """Returns immediately."""
+        return 1
+
+    with pytest.raises(filesystems.WriteBehindError, match="upload failed"):
+        asyncio.run(succeeds())
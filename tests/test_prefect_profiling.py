@@ -0,0 +1,153 @@
+"""
+Tests for the src.prefect_.profiling module.
+
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures as cf
+import logging
+import pstats
+import time
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from prefect.filesystems import LocalFileSystem
+
+from src.prefect_ import profiling
+
+ARTEFACTS = {"profile.pstats", "profile.txt", "allocations.txt", "threads.txt"}
+
+
+@pytest.fixture
+def bucket(tmp_path: Path) -> LocalFileSystem:
+    """A bucket in a temporary directory to upload profiles to."""
+    return LocalFileSystem(basepath=str(tmp_path))
+
+
+def spin(seconds: float) -> int:
+    """Keeps the thread busy for `seconds`."""
+    end, n = time.monotonic() + seconds, 0
+    while time.monotonic() < end:
+        n += 1
+    return n
+
+
+def uploads(tmp_path: Path, name: str) -> list[Path]:
+    """Folders of the profiles uploaded for `name`."""
+    return sorted((tmp_path / "profiles" / name).glob("*"))
+
+
+def test_profiler_disabled_by_default(
+    monkeypatch: MonkeyPatch, bucket: LocalFileSystem, tmp_path: Path
+):
+    """Tests `Profiler` neither wraps nor profiles unless `PROFILE_RUNS` is
+    set.
+    """
+    monkeypatch.delenv(profiling.ENVIRONMENT_VARIABLE, raising=False)
+
+    def work() -> int:
+        """Does a little work."""
+        return spin(0.01)
+
+    assert profiling.Profiler(bucket)(work) is work
+    with profiling.Profiler(bucket, "block"):
+        work()
+    assert not any(tmp_path.iterdir())
+
+
+def test_profiler_uploads_artefacts(
+    monkeypatch: MonkeyPatch, bucket: LocalFileSystem, tmp_path: Path
+):
+    """Tests `Profiler` uploads the profile of each call, including the
+    stacks of executor threads.
+    """
+    monkeypatch.setenv(profiling.ENVIRONMENT_VARIABLE, "1")
+
+    @profiling.Profiler(bucket, interval=0.005)
+    def work() -> int:
+        """Spins in an executor thread."""
+        with cf.ThreadPoolExecutor(thread_name_prefix="worker") as pool:
+            return pool.submit(spin, 0.2).result()
+
+    assert work() > 0
+
+    (folder,) = uploads(tmp_path, "work")
+    assert {p.name for p in folder.iterdir()} == ARTEFACTS
+    assert pstats.Stats(str(folder / "profile.pstats")).total_calls > 0
+    threads = (folder / "threads.txt").read_text()
+    assert any(
+        line.startswith("worker") and "spin" in line
+        for line in threads.splitlines()
+    )
+
+
+def test_profiler_profiles_coroutine_functions(
+    monkeypatch: MonkeyPatch, bucket: LocalFileSystem, tmp_path: Path
+):
+    """Tests `Profiler` profiles coroutine functions while awaited and
+    uploads once they finish.
+    """
+    monkeypatch.setenv(profiling.ENVIRONMENT_VARIABLE, "true")
+
+    @profiling.Profiler(bucket)
+    async def work() -> int:
+        """Spins in the loop's executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, spin, 0.05)
+
+    assert asyncio.iscoroutinefunction(work)
+    assert asyncio.run(work()) > 0
+
+    (folder,) = uploads(tmp_path, "work")
+    assert {p.name for p in folder.iterdir()} == ARTEFACTS
+    assert "work" in (folder / "profile.txt").read_text()
+
+
+def test_profiler_uploads_from_async_code(
+    monkeypatch: MonkeyPatch, bucket: LocalFileSystem, tmp_path: Path
+):
+    """Tests `Profiler` uploads when used with `with` and `async with` on an
+    event loop, where storage blocks return coroutines.
+    """
+    monkeypatch.setenv(profiling.ENVIRONMENT_VARIABLE, "1")
+
+    async def main():
+        """Profiles a block each way."""
+        with profiling.Profiler(bucket, "sync"):
+            spin(0.01)
+        async with profiling.Profiler(bucket, "async"):
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+
+    for name in ("sync", "async"):
+        (folder,) = uploads(tmp_path, name)
+        assert {p.name for p in folder.iterdir()} == ARTEFACTS
+
+
+def test_profiler_logs_failed_upload(
+    monkeypatch: MonkeyPatch,
+    bucket: LocalFileSystem,
+    caplog: pytest.LogCaptureFixture,
+):
+    """Tests `Profiler` warns rather than reporting an upload that failed."""
+    monkeypatch.setenv(profiling.ENVIRONMENT_VARIABLE, "1")
+
+    async def fail(*args, **kwds):
+        """Fails to write."""
+        raise OSError("Disk full")
+
+    monkeypatch.setattr(LocalFileSystem, "write_path", fail)
+
+    async def main():
+        """Profiles a block."""
+        async with profiling.Profiler(bucket, "failing"):
+            spin(0.01)
+
+    with caplog.at_level(logging.INFO):
+        asyncio.run(main())
+
+    assert "Could not upload profile of 'failing'" in caplog.text
+    assert "Uploaded" not in caplog.text
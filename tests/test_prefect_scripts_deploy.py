@@ -0,0 +1,165 @@
+"""
+Tests for the src.prefect_.scripts.deploy module.
+
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+import yaml
+from _pytest.monkeypatch import MonkeyPatch
+from click.testing import CliRunner
+
+from src.prefect_.scripts import deploy
+
+
+class FakeBlock:
+    """Stands in for the GitHubRepository and ECSTask Blocks."""
+
+    def __init__(self, name: str) -> None:
+        """Names the block."""
+        self._block_document_name = name
+        self.env = {}
+
+    @classmethod
+    async def load(cls, name: str) -> FakeBlock:
+        """Loads the block named `name`."""
+        return cls(name)
+
+    def copy(self, update: dict) -> FakeBlock:
+        """Copies the block, which nothing reads here."""
+        return self
+
+
+class FakeDeployment:
+    """Stands in for `Deployment`, building without the API."""
+
+    @classmethod
+    async def build_from_flow(cls, flow, name: str, **kwds):
+        """Builds a deployment named `name`."""
+        return SimpleNamespace(name=name)
+
+
+def load_flow(entrypoint: str):
+    """Loads a flow, failing for the entrypoints of broken flows."""
+    if "broken" in entrypoint:
+        raise ImportError(f"Cannot import '{entrypoint}'")
+    return entrypoint
+
+
+@pytest.fixture
+def fake_prefect(monkeypatch: MonkeyPatch):
+    """Deploys with fake blocks and deployments instead of the API."""
+    monkeypatch.setattr(deploy, "GitHubRepository", FakeBlock)
+    monkeypatch.setattr(deploy, "ECSTask", FakeBlock)
+    monkeypatch.setattr(deploy, "Deployment", FakeDeployment)
+    monkeypatch.setattr(deploy, "load_flow_from_entrypoint", load_flow)
+    monkeypatch.setattr(deploy, "cached_packages", lambda *args: [])
+
+
+@pytest.fixture
+def manifest() -> dict:
+    """Manifest of two flows sharing defaults."""
+    return {
+        "defaults": {"infra_block": "ecs-task-etl"},
+        "flows": [
+            {"entrypoint": "flows/etl.py:etl", "name": "ETL"},
+            {
+                "entrypoint": "flows/broken.py:report",
+                "name": "Report",
+                "schedule": "0 1 * * *",
+                "infra_block": "ecs-task-report",
+            },
+        ],
+    }
+
+
+@pytest.mark.parametrize(argnames="suffix", argvalues=[".yaml", ".json"])
+def test_read_manifest(tmp_path: Path, manifest: dict, suffix: str):
+    """Tests `read_manifest` reads YAML and JSON, applying the defaults."""
+    path = tmp_path / f"manifest{suffix}"
+    path.write_text(
+        json.dumps(manifest) if suffix == ".json" else yaml.dump(manifest)
+    )
+
+    etl, report = deploy.read_manifest(path)
+
+    assert etl == deploy.BatchEntry(
+        entrypoint="flows/etl.py:etl", name="ETL", infra_block="ecs-task-etl"
+    )
+    assert report.infra_block == "ecs-task-report"
+    assert report.schedule == "0 1 * * *"
+    assert report.tags == ["Production"]
+
+
+def test_read_manifest_rejects_duplicate_names(tmp_path: Path, manifest: dict):
+    """Tests `read_manifest` rejects entries of one flow that would
+    overwrite each other.
+    """
+    manifest["flows"].append({"entrypoint": "flows/etl.py:etl", "name": "ETL"})
+    path = tmp_path / "manifest.yaml"
+    path.write_text(yaml.dump(manifest))
+
+    with pytest.raises(ValueError, match="'flows/etl.py:etl', 'ETL'"):
+        deploy.read_manifest(path)
+
+
+def test_read_manifest_allows_names_across_flows(
+    tmp_path: Path, manifest: dict
+):
+    """Tests `read_manifest` accepts a name reused by different flows, as
+    deployment names are only unique per flow.
+    """
+    manifest["flows"][1]["name"] = "ETL"
+    path = tmp_path / "manifest.yaml"
+    path.write_text(yaml.dump(manifest))
+
+    assert [e.name for e in deploy.read_manifest(path)] == ["ETL", "ETL"]
+
+
+def test_batch_fails_on_partial_failure(
+    fake_prefect, tmp_path: Path, manifest: dict
+):
+    """Tests `batch` reports every deployment and exits with an error if
+    any failed.
+    """
+    path = tmp_path / "manifest.yaml"
+    path.write_text(yaml.dump(manifest))
+
+    result = CliRunner().invoke(deploy.cli, ["batch", str(path)])
+
+    assert result.exit_code == 1
+    assert "OK      ETL (flows/etl.py:etl)" in result.output
+    assert (
+        "FAILED  Report (flows/broken.py:report): ImportError" in result.output
+    )
+    assert "1 succeeded, 1 failed" in result.output
+
+
+def test_batch_succeeds(fake_prefect, tmp_path: Path, manifest: dict):
+    """Tests `batch` exits cleanly when every deployment is built."""
+    del manifest["flows"][1]
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(manifest))
+
+    result = CliRunner().invoke(deploy.cli, ["batch", str(path)])
+
+    assert result.exit_code == 0, result.output
+    assert "1 succeeded, 0 failed" in result.output
+
+
+def test_batch_rejects_duplicate_names(tmp_path: Path, manifest: dict):
+    """Tests `batch` rejects a manifest with repeated names before
+    deploying anything.
+    """
+    manifest["flows"].append({"entrypoint": "flows/etl.py:etl", "name": "ETL"})
+    path = tmp_path / "manifest.yaml"
+    path.write_text(yaml.dump(manifest))
+
+    result = CliRunner().invoke(deploy.cli, ["batch", str(path)])
+
+    assert result.exit_code == 2
+    assert "must be unique" in result.output
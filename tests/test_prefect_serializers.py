@@ -0,0 +1,214 @@
+"""
+Tests for the src.prefect_.serializers module.
+
+"""
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+
+import pandas as pd
+import polars as pl
+import pytest
+from prefect.filesystems import LocalFileSystem, RemoteFileSystem
+
+from src.prefect_ import serializers
+
+
+@pytest.fixture
+def frame() -> pl.DataFrame:
+    """A small Polars DataFrame."""
+    return pl.DataFrame({"a": list(range(1_000)), "b": ["x", "y"] * 500})
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    """A small Pandas DataFrame."""
+    return pd.DataFrame({"a": list(range(1_000)), "b": ["x", "y"] * 500})
+
+
+@pytest.mark.parametrize("compression", ["uncompressed", "lz4", "zstd"])
+def test_polars_ipc_round_trip(frame: pl.DataFrame, compression: str):
+    """Tests `PolarsIPCSerializer` loads what it dumps."""
+    serializer = serializers.PolarsIPCSerializer(compression=compression)
+    assert serializer.loads(serializer.dumps(frame)).frame_equal(frame)
+
+
+def test_polars_ipc_memory_map_removes_spill(
+    frame: pl.DataFrame, tmp_path: Path
+):
+    """Tests memory-mapped loads leave no spilled file behind."""
+    serializer = serializers.PolarsIPCSerializer(
+        memory_map=True, spill_directory=str(tmp_path)
+    )
+    df = serializer.loads(serializer.dumps(frame))
+    assert list(tmp_path.iterdir()) == []
+    assert df.frame_equal(frame)
+
+
+def test_polars_ipc_lazy_spills_to_temporary_directory(frame: pl.DataFrame):
+    """Tests lazy loads share one spilled file per result in the
+    process's temporary spill directory.
+    """
+    serializer = serializers.PolarsIPCSerializer(lazy=True)
+    blob = serializer.dumps(frame)
+    lf = serializer.loads(blob)
+    assert isinstance(lf, pl.LazyFrame)
+    assert lf.select(pl.col("a").sum()).collect().item() == sum(range(1_000))
+
+    serializer.loads(blob)
+    spilled = list(serializers._default_spill_directory().glob("*.arrow"))
+    assert len(spilled) == 1
+    assert not list(spilled[0].parent.glob("*.partial"))
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"compression": "gzip"},
+        {"reuse_buffer": False},
+        {
+            "method": "csv",
+            "compression": "gzip",
+            "read_options": {"index_col": 0},
+        },
+        {"method": "json", "compression": "bz2"},
+    ],
+)
+def test_pandas_round_trip(df: pd.DataFrame, options: dict):
+    """Tests `PandasSerializer` loads what it dumps, decompressing with the
+    compression it wrote.
+    """
+    serializer = serializers.PandasSerializer(**options)
+    pd.testing.assert_frame_equal(serializer.loads(serializer.dumps(df)), df)
+
+
+def test_pandas_default_keeps_dtypes(df: pd.DataFrame):
+    """Tests `PandasSerializer` defaults to parquet, which keeps dtypes and
+    the index.
+    """
+    df = df.assign(
+        c=pd.Categorical(df["b"]),
+        d=pd.date_range("2023-01-01", periods=len(df), freq="s"),
+    ).set_index("a")
+    serializer = serializers.PandasSerializer()
+    blob = serializer.dumps(df)
+    assert blob.startswith(b"PAR1")
+    pd.testing.assert_frame_equal(serializer.loads(blob), df)
+
+
+def test_pandas_reuses_buffer(df: pd.DataFrame):
+    """Tests `PandasSerializer` writes every frame of a thread into one
+    buffer, without leaking a larger earlier frame into a smaller one.
+    """
+    serializer = serializers.PandasSerializer(method="csv")
+    large = serializer.dumps(pd.concat([df] * 10))
+    buffer_ = serializers._buffers.value
+    small = serializer.dumps(df.head())
+
+    assert serializers._buffers.value is buffer_
+    assert small == df.head().to_csv().encode()
+    assert len(buffer_.getbuffer()) >= len(large)
+
+
+def test_pandas_compression_applies(df: pd.DataFrame):
+    """Tests `PandasSerializer` writes with its `compression`."""
+    plain = serializers.PandasSerializer(method="csv").dumps(df)
+    compressed = serializers.PandasSerializer(
+        method="csv", compression="gzip"
+    ).dumps(df)
+    assert compressed.startswith(b"\x1f\x8b")
+    assert len(compressed) < len(plain)
+
+
+def test_pandas_parquet_row_group_size(df: pd.DataFrame):
+    """Tests `PandasSerializer` writes parquet in row groups of
+    `row_group_size`.
+    """
+    pq = pytest.importorskip("pyarrow.parquet")
+    serializer = serializers.PandasSerializer(
+        method="parquet", row_group_size=100
+    )
+    blob = serializer.dumps(df)
+    assert pq.ParquetFile(io.BytesIO(blob)).num_row_groups == 10
+    pd.testing.assert_frame_equal(serializer.loads(blob), df)
+
+
+def test_partitioned_parquet_writes_partitions_and_manifest(
+    frame: pl.DataFrame, tmp_path: Path
+):
+    """Tests `PartitionedParquetSerializer` writes a partition per
+    `partition_rows` rows and lists them in the manifest with the id of the
+    saved storage block.
+    """
+    storage = LocalFileSystem(basepath=str(tmp_path))
+    serializer = serializers.PartitionedParquetSerializer(
+        storage=storage, partition_rows=300
+    )
+
+    manifest = json.loads(serializer.dumps(frame))
+
+    assert manifest["frame"] == "polars"
+    assert manifest["rows"] == 1_000
+    assert len(manifest["partitions"]) == 4
+    assert all((tmp_path / p).is_file() for p in manifest["partitions"])
+    assert manifest["storage"] == str(storage._block_document_id)
+    assert "storage" not in serializer.dict()
+
+
+def test_partitioned_parquet_loads_through_saved_block(
+    frame: pl.DataFrame, tmp_path: Path
+):
+    """Tests a `PartitionedParquetSerializer` rebuilt from its fields, as
+    Prefect does when reading a result, loads the dataset through the
+    storage block of the manifest.
+    """
+    writer = serializers.PartitionedParquetSerializer(
+        storage=LocalFileSystem(basepath=str(tmp_path)), partition_rows=300
+    )
+    blob = writer.dumps(frame)
+
+    reader = serializers.PartitionedParquetSerializer(**writer.dict())
+
+    assert reader.loads(blob).frame_equal(frame)
+
+
+def test_partitioned_parquet_scans_local_storage(
+    frame: pl.DataFrame, tmp_path: Path
+):
+    """Tests a lazy `PartitionedParquetSerializer` scans the dataset."""
+    serializer = serializers.PartitionedParquetSerializer(
+        storage=LocalFileSystem(basepath=str(tmp_path)),
+        partition_rows=300,
+        lazy=True,
+    )
+
+    df = serializer.loads(serializer.dumps(frame))
+
+    assert isinstance(df, pl.LazyFrame)
+    assert df.collect().frame_equal(frame)
+
+
+def test_partitioned_parquet_rejects_lazy_remote_storage():
+    """Tests `PartitionedParquetSerializer` rejects `lazy` for storage it
+    cannot scan.
+    """
+    with pytest.raises(ValueError, match="'lazy' must be False"):
+        serializers.PartitionedParquetSerializer(
+            storage=RemoteFileSystem(basepath="s3://bucket/folder"), lazy=True
+        )
+
+
+def test_partitioned_parquet_pandas_round_trip(
+    df: pd.DataFrame, tmp_path: Path
+):
+    """Tests `PartitionedParquetSerializer` loads Pandas frames back as
+    Pandas.
+    """
+    pytest.importorskip("pyarrow")
+    serializer = serializers.PartitionedParquetSerializer(
+        storage=LocalFileSystem(basepath=str(tmp_path)), partition_rows=300
+    )
+    pd.testing.assert_frame_equal(serializer.loads(serializer.dumps(df)), df)